@@ -1,11 +1,12 @@
 import argparse
-import pandas as pd
 
 from pathlib import Path
 
-from optiface.core.optispace import ProblemSpace, read_pspace_from_yaml
+from optiface.core.optispace import read_pspace_from_yaml
 
-from optiface.dbmanager.dbm import AlchemyAPI, init_alchemy_api
+from optiface.dbmanager.dbm import BatchWriter, init_alchemy_api
+from optiface.dbmanager.concurrency import WriteConcurrency
+from optiface.dbmanager.readers import read_batches, read_frames, ENGINES
 
 
 def main():
@@ -13,23 +14,43 @@ def main():
         prog="OptiFace csv migrator",
     )
     parser.add_argument("problem", type=str)
-    parser.add_argument("csv", type=str)
+    # any format with a registered reader: .csv, .csv.gz, .csv.zst, .jsonl, .parquet
+    parser.add_argument("csv", type=str, nargs="+")
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    # arrow: typed, multithreaded csv parsing straight into frames, pandas: row by row through a BatchWriter
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    # safe to run many migrators against one experiments.db at once
+    parser.add_argument("--busy-timeout-ms", type=int, default=5_000)
+    # writers take turns on a lock file next to the db: a mutex, every migrator still commits its own batches
+    parser.add_argument("--writer-lock", action="store_true")
     args = parser.parse_args()
-    pname = args.problem
-    csv_path = args.csv
-
-    pspace = read_pspace_from_yaml(pname)
-    db_api = init_alchemy_api(pspace)
-
-    if not db_api:
-        # TODO: this is stupid rn, need to figure out union[error | AlchemyAPI] return values
-        # this path will never actually be reached because if the function returned None it would have raised an error first
-        # in summary: currently, functions are signed -> None | AlchemyAPI, but raise hacky errors in the function
-        # need to refactor to be able to return these errors and handle them when I want in the call stack
-        print("error in pspace - db reconcile")
-    else:
-        df = pd.read_csv(csv_path)
-        db_api.insert_rows(df)
+
+    pspace = read_pspace_from_yaml(args.problem)
+    concurrency = WriteConcurrency(
+        busy_timeout_ms=args.busy_timeout_ms, writer_lock=args.writer_lock
+    )
+    db_api = init_alchemy_api(pspace, concurrency=concurrency)
+
+    if not db_api.is_ok():
+        print(db_api.unwrap_err())
+        return
+
+    wapi = db_api.unwrap()
+    if args.engine != "pandas":
+        for csv_path in args.csv:
+            for first_line, frame in read_frames(
+                Path(csv_path), pspace, engine=args.engine
+            ):
+                status = wapi.insert_frame(frame, first_line=first_line)
+                print(status.unwrap_notes())
+        return
+
+    with BatchWriter(wapi, batch_size=args.batch_size) as writer:
+        for csv_path in args.csv:
+            for first_line, df in read_batches(Path(csv_path), pspace):
+                for i, row in enumerate(df.to_dict(orient="records")):
+                    writer.add(row, line=first_line + i)
+    print(writer.status.unwrap_notes())
 
 
 if __name__ == "__main__":
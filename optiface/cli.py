@@ -1,28 +1,52 @@
+import os
 import sys
+import csv
+import yaml
 import platform
-import pandas as pd
 
+from datetime import datetime, timezone
 from typing import Callable
 from pathlib import Path
 
 from optiface.core.optierror import Status, StatusOr, Failure, Success
 
+from optiface.core import optitrace
+
+from optiface import metrics
+
 from optiface.core.optispace import (
     ProblemSpace,
     OptiSpace,
     OSpaceManager,
     read_pspace_from_yaml,
 )
+from optiface.core.inference import infer_pspace
 
 from optiface.dbmanager.dbm import AlchemyWAPI, init_alchemy_api
+from optiface.dbmanager.quarantine import (
+    QuarantineWriter,
+    quarantine_path,
+    is_quarantine,
+)
+from optiface.dbmanager.readers import read_frames, reader_for, supported_suffixes
+from optiface.dbmanager.planner import RunPlanner
+from optiface.dbmanager.archive import RunArchive
+from optiface.dbmanager.backup import BackupManager
 
 from optiface.constants import (
     _SPACE,
     _MIGRATIONS,
+    _PLANS,
+    _TRACE_CAPTURE_ENV,
+    _TRACE_JSON_ENV,
+    _TRACE_OTLP_ENV,
+    _METRICS_TEXTFILE_ENV,
+    _METRICS_PORT_ENV,
 )
 
 from rich.console import Console
 from rich.prompt import Prompt
+from rich.table import Table
 
 
 class OptiWizard:
@@ -114,6 +138,30 @@ class OptiWizard:
                 f"{self._TAB}[{self._SUCCESS_2_STYLE}]{key}:[/{self._SUCCESS_2_STYLE}] {val}"
             )
 
+    def trace_summary(self, tracer: optitrace.Tracer) -> None:
+        table = Table(title="Ingest stages", title_style=self._HEADER_STYLE)
+        for col in ["stage", "calls", "total ms", "mean ms", "max ms"]:
+            table.add_column(col, justify="left" if col == "stage" else "right")
+        for s in tracer.summary():
+            table.add_row(
+                s["stage"],
+                str(s["calls"]),
+                f"{s['total_ms']:.2f}",
+                f"{s['mean_ms']:.3f}",
+                f"{s['max_ms']:.2f}",
+            )
+        self.console.print(table)
+        self.keyval_hl_list({k: str(v) for k, v in sorted(tracer.counters.items())})
+
+        if tracer.profile_report is not None:
+            self.standard(tracer.profile_report)
+        if tracer.memory_report is not None:
+            self.standard(
+                f"peak traced memory: {tracer.memory_report['peak_bytes']} bytes"
+            )
+            for line in tracer.memory_report["top"]:
+                self.list_item(line)
+
     def success(self, msg: str) -> None:
         self.console.print(f"\n{msg}", style=self._SUCCESS_STYLE)
 
@@ -152,8 +200,11 @@ class OptiWizard:
 class OptiFront:
     _CMD_DESCR: dict[str, str] = {
         "migrate": "Migrate data to a problem db",
-        "new": "Create a new problem space",
+        "new": "Create a new problem space (optionally inferred from csv logs)",
         "switch": "Switch to an existing problem space",
+        "plan": "List the missing runs of an instance x solver grid",
+        "archive": "Move old runs out of the problem db into parquet files",
+        "backup": "Take a verified online backup of the problem db",
         "status": "Show current status and available problem spaces",
         "help": "Show this help message",
         "exit": "Exit the application",
@@ -167,6 +218,9 @@ class OptiFront:
             "migrate": self.migrate_data,
             "new": self.new_pspace,
             "switch": self.switch_pspace,
+            "plan": self.plan_runs,
+            "archive": self.archive_runs,
+            "backup": self.backup_db,
             "status": self.show_status,
             "help": self.show_help,
             "exit": self.exit_optiface,
@@ -201,14 +255,18 @@ class OptiFront:
             if entry.is_dir():
                 self.wizard.standard(f"Skipping {entry}, it is a directory...")
                 continue
-            if not entry.is_file() or entry.suffix.lower() != ".csv":
-                self.wizard.standard(f"Skipping {entry}, it is not a csv file...")
+            if is_quarantine(entry):
+                self.wizard.standard(
+                    f"Skipping {entry}, it is a quarantine of rejected rows..."
+                )
+                continue
+            if not entry.is_file() or reader_for(entry) is None:
+                self.wizard.standard(
+                    f"Skipping {entry}, it is not a supported file ({', '.join(supported_suffixes())})..."
+                )
                 continue
 
-            if self.wizard.yn_input(f"Would you like to migrate csv file: {entry}?"):
-                # consider who's responsible for error handling on problem space <-> dbschema <-> new csv data validation checks
-                df = pd.read_csv(entry)
-
+            if self.wizard.yn_input(f"Would you like to migrate file: {entry}?"):
                 if not self.alchemy_wapi:
                     self.wizard.warning(
                         "Uninitialized db api, problemspace was problably problematic. Please switch."
@@ -216,15 +274,153 @@ class OptiFront:
                     self.switch_pspace()
                     return
 
-                status: Status = self.alchemy_wapi.insert_rows(df)
+                with optitrace.tracing(
+                    capture=os.environ.get(_TRACE_CAPTURE_ENV),
+                    json_path=os.environ.get(_TRACE_JSON_ENV),
+                    otlp_path=os.environ.get(_TRACE_OTLP_ENV),
+                ) as tracer:
+                    # consider who's responsible for error handling on problem space <-> dbschema <-> new csv data validation checks
+                    status: Status = Success(title="Frame insertion from AlchemyWAPI")
+                    # rejected rows, with their line numbers, next to the source for fixing and re-ingesting
+                    with QuarantineWriter(quarantine_path(entry)) as quarantine:
+                        # streamed batch by batch, never the whole file in memory
+                        for first_line, frame in read_frames(
+                            entry, self.osm.current, quarantine=quarantine
+                        ):
+                            part: Status = self.alchemy_wapi.insert_frame(
+                                frame, quarantine=quarantine, first_line=first_line
+                            )
+                            for file, notes in part.unwrap_notes().items():
+                                for note in notes:
+                                    status.add_note(note=note, file=file)
+                    optitrace.count(optitrace.COUNT_BYTES_IN, entry.stat().st_size)
+                    if quarantine.n_rows > 0:
+                        status.add_note(
+                            note=f"quarantined {quarantine.n_rows} rejected rows to {quarantine.path}",
+                            file=__file__,
+                        )
+
+                metrics.MIGRATED_FILES.labels(problem=self.osm.current_name).inc()
+                metrics.MIGRATED_BYTES.labels(problem=self.osm.current_name).inc(
+                    entry.stat().st_size
+                )
+                if os.environ.get(_METRICS_TEXTFILE_ENV):
+                    metrics.REGISTRY.write_textfile(os.environ[_METRICS_TEXTFILE_ENV])
 
                 if status.is_err():
                     self.wizard.unwrap_failure(failure=status)
                 else:
                     self.wizard.unwrap_success(success=status)
+                self.wizard.trace_summary(tracer)
 
         self.wizard.success("No more files to migrate -> All done!")
 
+    def plan_runs(self) -> None:
+        if not self.alchemy_wapi:
+            self.wizard.warning(
+                "Uninitialized db api, problemspace was problably problematic. Please switch."
+            )
+            self.switch_pspace()
+            return
+
+        self.wizard.standard(
+            f"Let's plan some runs! The active problemspace is: {self.osm.current_name}"
+        )
+        self.wizard.standard(
+            "The grid is a yaml file mapping instance_key / solver_key features to lists of values."
+        )
+        grid_path = Path(self.wizard.string_input("Path to your grid yaml file:"))
+
+        if not grid_path.is_file():
+            self.wizard.warning(f"Grid file {grid_path} does not exist!")
+            return
+
+        reps_str = self.wizard.string_input(
+            "How many runs should each combination have?"
+        )
+        if not reps_str.isdigit() or int(reps_str) < 1:
+            self.wizard.warning(f"{reps_str} is not a positive number of runs!")
+            return
+
+        with open(grid_path, "r") as file:
+            grid = yaml.safe_load(file)
+
+        planner = RunPlanner(self.alchemy_wapi)
+        res = planner.plan(grid, reps=int(reps_str))
+
+        if res.is_err():
+            self.wizard.unwrap_failure(failure=res)
+            return
+
+        plans_dir: Path = _PLANS / self.osm.current_name
+        plans_dir.mkdir(parents=True, exist_ok=True)
+        out_path = plans_dir / f"{grid_path.stem}-missing.csv"
+        n_missing = 0
+
+        with open(out_path, "w", newline="") as file:
+            writer: csv.DictWriter | None = None
+            for chunk in res.unwrap() or []:
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=list(chunk[0].keys()))
+                    writer.writeheader()
+                writer.writerows(chunk)
+                n_missing += len(chunk)
+
+        self.wizard.success(
+            f"{n_missing} of {planner.grid_size(grid)} combinations need more runs, written to {out_path}"
+        )
+
+    def archive_runs(self) -> None:
+        if not self.alchemy_wapi:
+            self.wizard.warning(
+                "Uninitialized db api, problemspace was problably problematic. Please switch."
+            )
+            self.switch_pspace()
+            return
+
+        self.wizard.standard(
+            f"Let's archive some runs! The active problemspace is: {self.osm.current_name}"
+        )
+        cutoff_str = self.wizard.string_input(
+            "Archive runs added before (YYYY-MM-DD, UTC):"
+        )
+        try:
+            cutoff = datetime.strptime(cutoff_str, "%Y-%m-%d").replace(
+                tzinfo=timezone.utc
+            )
+        except ValueError:
+            self.wizard.warning(f"{cutoff_str} is not a YYYY-MM-DD date!")
+            return
+
+        try:
+            archive = RunArchive(self.alchemy_wapi)
+        except RuntimeError as e:
+            self.wizard.warning(str(e))
+            return
+
+        status = archive.archive(before=cutoff)
+        if status.is_err():
+            self.wizard.unwrap_failure(failure=status)
+            return
+
+        self.wizard.success(status.unwrap_title())
+        for notes in status.unwrap_notes().values():
+            for note in notes:
+                self.wizard.list_item(note)
+
+    def backup_db(self) -> None:
+        manager = BackupManager(self.osm.current)
+        res = manager.backup()
+
+        if res.is_err():
+            self.wizard.unwrap_failure(failure=res)
+            return
+
+        self.wizard.success(res.unwrap_title())
+        for notes in res.unwrap_notes().values():
+            for note in notes:
+                self.wizard.list_item(note)
+
     def _handle_alchemy_res(
         self,
         res: StatusOr[AlchemyWAPI],
@@ -250,7 +446,26 @@ class OptiFront:
             self.wizard.warning(f"Problem {name} already exists!")
             return
 
-        self.osm.add_new_pspace(name)
+        pspace: ProblemSpace | None = None
+        if self.wizard.yn_input("Would you like to infer the features from csv logs?"):
+            migration_dir: Path = _MIGRATIONS / name
+            paths = self.wizard.string_input(
+                f"Csv files (space separated, or none for every csv in {migration_dir}):"
+            ).split()
+            csv_paths: list[Path] = (
+                [Path(p) for p in paths]
+                if paths
+                else sorted(migration_dir.glob("*.csv"))
+                + sorted(migration_dir.glob("*.csv.gz"))
+            )
+            inferred: StatusOr[ProblemSpace] = infer_pspace(name, csv_paths)
+            if inferred.is_err():
+                self.wizard.unwrap_failure(inferred)
+                return
+            self.wizard.unwrap_success(inferred)
+            pspace = inferred.unwrap()
+
+        self.osm.add_new_pspace(name, pspace)
 
         alchemy_res: StatusOr[AlchemyWAPI] = init_alchemy_api(self.osm.current)
 
@@ -301,6 +516,11 @@ class OptiFront:
         if not _MIGRATIONS.exists():
             _MIGRATIONS.mkdir()
 
+        if os.environ.get(_METRICS_PORT_ENV):
+            port = int(os.environ[_METRICS_PORT_ENV])
+            metrics.REGISTRY.serve(port=port)
+            self.wizard.standard(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+
         self.wizard.show_greeting()
 
         return
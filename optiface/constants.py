@@ -8,13 +8,36 @@ _DEFAULT = "default"
 _KNAPSACK = "knapsack"
 _SPACE = Path("space")
 _MIGRATIONS = Path("migrations")
+# missing-run plans written by the plan command: plans/<problem>/<grid>-missing.csv, kept out of migrations/ so
+# they are never offered for migration as results
+_PLANS = Path("plans")
 
 _PS_FILE = "problemspace.yaml"
 _EXPERIMENTS_DBFILE = "experiments.db"
 
+# optional partitioned layout: space/<problem>/partitions/<partition>.db
+_PARTITIONS = "partitions"
+_PARTITIONING_FILE = "partitioning.yaml"
+
+# cold runs moved out of experiments.db: space/<problem>/archive/*.parquet
+_ARCHIVE = "archive"
+
+# rotated online backups of experiments.db: space/<problem>/backups/
+_BACKUPS = "backups"
+
+# opt-in ingest tracing outputs / capture mode (see core.optitrace)
+_TRACE_CAPTURE_ENV = "OPTIFACE_TRACE_CAPTURE"
+_TRACE_JSON_ENV = "OPTIFACE_TRACE_JSON"
+_TRACE_OTLP_ENV = "OPTIFACE_TRACE_OTLP"
+
+# opt-in metrics exposition (see optiface.metrics): node_exporter textfile path, localhost http port
+_METRICS_TEXTFILE_ENV = "OPTIFACE_METRICS_TEXTFILE"
+_METRICS_PORT_ENV = "OPTIFACE_METRICS_PORT"
+
 _APP_NAME = "optiface"
 _APP_AUTHOR = "lucawrabetz"
 _SQLITE_PREF = "sqlite+pysqlite:///"
+_AIOSQLITE_PREF = "sqlite+aiosqlite:///"
 
 
 def opti_user_data_dir() -> Path:
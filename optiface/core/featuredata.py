@@ -17,6 +17,14 @@ _RUN_ID = "run_id"
 _TIMESTAMP_ADDED = "timestamp_added"
 _ADDED_FROM = "added_from"
 
+# text accepted for bool features where values arrive as strings (job outputs, run keys)
+_TRUE_STRS = {"true", "1", "yes"}
+_FALSE_STRS = {"false", "0", "no"}
+
+# added_from values
+_FROM_CSV = "CSV"
+_FROM_RUNNER = "RUNNER"
+
 
 def init_data_feature_run_id() -> dict[str, Any]:
     return {
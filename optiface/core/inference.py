@@ -0,0 +1,308 @@
+import csv
+import gzip
+import io
+import random
+import re
+
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from optiface.core.optierror import StatusOr, Success, Failure
+from optiface.core.optispace import Feature, ProblemSpace
+from optiface.core.featuredata import (
+    _RUN_KEY_FDATA,
+    _INSTANCE_KEY,
+    _SOLVER_KEY,
+    _OUTPUT_KEY,
+)
+
+_SAMPLE_ROWS = 10_000
+
+# files larger than this are sampled at random byte offsets instead of being read through
+_SEEK_THRESHOLD_BYTES = 64 << 20
+# bytes read past a random offset to find the end of the partial line and one full line after it
+_SEEK_WINDOW_BYTES = 64 << 10
+
+_BOOL_STRINGS = {"true", "false"}
+
+# column name tokens that place a feature in a key (solver is checked before output before instance), only numeric
+# columns are outputs: summaries and sketches aggregate them, a str status or a bool flag is an instance parameter
+_SOLVER_TOKENS = {
+    "solver",
+    "method",
+    "algorithm",
+    "algo",
+    "alg",
+    "heuristic",
+    "variant",
+    "config",
+    "strategy",
+    "model",
+    "formulation",
+}
+_OUTPUT_TOKENS = {
+    "objective",
+    "obj",
+    "time",
+    "ms",
+    "sec",
+    "secs",
+    "seconds",
+    "runtime",
+    "gap",
+    "bound",
+    "lb",
+    "ub",
+    "nodes",
+    "iterations",
+    "iters",
+    "cost",
+    "value",
+    "best",
+    "status",
+    "memory",
+    "mem",
+    "cuts",
+    "optimal",
+    "feasible",
+    "solved",
+}
+_INSTANCE_TOKENS = {
+    "instance",
+    "set",
+    "name",
+    "rep",
+    "seed",
+    "size",
+    "file",
+    "density",
+    "n",
+    "m",
+    "k",
+}
+
+# non-required features default to the zero of their type
+_OUTPUT_TYPE_STRS = {"int", "float"}
+
+_TYPE_DEFAULTS: dict[str, Any] = {
+    "str": "",
+    "int": 0,
+    "float": 0.0,
+    "bool": False,
+    "datetime": datetime(1970, 1, 1, tzinfo=timezone.utc),
+}
+
+
+def _open_text(path: Path) -> io.TextIOBase:
+    if path.name.lower().endswith(".gz"):
+        return gzip.open(path, "rt", newline="")
+    return open(path, "r", newline="")
+
+
+def _reservoir(
+    rows: Iterator[list[str]], k: int, rng: random.Random
+) -> list[list[str]]:
+    # Algorithm R: every row of the stream ends up in the sample with probability k / n
+    sample: list[list[str]] = []
+    for i, row in enumerate(rows):
+        if i < k:
+            sample.append(row)
+            continue
+        j = rng.randint(0, i)
+        if j < k:
+            sample[j] = row
+    return sample
+
+
+def _seek_sample(
+    path: Path, header_bytes: int, k: int, rng: random.Random
+) -> list[list[str]]:
+    """
+    k rows read at random byte offsets: seek, drop the partial line, parse the next full one.
+    Long lines are a little more likely to be hit, and a quoted field with newlines can confuse a read, neither
+    matters for guessing types.
+    """
+    size = path.stat().st_size
+    sample: list[list[str]] = []
+    with open(path, "rb") as file:
+        for _ in range(k):
+            file.seek(rng.randint(header_bytes, size - 1))
+            window = file.read(_SEEK_WINDOW_BYTES).split(b"\n")
+            if len(window) < 3:
+                continue
+            line = window[1].decode(errors="replace").rstrip("\r")
+            sample.extend(csv.reader([line]))
+    return sample
+
+
+def sample_csv(
+    path: Path, k: int = _SAMPLE_ROWS, seed: int = 0
+) -> tuple[list[str], list[list[str]]]:
+    """
+    The header and a uniform sample of (at most) k rows of a csv. Small (and gzip) files are streamed once through
+    a reservoir, large plain files are only touched at k random offsets, so sampling is independent of file size.
+    """
+    rng = random.Random(seed)
+    compressed = path.name.lower().endswith(".gz")
+    if compressed or path.stat().st_size <= _SEEK_THRESHOLD_BYTES:
+        with _open_text(path) as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            return header, _reservoir(reader, k, rng)
+
+    with open(path, "rb") as file:
+        first = file.readline()
+    header = next(csv.reader([first.decode(errors="replace")]), [])
+    sample = _seek_sample(path, len(first), k, rng)
+    return header, [row for row in sample if len(row) == len(header)]
+
+
+def _parses(values: list[str], parse) -> bool:
+    try:
+        for v in values:
+            parse(v)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_datetime(v: str) -> datetime:
+    return datetime.fromisoformat(v)
+
+
+def infer_feature_type_str(values: list[str]) -> str:
+    """
+    Narrowest yaml feature type (see yaml_to_feature_type) that every (non-empty) sampled value parses as.
+    """
+    if len(values) == 0:
+        return "str"
+    if all(v.lower() in _BOOL_STRINGS for v in values):
+        return "bool"
+    if _parses(values, int):
+        return "int"
+    if _parses(values, float):
+        return "float"
+    if _parses(values, _parse_datetime):
+        return "datetime"
+    return "str"
+
+
+def _tokens(name: str) -> set[str]:
+    # set_name, setName, "Set Name" -> {"set", "name"}
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name)
+    return {t for t in re.split(r"[^A-Za-z0-9]+", spaced.lower()) if t != ""}
+
+
+def guess_key(name: str, feature_type_str: str) -> str:
+    """
+    instance_key, solver_key or output_key from the column name, falling back on the type: a float column that
+    names nothing else is most likely a measured output, anything else an instance parameter.
+    Only int / float columns are outputs, a non-numeric column named like one (status, optimal) is an instance parameter.
+    """
+    tokens = _tokens(name)
+    if tokens & _SOLVER_TOKENS:
+        return _SOLVER_KEY
+    if tokens & _OUTPUT_TOKENS and feature_type_str in _OUTPUT_TYPE_STRS:
+        return _OUTPUT_KEY
+    if tokens & _INSTANCE_TOKENS:
+        return _INSTANCE_KEY
+    if feature_type_str == "float":
+        return _OUTPUT_KEY
+    return _INSTANCE_KEY
+
+
+def _names(name: str, taken: set[str]) -> tuple[str, str]:
+    words = [w for w in re.split(r"[^A-Za-z0-9]+", name) if w != ""]
+    verbose_name = " ".join(w.capitalize() for w in words) or name
+    short_name = "_".join(w[0].lower() for w in words) or name
+    if short_name in taken:
+        short_name = name
+    return verbose_name, short_name
+
+
+def infer_pspace(
+    name: str, paths: list[Path], sample_rows: int = _SAMPLE_ROWS, seed: int = 0
+) -> StatusOr[ProblemSpace]:
+    """
+    Bootstrap a ProblemSpace from existing csv logs, from a sample of rows of each file:
+        - type: the narrowest of bool, int, float, datetime, str that all sampled values parse as
+        - required: no sampled row leaves the column empty, otherwise not required with the zero of its type as default
+        - key: guessed from the column name (see guess_key)
+    Columns are the union of the headers, in order of appearance; run key columns (run_id, ...) are skipped.
+    A column only some files have is not required. Review the notes, then the written problemspace.yaml.
+    """
+    columns: dict[str, list[str]] = dict()
+    n_rows: Counter[str] = Counter()
+    n_empty: Counter[str] = Counter()
+    total = 0
+
+    for i, path in enumerate(paths):
+        if not path.is_file():
+            failure: Failure[ProblemSpace] = Failure(title="Schema inference")
+            failure.add_err(err=f"no csv file at {path}", file=__file__)
+            return failure
+        header, rows = sample_csv(path, k=sample_rows, seed=seed + i)
+        total += len(rows)
+        for j, column in enumerate(header):
+            values = columns.setdefault(column, [])
+            n_rows[column] += len(rows)
+            for row in rows:
+                v = row[j].strip() if j < len(row) else ""
+                if v == "":
+                    n_empty[column] += 1
+                else:
+                    values.append(v)
+
+    if len(columns) == 0:
+        failure = Failure(title="Schema inference")
+        failure.add_err(err="no columns found in the given files", file=__file__)
+        return failure
+
+    keys: dict[str, dict[str, Feature]] = {
+        _INSTANCE_KEY: dict(),
+        _SOLVER_KEY: dict(),
+        _OUTPUT_KEY: dict(),
+    }
+    taken: set[str] = set()
+    success: Success[ProblemSpace] = Success(title="Schema inference")
+
+    for column, values in columns.items():
+        if column in _RUN_KEY_FDATA:
+            success.add_note(
+                note=f"skipped {column}, it is part of the run key", file=__file__
+            )
+            continue
+
+        feature_type_str = infer_feature_type_str(values)
+        required = n_empty[column] == 0 and n_rows[column] == total and total > 0
+        default = None if required else _TYPE_DEFAULTS[feature_type_str]
+        key = guess_key(column, feature_type_str)
+        verbose_name, short_name = _names(column, taken)
+        taken.add(short_name)
+
+        keys[key][column] = Feature(
+            name=column,
+            required=required,
+            default=default,
+            verbose_name=verbose_name,
+            short_name=short_name,
+            feature_type_str=feature_type_str,
+        )
+        success.add_note(
+            note=f"{column}: {feature_type_str}, {'required' if required else f'default {default}'}, {key}",
+            file=__file__,
+        )
+
+    success.add_note(
+        note=f"inferred from {total} sampled rows of {len(paths)} files",
+        file=__file__,
+    )
+    success.value = ProblemSpace(
+        name=name,
+        instance_key=keys[_INSTANCE_KEY],
+        solver_key=keys[_SOLVER_KEY],
+        output_key=keys[_OUTPUT_KEY],
+    )
+    return success
@@ -1,13 +1,15 @@
 from pathlib import Path
+from functools import lru_cache
 from sqlalchemy.util import OrderedProperties
 import yaml
 from dataclasses import dataclass, field
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from typing import Any, TypeAlias, TypeVar, Generic, Callable, Type
 
 from optiface.core.optidatetime import OptiDateTimeFactory
+from optiface.core import optitrace
 
 from optiface.core.optierror import Status, Success, Failure
 
@@ -15,6 +17,7 @@ from optiface.core.optierror import Status, Success, Failure
 from optiface.core.featuredata import (
     _TIMESTAMP_ADDED,
     _ADDED_FROM,
+    _FROM_CSV,
     _RUN_KEY_FDATA,
     _DEFAULT_INSTANCE_KEY_FDATA,
     _DEFAULT_SOLVER_KEY_FDATA,
@@ -82,6 +85,91 @@ validate_allowed_types: dict[type, Callable[[Any], bool]] = {
 }
 
 
+# row validation error codes, see compile_row_validator
+_ROW_ERR_TYPE = "E_TYPE"
+_ROW_ERR_MISSING = "E_MISSING"
+
+# isinstance targets inlined by compile_row_validator, must agree with validate_allowed_types
+_compiled_isinstance_types: dict[type, tuple[type, ...]] = {
+    str: (str,),
+    int: (int,),
+    float: (int, float),
+    bool: (bool,),
+    datetime: (datetime,),
+}
+
+RowErrors: TypeAlias = list[tuple[str, str]]
+RowValidator: TypeAlias = Callable[
+    [dict[str, Any]], tuple[RowErrors | None, dict[str, Any] | None]
+]
+
+# (name, feature_type, required, default, type of default) per feature, in full_row order; the default's type is
+# part of the compile_row_validator cache key, 0, 0.0 and False compare (and hash) equal but fill rows differently
+RowSchema: TypeAlias = tuple[tuple[str, type, bool, Any, type], ...]
+
+# ProblemSpace fields whose reassignment changes the row schema
+_FEATURE_KEYS = frozenset((_INSTANCE_KEY, _SOLVER_KEY, _OUTPUT_KEY))
+
+
+@lru_cache(maxsize=None)
+def compile_row_validator(schema: RowSchema) -> RowValidator:
+    """
+    Generate a single specialized validator for a row schema, same semantics as the per-feature walk it replaces:
+        - a present, non-None value must pass the feature's type check
+        - a missing (or None) value is an error if the feature is required, otherwise it is filled with the default
+        - if there were no errors, columns that are not features are removed from the row
+
+    The generated function returns (errors, extras): errors is None or a list of (error code, feature name),
+    extras is None or a dict of the removed columns and their values.
+    """
+    namespace: dict[str, Any] = {
+        "_ROW_ERR_TYPE": _ROW_ERR_TYPE,
+        "_ROW_ERR_MISSING": _ROW_ERR_MISSING,
+    }
+    lines: list[str] = ["def _validate(row):", "    errs = None", "    get = row.get"]
+
+    for i, (name, feature_type, required, default, _) in enumerate(schema):
+        namespace[f"_t{i}"] = _compiled_isinstance_types[feature_type]
+        namespace[f"_d{i}"] = default
+        lines.append(f"    v = get({name!r})")
+        lines.append("    if v is not None:")
+        lines.append(f"        if not isinstance(v, _t{i}):")
+        lines.append("            if errs is None: errs = []")
+        lines.append(f"            errs.append((_ROW_ERR_TYPE, {name!r}))")
+        lines.append("    else:")
+        if required:
+            lines.append("        if errs is None: errs = []")
+            lines.append(f"        errs.append((_ROW_ERR_MISSING, {name!r}))")
+        else:
+            lines.append(f"        row[{name!r}] = _d{i}")
+
+    namespace["_fset"] = frozenset(name for name, *_ in schema)
+    lines.extend(
+        [
+            "    if errs is not None:",
+            "        return errs, None",
+            # every feature is now in the row, so any extra column shows up in the length
+            f"    if len(row) == {len(schema)}:",
+            "        return None, None",
+            "    extras = {c: row[c] for c in row if c not in _fset}",
+            "    for c in extras:",
+            "        del row[c]",
+            "    return None, extras",
+        ]
+    )
+
+    exec(compile("\n".join(lines), f"<row validator {len(schema)}>", "exec"), namespace)
+    return namespace["_validate"]
+
+
+def row_err_message(code: str, feature_name: str, row: dict[str, Any]) -> str:
+    if code == _ROW_ERR_TYPE:
+        return (
+            f"type not valid for feature {feature_name}, value is: {row[feature_name]}"
+        )
+    return f"missing feature {feature_name} which is required"
+
+
 @dataclass
 class Feature(Generic[T]):
     """
@@ -170,6 +258,20 @@ class ProblemSpace(BaseModel):
     solver_key: dict[str, Feature]
     output_key: dict[str, Feature]
 
+    # compiled on first use, cleared by features_changed
+    _row_validator: RowValidator | None = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _FEATURE_KEYS:
+            self.features_changed()
+
+    def features_changed(self) -> None:
+        """
+        Drops the compiled row validator, call after editing features in place (reassigning a key does it for you).
+        """
+        self._row_validator = None
+
     def print_features(self):
         print(f"pspace: {self.name}")
         for feature in _RUN_KEY_FDATA.values():
@@ -214,59 +316,50 @@ class ProblemSpace(BaseModel):
             + list(self.output_key.values())
         )
 
-    def add_run_key(self, row: dict[str, Any]) -> None:
-        # not run_id, as it is a primary_key, handled by sqlalchemy
-        row[_TIMESTAMP_ADDED] = odtf.optinow()
-        # can only migrate from csv for now
-        row[_ADDED_FROM] = "CSV"
+    def add_run_key(self, row: dict[str, Any], added_from: str = _FROM_CSV) -> None:
+        with optitrace.span(optitrace.SPAN_RUN_KEY):
+            # not run_id, as it is a primary_key, handled by sqlalchemy
+            row[_TIMESTAMP_ADDED] = odtf.optinow()
+            # csv migrations, or the local experiment runner
+            row[_ADDED_FROM] = added_from
+
+    def row_schema(self) -> RowSchema:
+        return tuple(
+            (f.name, f.feature_type, f.required, f.default, type(f.default))
+            for f in self.full_row()
+        )
+
+    @property
+    def row_validator(self) -> RowValidator:
+        """
+        Compiled validator for this problem space's row schema (compiled once per schema, see compile_row_validator).
+        """
+        if self._row_validator is None:
+            self._row_validator = compile_row_validator(self.row_schema())
+        return self._row_validator
 
     def validate_row(self, row: dict[str, Any]) -> Status:
         # Sanitizes the row in-place with defaults.
-        # TODO: skipping of run_key features? Extra unexpected features?
-
-        features: list[Feature] = self.full_row()
-
-        failure: Failure[None] = Failure(title="Row validation")
-
-        fset = set([f.name for f in features])
-
-        for f in features:
-            # if the row contains a value for the feature, it must be of the correct type
-            if f.name in row.keys() and row[f.name] is not None:
-                if not validate_allowed_types[f.feature_type](row[f.name]):
-                    failure.add_err(
-                        err=f"type not valid for feature {f.name}, value is: {row[f.name]}",
-                        file=__file__,
-                    )
-
-            # if feature is required, it must be found in the row
-            else:
-                if f.required:
-                    failure.add_err(
-                        err=f"missing feature {f.name} which is required", file=__file__
-                    )
-                else:
-                    row[f.name] = f.default
-
-            # result: f was either found in the row or it was not required and we added it
-
-        if failure.has_errs:
+        # TODO: skipping of run_key features?
+        errs, extras = self.row_validator(row)
+
+        if errs is not None:
+            failure: Failure[None] = Failure(title="Row validation")
+            for code, feature_name in errs:
+                failure.add_err(
+                    err=row_err_message(code, feature_name, row), file=__file__
+                )
             return failure
 
         # input row had all required features, now also filled in with defaults for missing
         # non-required features
         success: Success[None] = Success(value=None, title="Row validation")
 
-        # add notes for extraneous features if they existed, remove them from row
-        remove: list[str] = []
-        for c in row.keys():
-            if c not in fset:
-                note: str = f"additional column {c} with value {row[c]} ignored"
+        # add notes for extraneous features if they existed, they have been removed from row
+        if extras is not None:
+            for c, v in extras.items():
+                note: str = f"additional column {c} with value {v} ignored"
                 success.add_note(note, __file__)
-                remove.append(c)
-
-        for c in remove:
-            del row[c]
 
         return success
 
@@ -364,12 +457,17 @@ class OSpaceManager:
         current_pspace = read_pspace_from_yaml(problems[0])
         self.ospace = OptiSpace(problems=problems, current=current_pspace)
 
-    def add_new_pspace(self, name: str) -> None:
+    def add_new_pspace(self, name: str, pspace: ProblemSpace | None = None) -> None:
         """
+        Create (and switch to) a new problem space, the default features unless a pspace is given
+        (e.g. inferred from existing logs, see core.inference).
+
         TODO easy additions (GFI):
             - immediately add new custom features when creating (work with wizard)
         """
-        self.ospace.current = init_default_problem_space(name)
+        self.ospace.current = (
+            init_default_problem_space(name) if pspace is None else pspace
+        )
         self.ospace.current.write_to_yaml()
         self.problems.append(name)
 
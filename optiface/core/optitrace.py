@@ -0,0 +1,322 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from sqlalchemy import Engine, event
+
+# opt-in capture modes, on top of the always-on spans and counters
+_CAPTURE_CPROFILE = "cprofile"
+_CAPTURE_TRACEMALLOC = "tracemalloc"
+_CAPTURE_MODES = [_CAPTURE_CPROFILE, _CAPTURE_TRACEMALLOC]
+
+_TOP_N = 20
+
+_SERVICE_NAME = "optiface"
+
+# engine event timings, stashed on the connection between before / after hooks
+_CONN_COMPILE_START = "optitrace_compile_start"
+_CONN_EXECUTE_START = "optitrace_execute_start"
+
+# span / counter names used across the ingest pipeline
+SPAN_CSV_PARSE = "csv_parse"
+SPAN_VALIDATE = "validate_row"
+SPAN_RUN_KEY = "add_run_key"
+SPAN_SUMMARY = "summary_upsert"
+SPAN_MEMO = "memo_upsert"
+SPAN_SKETCH = "sketch_upsert"
+SPAN_KEY_ENCODE = "key_encode"
+SPAN_RESULTS_INSERT = "results_insert"
+SPAN_TRANSACTION = "transaction"
+SPAN_COMMIT = "commit"
+SPAN_SQL_COMPILE = "sql_compile"
+SPAN_SQL_EXECUTE = "sql_execute"
+
+COUNT_ROWS_IN = "rows_in"
+COUNT_ROWS_REJECTED = "rows_rejected"
+COUNT_ROWS_WRITTEN = "rows_written"
+COUNT_BYTES_IN = "bytes_in"
+COUNT_COMMITS = "commits"
+COUNT_STATEMENTS = "statements"
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_unix_ns: int
+    duration_ns: int
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    def add(self, duration_ns: int) -> None:
+        self.calls += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+
+
+class Tracer:
+    """
+    Collects timing spans (per pipeline stage) and counters (rows, bytes, commits) while active, plus an optional
+    cProfile or tracemalloc capture. Instrumented code never holds a tracer, it calls the module level span / count,
+    which cost a context variable lookup when no tracer is active.
+    """
+
+    def __init__(self, capture: str | None = None, keep_spans: bool = True):
+        if capture is not None and capture not in _CAPTURE_MODES:
+            raise ValueError(
+                f"Unknown capture mode {capture}, expected one of {', '.join(_CAPTURE_MODES)}"
+            )
+        self.capture: str | None = capture
+        # long ingests produce many spans, stage aggregates are always kept
+        self.keep_spans: bool = keep_spans
+        self.trace_id: str = os.urandom(16).hex()
+        self.spans: list[SpanRecord] = []
+        self.stages: dict[str, StageStats] = dict()
+        self.counters: Counter[str] = Counter()
+        self.profile_report: str | None = None
+        self.memory_report: dict[str, Any] | None = None
+
+        self._lock = threading.Lock()
+        self._parent: ContextVar[str | None] = ContextVar(
+            "optitrace_parent", default=None
+        )
+        self._profiler: cProfile.Profile | None = None
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        span_id = os.urandom(8).hex()
+        parent_id = self._parent.get()
+        token = self._parent.set(span_id)
+        start_unix_ns = time.time_ns()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration_ns = time.perf_counter_ns() - start
+            self._parent.reset(token)
+            self.record(name, duration_ns, start_unix_ns, span_id, parent_id, attrs)
+
+    def record(
+        self,
+        name: str,
+        duration_ns: int,
+        start_unix_ns: int | None = None,
+        span_id: str | None = None,
+        parent_id: str | None = None,
+        attrs: dict[str, Any] | None = None,
+    ) -> None:
+        with self._lock:
+            self.stages.setdefault(name, StageStats()).add(duration_ns)
+            if self.keep_spans:
+                self.spans.append(
+                    SpanRecord(
+                        name=name,
+                        span_id=span_id or os.urandom(8).hex(),
+                        parent_id=parent_id if span_id else self._parent.get(),
+                        start_unix_ns=start_unix_ns or time.time_ns() - duration_ns,
+                        duration_ns=duration_ns,
+                        attrs=attrs or dict(),
+                    )
+                )
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def start_capture(self) -> None:
+        if self.capture == _CAPTURE_CPROFILE:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.capture == _CAPTURE_TRACEMALLOC:
+            tracemalloc.start()
+
+    def stop_capture(self) -> None:
+        if self.capture == _CAPTURE_CPROFILE and self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=out)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_TOP_N)
+            self.profile_report = out.getvalue()
+            self._profiler = None
+        elif self.capture == _CAPTURE_TRACEMALLOC and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.memory_report = {
+                "peak_bytes": peak,
+                "top": [str(s) for s in snapshot.statistics("lineno")[:_TOP_N]],
+            }
+
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        Per stage aggregates, slowest stage first.
+        """
+        rows = [
+            {
+                "stage": name,
+                "calls": s.calls,
+                "total_ms": s.total_ns / 1e6,
+                "mean_ms": s.total_ns / s.calls / 1e6,
+                "max_ms": s.max_ns / 1e6,
+            }
+            for name, s in self.stages.items()
+        ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "stages": self.summary(),
+            "counters": dict(self.counters),
+            "profile": self.profile_report,
+            "memory": self.memory_report,
+        }
+
+    def write_json(self, path: str | Path) -> None:
+        """
+        Structured JSON log (one object per line): every span, then the trace summary. Appends.
+        """
+        with open(path, "a") as file:
+            for s in self.spans:
+                record = {"type": "span", "trace_id": self.trace_id, **s.__dict__}
+                file.write(json.dumps(record, default=str) + "\n")
+            summary = {"type": "summary", **self.to_json()}
+            file.write(json.dumps(summary, default=str) + "\n")
+
+    def write_otlp(self, path: str | Path) -> None:
+        """
+        OpenTelemetry OTLP/JSON trace file (ExportTraceServiceRequest), readable by collector file receivers.
+        """
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else dict()),
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_unix_ns),
+                "endTimeUnixNano": str(s.start_unix_ns + s.duration_ns),
+                "attributes": [_otlp_attr(k, v) for k, v in s.attrs.items()],
+            }
+            for s in self.spans
+        ]
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_otlp_attr("service.name", _SERVICE_NAME)]
+                    },
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+                }
+            ]
+        }
+        with open(path, "w") as file:
+            json.dump(request, file)
+
+
+def _otlp_attr(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current: ContextVar[Tracer | None] = ContextVar("optitrace_tracer", default=None)
+
+
+def current_tracer() -> Tracer | None:
+    return _current.get()
+
+
+@contextmanager
+def tracing(
+    capture: str | None = None,
+    json_path: str | Path | None = None,
+    otlp_path: str | Path | None = None,
+) -> Iterator[Tracer]:
+    """
+    Activate a new Tracer for the enclosed block (and the threads it copies its context to), writing the
+    requested outputs when it ends.
+    """
+    tracer = Tracer(capture=capture)
+    token = _current.set(tracer)
+    tracer.start_capture()
+    try:
+        yield tracer
+    finally:
+        tracer.stop_capture()
+        _current.reset(token)
+        if json_path is not None:
+            tracer.write_json(json_path)
+        if otlp_path is not None:
+            tracer.write_otlp(otlp_path)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    tracer = _current.get()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(name, **attrs):
+        yield
+
+
+def count(name: str, n: int = 1) -> None:
+    tracer = _current.get()
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time statement compilation (before_execute -> before_cursor_execute) and driver execution
+    (before_cursor_execute -> after_cursor_execute) of every statement run while a tracer is active.
+    """
+
+    @event.listens_for(engine, "before_execute")
+    def _before_execute(conn, clauseelement, multiparams, params, execution_options):
+        if _current.get() is not None:
+            conn.info[_CONN_COMPILE_START] = time.perf_counter_ns()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        tracer = _current.get()
+        if tracer is None:
+            return
+        now = time.perf_counter_ns()
+        compile_start = conn.info.pop(_CONN_COMPILE_START, None)
+        if compile_start is not None:
+            tracer.record(SPAN_SQL_COMPILE, now - compile_start)
+        conn.info[_CONN_EXECUTE_START] = now
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        tracer = _current.get()
+        execute_start = conn.info.pop(_CONN_EXECUTE_START, None)
+        if tracer is None or execute_start is None:
+            return
+        tracer.record(SPAN_SQL_EXECUTE, time.perf_counter_ns() - execute_start)
+        tracer.count(COUNT_STATEMENTS)
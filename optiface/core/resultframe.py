@@ -0,0 +1,424 @@
+import numpy as np
+import pandas as pd
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, TypeAlias
+
+from optiface.core.optispace import (
+    ProblemSpace,
+    Feature,
+    _ROW_ERR_TYPE,
+    _ROW_ERR_MISSING,
+)
+
+from optiface.core.featuredata import _TRUE_STRS, _FALSE_STRS
+
+# physical storage per feature type, strings are dictionary-encoded into int32 codes
+_feature_type_to_dtype: dict[type, Any] = {
+    str: np.int32,
+    int: np.int64,
+    float: np.float64,
+    bool: np.bool_,
+    # epoch microseconds, UTC
+    datetime: np.int64,
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# (row index, error code, feature name), codes as in optispace row validation
+FrameErrors = list[tuple[int, str, str]]
+
+# the raw source records (every source column, values as read, before coercion) of the rows at the given indices
+SourceRows: TypeAlias = Callable[[np.ndarray], list[dict[str, Any]]]
+
+
+def pack_mask(mask: np.ndarray) -> np.ndarray | None:
+    """
+    Pack a boolean validity mask into a bitmap (bit i set = row i is not null), None if every row is valid.
+    """
+    if mask.all():
+        return None
+    return np.packbits(mask, bitorder="little")
+
+
+def unpack_mask(bitmap: np.ndarray | None, n: int) -> np.ndarray:
+    if bitmap is None:
+        return np.ones(n, dtype=np.bool_)
+    return np.unpackbits(bitmap, count=n, bitorder="little").astype(np.bool_)
+
+
+def datetime_to_micros(dt: datetime) -> int:
+    # sqlite hands back naive datetimes, which optiface always stores as UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def micros_to_datetime(us: int) -> datetime:
+    # exact, going through a float timestamp can be off by a microsecond
+    return _EPOCH + timedelta(microseconds=us)
+
+
+@dataclass
+class FeatureColumn:
+    """
+    One typed column of a ResultFrame:
+        - values: numpy array, physical dtype from _feature_type_to_dtype (placeholders where null)
+        - dictionary: the distinct strings of a str feature, values holds indices into it
+        - validity: null bitmap (see pack_mask), None when there are no nulls
+    """
+
+    feature: Feature
+    values: np.ndarray
+    dictionary: list[str] | None = None
+    validity: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        n = self.values.nbytes
+        if self.validity is not None:
+            n += self.validity.nbytes
+        if self.dictionary is not None:
+            n += sum(len(s) for s in self.dictionary)
+        return n
+
+    def valid_mask(self) -> np.ndarray:
+        return unpack_mask(self.validity, len(self.values))
+
+    def take(self, indices: np.ndarray) -> "FeatureColumn":
+        validity = None
+        if self.validity is not None:
+            validity = pack_mask(self.valid_mask()[indices])
+        return FeatureColumn(
+            self.feature, self.values[indices], self.dictionary, validity
+        )
+
+    def to_pylist(self) -> list[Any]:
+        """
+        Decoded python values (None where null), e.g. for handing rows to the database driver.
+        """
+        if self.dictionary is not None:
+            d = self.dictionary
+            values = [d[c] for c in self.values.tolist()]
+        elif self.feature.feature_type is datetime:
+            values = [micros_to_datetime(us) for us in self.values.tolist()]
+        else:
+            values = self.values.tolist()
+
+        if self.validity is not None:
+            mask = self.valid_mask().tolist()
+            values = [v if ok else None for v, ok in zip(values, mask)]
+
+        return values
+
+
+def _isinstance_mask(s: pd.Series, types: type | tuple[type, ...]) -> np.ndarray:
+    return s.map(lambda v: isinstance(v, types)).to_numpy(dtype=np.bool_)
+
+
+def _column_from_series(
+    feature: Feature, s: pd.Series, coerce: bool = False
+) -> tuple[FeatureColumn, np.ndarray]:
+    """
+    Coerce a pandas series to the feature's physical type.
+    Returns the column and a mask of the rows whose (non-null) value was not of the feature's type.
+
+    Values are checked like ProblemSpace.validate_row (isinstance of the feature type), except that numpy scalars
+    count as their python type and bools are not numbers. With coerce, values are as read from a file that cannot
+    carry the feature type: datetime, number and bool strings are parsed, and integral floats are ints
+    (pandas reads an int column with missing values as floats).
+    """
+    present = s.notna().to_numpy()
+    n = len(s)
+    dtype = _feature_type_to_dtype[feature.feature_type]
+    dictionary: list[str] | None = None
+    is_text = (
+        _isinstance_mask(s, str)
+        if coerce and s.dtype == object
+        else np.zeros(n, dtype=np.bool_)
+    )
+
+    if feature.feature_type is str:
+        is_str = _isinstance_mask(s, str)
+        ok = present & is_str
+        codes, uniques = pd.factorize(s.where(is_str))
+        values = codes.astype(dtype)
+        values[values < 0] = 0
+        dictionary = [str(u) for u in uniques]
+
+    elif feature.feature_type is datetime:
+        # never numbers: epoch offsets would silently become 1970 timestamps
+        if pd.api.types.is_datetime64_any_dtype(s.dtype):
+            is_dt = present
+        else:
+            is_dt = _isinstance_mask(s, (datetime, np.datetime64))
+        dt = pd.to_datetime(s.where(is_dt), utc=True)
+        if is_text.any():
+            parsed = pd.to_datetime(
+                s.where(is_text), utc=True, errors="coerce", format="mixed"
+            )
+            dt = dt.where(is_dt, parsed)
+        ok = dt.notna().to_numpy()
+        values = np.zeros(n, dtype=dtype)
+        values[ok] = dt[ok].to_numpy(dtype="datetime64[us]").astype(np.int64)
+
+    elif feature.feature_type is bool:
+        if pd.api.types.is_bool_dtype(s.dtype):
+            ok = present
+        else:
+            ok = _isinstance_mask(s, (bool, np.bool_))
+        values = np.zeros(n, dtype=dtype)
+        values[ok] = s[ok].astype(np.bool_).to_numpy()
+        if is_text.any():
+            lowered = s.map(lambda v: v.strip().lower() if isinstance(v, str) else v)
+            is_true = lowered.isin(_TRUE_STRS).to_numpy()
+            values[is_true] = True
+            ok = ok | is_true | lowered.isin(_FALSE_STRS).to_numpy()
+
+    else:
+        # ints only for int features (floats too with coerce), ints and floats for float features
+        number_types: tuple[type, ...] = (int, np.integer)
+        if coerce or feature.feature_type is float:
+            number_types += (float, np.floating)
+        if s.dtype == object:
+            numeric_like = _isinstance_mask(s, number_types) & ~_isinstance_mask(
+                s, (bool, np.bool_)
+            )
+        else:
+            numeric_like = np.full(
+                n,
+                not pd.api.types.is_bool_dtype(s.dtype)
+                and (
+                    pd.api.types.is_integer_dtype(s.dtype)
+                    or (float in number_types and pd.api.types.is_float_dtype(s.dtype))
+                ),
+            )
+        # strings would be coerced by to_numeric, so they are only let through explicitly
+        num = pd.to_numeric(s.where(numeric_like | is_text), errors="coerce")
+        ok = num.notna().to_numpy()
+        if feature.feature_type is int:
+            ok &= (num.fillna(0) % 1 == 0).to_numpy()
+        values = np.zeros(n, dtype=dtype)
+        values[ok] = num[ok].to_numpy().astype(dtype)
+
+    type_err = present & ~ok
+    valid = present & ~type_err
+    return FeatureColumn(feature, values, dictionary, pack_mask(valid)), type_err
+
+
+class ResultFrame:
+    """
+    Columnar in-memory batch of results rows: one FeatureColumn (typed numpy array) per Feature.
+
+    A frame keeps the per-cell type errors found while coercing its input, so ProblemSpace semantics
+    (see validate_frame) can be applied to the whole batch without going back to python dicts.
+    A frame read from a source also keeps a way back to its raw records (source_rows), for the rows it rejects.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, FeatureColumn],
+        type_errors: dict[str, np.ndarray] | None = None,
+        source: SourceRows | None = None,
+    ):
+        lengths = set(len(c) for c in columns.values())
+        if len(lengths) > 1:
+            raise ValueError(f"ResultFrame columns have different lengths: {lengths}")
+
+        self.columns: dict[str, FeatureColumn] = columns
+        self.nrows: int = lengths.pop() if lengths else 0
+        self.type_errors: dict[str, np.ndarray] = type_errors or dict()
+        self.source: SourceRows | None = source
+
+    def __len__(self) -> int:
+        return self.nrows
+
+    def __getitem__(self, name: str) -> FeatureColumn:
+        return self.columns[name]
+
+    @property
+    def features(self) -> list[Feature]:
+        return [c.feature for c in self.columns.values()]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.columns.values())
+
+    @classmethod
+    def from_dataframe(
+        cls, features: list[Feature], df: pd.DataFrame, coerce: bool = False
+    ) -> "ResultFrame":
+        """
+        Columns of df that are not features are dropped, features missing from df become all-null columns.
+        Values are type checked like ProblemSpace.validate_row, or parsed from file text with coerce
+        (see _column_from_series). df itself stays the frame's source (see source_rows).
+        """
+        columns: dict[str, FeatureColumn] = dict()
+        type_errors: dict[str, np.ndarray] = dict()
+
+        for f in features:
+            s = df[f.name] if f.name in df.columns else pd.Series([None] * len(df))
+            col, type_err = _column_from_series(f, s.reset_index(drop=True), coerce)
+            columns[f.name] = col
+            if type_err.any():
+                type_errors[f.name] = type_err
+
+        raw = df.reset_index(drop=True)
+        return cls(
+            columns, type_errors, lambda idx: raw.iloc[idx].to_dict(orient="records")
+        )
+
+    @classmethod
+    def from_rows(
+        cls, features: list[Feature], rows: Iterable[dict[str, Any]]
+    ) -> "ResultFrame":
+        data: dict[str, list[Any]] = {f.name: [] for f in features}
+        for row in rows:
+            for name, values in data.items():
+                values.append(row.get(name))
+
+        columns: dict[str, FeatureColumn] = dict()
+        type_errors: dict[str, np.ndarray] = dict()
+
+        for f in features:
+            col, type_err = _column_from_series(
+                f, pd.Series(data.pop(f.name), dtype=object)
+            )
+            columns[f.name] = col
+            if type_err.any():
+                type_errors[f.name] = type_err
+
+        return cls(columns, type_errors)
+
+    @classmethod
+    def concat(cls, frames: list["ResultFrame"]) -> "ResultFrame":
+        """
+        Concatenate frames over the same features, merging string dictionaries.
+        """
+        if len(frames) == 0:
+            raise ValueError("Cannot concatenate an empty list of ResultFrames.")
+
+        columns: dict[str, FeatureColumn] = dict()
+
+        for name, first in frames[0].columns.items():
+            parts = [fr.columns[name] for fr in frames]
+            dictionary: list[str] | None = None
+
+            if first.dictionary is not None:
+                index: dict[str, int] = dict()
+                values_parts = []
+                for p in parts:
+                    remap = np.array(
+                        [index.setdefault(v, len(index)) for v in p.dictionary or []],
+                        dtype=np.int32,
+                    )
+                    values_parts.append(remap[p.values] if len(remap) > 0 else p.values)
+                dictionary = list(index.keys())
+                values = np.concatenate(values_parts)
+            else:
+                values = np.concatenate([p.values for p in parts])
+
+            valid = np.concatenate([p.valid_mask() for p in parts])
+            columns[name] = FeatureColumn(
+                first.feature, values, dictionary, pack_mask(valid)
+            )
+
+        return cls(columns)
+
+    def take(self, indices: np.ndarray) -> "ResultFrame":
+        source = self.source
+        return ResultFrame(
+            {name: c.take(indices) for name, c in self.columns.items()},
+            {name: e[indices] for name, e in self.type_errors.items()},
+            None if source is None else lambda idx: source(indices[idx]),
+        )
+
+    def source_rows(self, indices: np.ndarray) -> list[dict[str, Any]]:
+        """
+        The raw source records of the rows at indices, or their decoded rows for a frame without a source.
+        """
+        if self.source is not None:
+            return self.source(indices)
+        return [r for rows in self.take(indices).iter_rows() for r in rows]
+
+    def iter_rows(self, chunksize: int = 10_000) -> Iterator[list[dict[str, Any]]]:
+        """
+        Decoded rows as dicts, chunksize rows at a time, so only one chunk is ever materialized.
+        """
+        for start in range(0, self.nrows, chunksize):
+            stop = min(start + chunksize, self.nrows)
+            idx = np.arange(start, stop)
+            names = list(self.columns.keys())
+            cols = [self.columns[n].take(idx).to_pylist() for n in names]
+            yield [dict(zip(names, values)) for values in zip(*cols)]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({n: c.to_pylist() for n, c in self.columns.items()})
+
+
+def validate_frame(
+    pspace: ProblemSpace, frame: ResultFrame
+) -> tuple[ResultFrame, FrameErrors]:
+    """
+    Vectorized ProblemSpace.validate_row over a whole frame:
+        - cells that failed type coercion are E_TYPE errors (the frame's type checks, see _column_from_series)
+        - null cells of required features are E_MISSING errors
+        - null cells of non-required features are filled with the feature default
+    Returns the frame of valid rows (defaults filled) and the errors of the rejected rows.
+    """
+    n = len(frame)
+    bad = np.zeros(n, dtype=np.bool_)
+    errors: FrameErrors = []
+    columns: dict[str, FeatureColumn] = dict()
+
+    for f in pspace.full_row():
+        col = frame.columns[f.name]
+        valid = col.valid_mask()
+        type_err = frame.type_errors.get(f.name, np.zeros(n, dtype=np.bool_))
+
+        for i in np.flatnonzero(type_err).tolist():
+            errors.append((i, _ROW_ERR_TYPE, f.name))
+        bad |= type_err
+
+        missing = ~valid & ~type_err
+        if f.required:
+            for i in np.flatnonzero(missing).tolist():
+                errors.append((i, _ROW_ERR_MISSING, f.name))
+            bad |= missing
+        elif missing.any():
+            col = _fill_default(col, missing)
+
+        columns[f.name] = col
+
+    errors.sort()
+    filled = ResultFrame(columns)
+
+    if not bad.any():
+        return filled, errors
+    return filled.take(np.flatnonzero(~bad)), errors
+
+
+def _fill_default(col: FeatureColumn, missing: np.ndarray) -> FeatureColumn:
+    f = col.feature
+    values = col.values.copy()
+    dictionary = col.dictionary
+
+    if dictionary is not None:
+        dictionary = list(dictionary)
+        if f.default in dictionary:
+            code = dictionary.index(f.default)
+        else:
+            code = len(dictionary)
+            dictionary.append(f.default)
+        values[missing] = code
+    elif f.feature_type is datetime:
+        values[missing] = datetime_to_micros(f.default)
+    else:
+        values[missing] = f.default
+
+    return FeatureColumn(f, values, dictionary, pack_mask(col.valid_mask() | missing))
@@ -0,0 +1,325 @@
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from sqlalchemy import Connection, and_, func, select
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: pip install optiface[parquet]
+    pa = None
+
+from optiface.core.optierror import Status, Success, Failure
+from optiface.core.optispace import ProblemSpace, Feature, run_key_features
+from optiface.core.featuredata import _RUN_ID, _TIMESTAMP_ADDED
+from optiface.core.resultframe import ResultFrame
+from optiface.dbmanager.dbm import AlchemyWAPI, _RESULTS_TABLE_NAME
+from optiface.constants import _SPACE, _ARCHIVE
+
+_ARCHIVE_COMPRESSION = "zstd"
+_ARCHIVE_CHUNK = 50_000
+_DELETE_CHUNK = 10_000
+_ARCHIVE_FILE_FORMAT = "runs-{first}-{last}.parquet"
+
+
+def arrow_type(feature: Feature):
+    return {
+        str: pa.string(),
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us", tz="UTC"),
+    }[feature.feature_type]
+
+
+def archive_dir(pspace: ProblemSpace) -> Path:
+    return Path(_SPACE) / pspace.name / _ARCHIVE
+
+
+def archive_files(pspace: ProblemSpace) -> list[Path]:
+    return sorted(archive_dir(pspace).glob("*.parquet"))
+
+
+def _require_arrow() -> None:
+    if pa is None:
+        raise RuntimeError(
+            "Archiving needs the optional pyarrow dependency (pip install optiface[parquet])."
+        )
+
+
+def archived_rows(
+    pspace: ProblemSpace, chunksize: int = _ARCHIVE_CHUNK
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    The archived runs of a problem space as decoded rows, chunksize at a time (none without an archive), e.g. to
+    fold them back into a rebuilt summary.
+    """
+    files = archive_files(pspace)
+    if len(files) > 0:
+        _require_arrow()
+    for path in files:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pylist()
+
+
+def archive_features(pspace: ProblemSpace) -> list[Feature]:
+    return list(run_key_features().values()) + pspace.full_row()
+
+
+def archived_added(
+    pspace: ProblemSpace,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    include_start: bool = True,
+) -> ResultFrame | None:
+    """
+    The archived runs added in [start, end) ((start, end) without include_start, either bound optional), None
+    without an archive.
+    """
+    files = archive_files(pspace)
+    if len(files) == 0:
+        return None
+    _require_arrow()
+    ts = ds.field(_TIMESTAMP_ADDED)
+    ts_type = pa.timestamp("us", tz="UTC")
+    conds = []
+    if start is not None:
+        bound = pa.scalar(start, type=ts_type)
+        conds.append(ts >= bound if include_start else ts > bound)
+    if end is not None:
+        conds.append(ts < pa.scalar(end, type=ts_type))
+    expr = None
+    for c in conds:
+        expr = c if expr is None else expr & c
+    table = ds.dataset([str(f) for f in files], format="parquet").to_table(filter=expr)
+    return ResultFrame.from_dataframe(
+        archive_features(pspace), table.to_pandas(), coerce=True
+    )
+
+
+def archived_run_counts(pspace: ProblemSpace, names: list[str]) -> dict[tuple, int]:
+    """
+    Number of archived runs per combination of values of the named features.
+    """
+    files = archive_files(pspace)
+    if len(files) == 0:
+        return dict()
+    _require_arrow()
+    table = ds.dataset([str(f) for f in files], format="parquet").to_table(
+        columns=names
+    )
+    counts = table.group_by(names).aggregate([([], "count_all")])
+    return {tuple(r[n] for n in names): r["count_all"] for r in counts.to_pylist()}
+
+
+class RunArchive:
+    """
+    Cold storage of a problem space's old runs: zstd compressed Parquet files under space/<problem>/archive/.
+
+    archive() streams the runs added before a cutoff out of the results view into one Parquet file (a row group
+    per chunk), and only once that file is complete deletes them from experiments.db, in the same transaction.
+    query() reads archive and live runs together, so results stay complete while the hot database stays small
+    (AlchemyWAPI.query_frame reads live runs only, runs_since / runs_between take include_archived).
+
+    Archived runs still exist, just not in sqlite: they stay counted in the summary, run_memo and sketches tables,
+    rebuilding those tables folds the archive back in (see archived_rows), and RunPlanner counts them as runs
+    (see archived_run_counts). The newest run is never archived, so sqlite never hands out an archived run_id again.
+    """
+
+    def __init__(self, wapi: AlchemyWAPI):
+        _require_arrow()
+        self.wapi: AlchemyWAPI = wapi
+        self.pspace: ProblemSpace = wapi.pspace
+        self.dir: Path = archive_dir(self.pspace)
+        self.features: list[Feature] = archive_features(self.pspace)
+        self.schema = pa.schema([(f.name, arrow_type(f)) for f in self.features])
+
+    def files(self) -> list[Path]:
+        return archive_files(self.pspace)
+
+    def archive(
+        self,
+        before: datetime,
+        chunksize: int = _ARCHIVE_CHUNK,
+        compression: str = _ARCHIVE_COMPRESSION,
+    ) -> Status:
+        """
+        Move the runs added strictly before the cutoff into a new archive file.
+
+        Reading the newest run, streaming the old runs out and deleting them is one BEGIN IMMEDIATE transaction, no
+        writer commits in between. Runs found in an archive file but still live (an archival interrupted between
+        writing its file and committing the delete) are deleted first, never archived twice.
+        """
+        lock = self.wapi.writer_lock
+        with lock.hold() if lock is not None else nullcontext():
+            with self.wapi.engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    conn.exec_driver_sql("BEGIN IMMEDIATE")
+                    status = self._archive(conn, before, chunksize, compression)
+                except Exception:
+                    trans.rollback()
+                    raise
+                trans.commit()
+        return status
+
+    def _archive(
+        self, conn: Connection, before: datetime, chunksize: int, compression: str
+    ) -> Status:
+        view = self.wapi.results_view
+        results = self.wapi.metadata.tables[_RESULTS_TABLE_NAME]
+
+        first, newest = conn.execute(
+            select(func.min(results.c[_RUN_ID]), func.max(results.c[_RUN_ID]))
+        ).one()
+        if newest is None:
+            return Success(title=f"Archival, no runs in problem {self.pspace.name}")
+
+        status: Status = Success(title="Archival")
+        done = self._archived_ids()
+        done = done[(done >= first) & (done <= newest)]
+        if len(done) > 0:
+            self._delete_ids(conn, done)
+            status.add_note(
+                note=f"deleted {len(done)} runs left live by an interrupted archival",
+                file=__file__,
+            )
+
+        old = and_(view.c[_TIMESTAMP_ADDED] < before, view.c[_RUN_ID] != newest)
+        stmt = (
+            select(*[view.c[f.name] for f in self.features])
+            .where(old)
+            .order_by(view.c[_RUN_ID])
+        )
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / f".archive-{newest}.parquet.tmp"
+        archived: list[np.ndarray] = []
+
+        # stream: one row group per chunk, only one chunk in memory
+        writer = None
+        try:
+            res = conn.execution_options(stream_results=True).execute(stmt)
+            for part in res.mappings().partitions(chunksize):
+                batch = pa.Table.from_pylist([dict(r) for r in part], self.schema)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, self.schema, compression=compression)
+                writer.write_table(batch)
+                archived.append(batch.column(_RUN_ID).to_numpy())
+        except Exception:
+            if writer is not None:
+                writer.close()
+                tmp.unlink()
+            raise
+        if writer is not None:
+            writer.close()
+
+        if len(archived) == 0:
+            if len(done) > 0:
+                return status
+            return Success(
+                title=f"Archival, no runs before {before} in problem {self.pspace.name}"
+            )
+
+        ids = np.concatenate(archived)
+        path = self.dir / _ARCHIVE_FILE_FORMAT.format(first=ids[0], last=ids[-1])
+        if path.exists():
+            tmp.unlink()
+            failure: Failure[None] = Failure(title="Archival")
+            failure.add_err(err=f"archive file {path} already exists", file=__file__)
+            return failure
+        # the file is complete before a single run is deleted
+        tmp.rename(path)
+        self._delete_ids(conn, ids)
+
+        status.add_note(
+            note=f"archived {len(ids)} runs added before {before} to {path}",
+            file=__file__,
+        )
+        return status
+
+    def _archived_ids(self) -> np.ndarray:
+        files = self.files()
+        if len(files) == 0:
+            return np.empty(0, dtype=np.int64)
+        table = ds.dataset([str(f) for f in files], format="parquet").to_table(
+            columns=[_RUN_ID]
+        )
+        return table.column(_RUN_ID).to_numpy()
+
+    def _delete_ids(self, conn: Connection, ids: np.ndarray) -> None:
+        results = self.wapi.metadata.tables[_RESULTS_TABLE_NAME]
+        for start in range(0, len(ids), _DELETE_CHUNK):
+            window = ids[start : start + _DELETE_CHUNK].tolist()
+            conn.execute(results.delete().where(results.c[_RUN_ID].in_(window)))
+
+    def query(
+        self,
+        filters: dict[str, Any] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> ResultFrame:
+        """
+        Archived and live runs matching the filters, as one ResultFrame.
+            - filters: feature name -> value, or list of accepted values
+            - since / until: inclusive timestamp_added bounds
+        Archived files are filtered by pyarrow (row group statistics skip whole chunks), live runs by sqlite.
+        """
+        frames: list[ResultFrame] = []
+        files = self.files()
+
+        if len(files) > 0:
+            dataset = ds.dataset([str(f) for f in files], format="parquet")
+            table = dataset.to_table(filter=self._arrow_filter(filters, since, until))
+            if table.num_rows > 0:
+                frames.append(
+                    ResultFrame.from_dataframe(
+                        self.features, table.to_pandas(), coerce=True
+                    )
+                )
+
+        view = self.wapi.results_view
+        clauses = []
+        for name, value in (filters or dict()).items():
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(view.c[name].in_(list(value)))
+            else:
+                clauses.append(view.c[name] == value)
+        if since is not None:
+            clauses.append(view.c[_TIMESTAMP_ADDED] >= since)
+        if until is not None:
+            clauses.append(view.c[_TIMESTAMP_ADDED] <= until)
+
+        live = self.wapi.query_frame(and_(*clauses) if clauses else None)
+        if len(frames) == 0:
+            return live
+        if len(live) > 0:
+            frames.append(live)
+        return ResultFrame.concat(frames)
+
+    def _arrow_filter(
+        self,
+        filters: dict[str, Any] | None,
+        since: datetime | None,
+        until: datetime | None,
+    ):
+        expr = None
+        conds = []
+        for name, value in (filters or dict()).items():
+            if isinstance(value, (list, tuple, set)):
+                conds.append(ds.field(name).isin(list(value)))
+            else:
+                conds.append(ds.field(name) == value)
+        ts_type = pa.timestamp("us", tz="UTC")
+        if since is not None:
+            conds.append(ds.field(_TIMESTAMP_ADDED) >= pa.scalar(since, type=ts_type))
+        if until is not None:
+            conds.append(ds.field(_TIMESTAMP_ADDED) <= pa.scalar(until, type=ts_type))
+        for c in conds:
+            expr = c if expr is None else expr & c
+        return expr
@@ -0,0 +1,236 @@
+import csv
+
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # optional dependency: pip install optiface[parquet]
+    pa = None
+
+from optiface.core import optitrace
+from optiface.core.optispace import ProblemSpace, Feature
+from optiface.core.resultframe import (
+    ResultFrame,
+    FeatureColumn,
+    pack_mask,
+    _feature_type_to_dtype,
+    _column_from_series,
+)
+from optiface.core.featuredata import _TRUE_STRS, _FALSE_STRS
+from optiface.dbmanager.quarantine import (
+    CSV_FIRST_LINE,
+    PARSE_ERROR,
+    RAW_TEXT,
+    QuarantineWriter,
+)
+
+# bytes per parsed block: blocks are parsed and converted in parallel, one per thread
+_BLOCK_SIZE = 16 << 20
+# rows per ResultFrame handed out
+_BATCH_ROWS = 100_000
+# read size while looking for the end of the header line
+_HEADER_READ_BYTES = 64 << 10
+
+
+# feature types the csv parser converts itself (see _convert_options)
+_PARSER_TYPES: dict[type, "pa.DataType"] = (
+    dict() if pa is None else {int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+)
+# the parser matches bool text case-sensitively
+_BOOL_TEXT: dict[bool, list[str]] = {
+    value: sorted({v for s in strs for v in (s, s.upper(), s.capitalize())})
+    for value, strs in [(True, _TRUE_STRS), (False, _FALSE_STRS)]
+}
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def _cast_timestamps(arr: "pa.Array") -> "pa.Array":
+    try:
+        return pc.cast(arr, pa.timestamp("us", tz="UTC"))
+    except pa.ArrowInvalid:
+        # no zone offsets: naive timestamps, which optiface always stores as UTC
+        return pc.cast(arr, pa.timestamp("us"))
+
+
+def column_from_arrow(
+    feature: Feature, arr: "pa.Array"
+) -> tuple[FeatureColumn, np.ndarray]:
+    """
+    Convert a column of csv text (or one the parser already converted) to the feature's physical type
+    (see ResultFrame), vectorized in Arrow.
+    Returns the column and a mask of the rows whose (non-null) text did not parse as the feature's type.
+    """
+    n = len(arr)
+    present = arr.is_valid().to_numpy(zero_copy_only=False)
+    type_err = np.zeros(n, dtype=np.bool_)
+    dictionary: list[str] | None = None
+
+    if feature.feature_type is str:
+        # dictionary encoding is exactly ResultFrame's string layout
+        encoded = pc.dictionary_encode(arr)
+        values = (
+            encoded.indices.fill_null(0).to_numpy(zero_copy_only=False).astype(np.int32)
+        )
+        dictionary = encoded.dictionary.to_pylist()
+        return FeatureColumn(feature, values, dictionary, pack_mask(present)), type_err
+
+    target = {
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us", tz="UTC"),
+    }[feature.feature_type]
+    try:
+        if feature.feature_type is datetime:
+            typed = pc.cast(_cast_timestamps(arr), pa.int64())
+        else:
+            typed = pc.cast(arr, target)
+        fill = False if feature.feature_type is bool else 0
+        values = typed.fill_null(fill).to_numpy(zero_copy_only=False)
+        values = values.astype(_feature_type_to_dtype[feature.feature_type])
+    except pa.ArrowInvalid:
+        # slow path, only for batches with a cell that does not parse: the same per-cell semantics as ResultFrame
+        return _column_from_series(feature, arr.to_pandas(), coerce=True)
+
+    valid = present & ~type_err
+    return FeatureColumn(feature, values, dictionary, pack_mask(valid)), type_err
+
+
+def frame_from_batch(features: list[Feature], batch: "pa.RecordBatch") -> ResultFrame:
+    """
+    The batch's feature columns, typed. The batch (every source column, as read) stays the frame's source.
+    """
+    columns: dict[str, FeatureColumn] = dict()
+    type_errors: dict[str, np.ndarray] = dict()
+    for f in features:
+        col, type_err = column_from_arrow(f, batch.column(f.name))
+        columns[f.name] = col
+        if type_err.any():
+            type_errors[f.name] = type_err
+    return ResultFrame(
+        columns, type_errors, lambda idx: batch.take(pa.array(idx)).to_pylist()
+    )
+
+
+def csv_header(path: Path) -> list[str]:
+    # the (decompressed) first line, arrow streams have no readline
+    head = b""
+    with pa.input_stream(str(path)) as stream:
+        while b"\n" not in head:
+            chunk = stream.read(_HEADER_READ_BYTES)
+            if len(chunk) == 0:
+                break
+            head += chunk
+    line = head.split(b"\n", 1)[0].decode(errors="replace").rstrip("\r")
+    return next(csv.reader([line]), [])
+
+
+def _convert_options(
+    features: list[Feature], names: list[str], typed: bool
+) -> "pacsv.ConvertOptions":
+    # typed: numbers and bools converted by the parser itself; str and datetime features (naive and zoned
+    # timestamps do not fit one Arrow type) and the other columns stay text, converted in column_from_arrow
+    types = {name: pa.string() for name in names}
+    if typed:
+        for f in features:
+            if f.feature_type in _PARSER_TYPES:
+                types[f.name] = _PARSER_TYPES[f.feature_type]
+    return pacsv.ConvertOptions(
+        column_types=types,
+        include_columns=names,
+        include_missing_columns=True,
+        strings_can_be_null=True,
+        true_values=_BOOL_TEXT[True],
+        false_values=_BOOL_TEXT[False],
+    )
+
+
+def _read_table(
+    path: Path,
+    convert_options: "pacsv.ConvertOptions",
+    use_threads: bool,
+    block_size: int,
+    malformed: list[tuple[int | None, str]] | None,
+) -> "pa.Table":
+    def skip(row) -> str:
+        malformed.append((row.number, row.text))
+        return "skip"
+
+    return pacsv.read_csv(
+        pa.input_stream(str(path)),
+        read_options=pacsv.ReadOptions(use_threads=use_threads, block_size=block_size),
+        parse_options=pacsv.ParseOptions(
+            invalid_row_handler=None if malformed is None else skip
+        ),
+        convert_options=convert_options,
+    )
+
+
+def arrow_csv_frames(
+    path: Path,
+    pspace: ProblemSpace,
+    batch_rows: int = _BATCH_ROWS,
+    use_threads: bool = True,
+    block_size: int = _BLOCK_SIZE,
+    quarantine: QuarantineWriter | None = None,
+) -> Iterator[tuple[int, ResultFrame]]:
+    """
+    Read a (possibly gzip / zstd compressed) csv with Arrow's multithreaded reader (read_csv: blocks are parsed and
+    converted on every core), then hand it out as ResultFrames of at most batch_rows rows, with the source line of
+    each frame's first row.
+
+    Feature columns are converted by the parser to the feature's declared type (yaml_to_feature_type), never
+    guessed. If any cell does not convert, the file is read again with every column as text, and only the cells
+    that do not convert are per-cell type errors for validate_frame; their text is what they are quarantined with.
+    Rows with the wrong number of fields go to the quarantine as E_PARSE with their raw text (without a quarantine,
+    they raise like any parse error).
+    """
+    if pa is None:
+        raise RuntimeError(
+            "The Arrow csv engine needs the optional pyarrow dependency (pip install optiface[parquet])."
+        )
+
+    features = pspace.full_row()
+    names = [f.name for f in features]
+    names += [c for c in csv_header(path) if c not in names]
+    malformed: list[tuple[int | None, str]] | None = None if quarantine is None else []
+
+    with optitrace.span(optitrace.SPAN_CSV_PARSE, file=str(path)):
+        options = _convert_options(features, names, typed=True)
+        try:
+            table = _read_table(path, options, use_threads, block_size, malformed)
+        except pa.ArrowInvalid:
+            if malformed is not None:
+                malformed.clear()
+            options = _convert_options(features, names, typed=False)
+            table = _read_table(path, options, use_threads, block_size, malformed)
+
+        if malformed and any(number is None for number, _ in malformed):
+            # the threaded reader does not know line numbers: read again on one thread, only for such files
+            malformed.clear()
+            table = _read_table(path, options, False, block_size, malformed)
+
+    skipped = sorted(number for number, _ in malformed or [])
+    if quarantine is not None:
+        for number, text in sorted(malformed or []):
+            quarantine.add(number, {RAW_TEXT: text}, [(PARSE_ERROR, "")])
+
+    # frames never span a skipped line, so row i of a frame is its first line + i
+    start = 0
+    for j, cut in enumerate(skipped + [None]):
+        stop = table.num_rows if cut is None else cut - CSV_FIRST_LINE - j
+        line = CSV_FIRST_LINE + start + j
+        for offset in range(start, stop, batch_rows):
+            n = min(batch_rows, stop - offset)
+            batch = table.slice(offset, n).combine_chunks().to_batches()[0]
+            yield line + offset - start, frame_from_batch(features, batch)
+        start = stop
@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from pandas import DataFrame
+from sqlalchemy import MetaData, TableClause, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.sql import ColumnElement
+
+from optiface.core.optierror import Status, StatusOr, Success
+from optiface.core.optispace import ProblemSpace, run_key_features
+from optiface.core.resultframe import ResultFrame
+from optiface.core.featuredata import _TIMESTAMP_ADDED
+from optiface.dbmanager.dbm import (
+    AlchemyFactory,
+    AlchemyWAPI,
+    is_busy_error,
+    _RESULTS_TABLE_NAME,
+)
+from optiface.dbmanager.summary import _SUMMARY_TABLE_NAME, summary_to_frame
+from optiface.dbmanager.quarantine import QuarantineWriter, CSV_FIRST_LINE
+from optiface.constants import _AIOSQLITE_PREF, _SPACE, _EXPERIMENTS_DBFILE
+
+_CHUNK = 10_000
+
+
+class AsyncAlchemyWAPI:
+    """
+    asyncio twin of AlchemyWAPI, over an aiosqlite engine: the same inserts (summary, memo and key encoding kept in
+    step in the same transaction) and queries, awaited instead of blocking, so many readers and batched writers can
+    share one event loop.
+
+    Writes reuse AlchemyWAPI's statements: the sync insert path runs on the async connection through run_sync, so
+    there is one implementation of what an insert does. sqlite still allows one writer at a time, concurrent
+    transactions wait on the database lock (and count as busy when they give up, like the sync API).
+    """
+
+    def __init__(self, pspace: ProblemSpace, engine: AsyncEngine, metadata: MetaData):
+        self.pspace: ProblemSpace = pspace
+        self.engine: AsyncEngine = engine
+        self.metadata: MetaData = metadata
+        # statements, validation, key encoder and metric children, driven through run_sync
+        self.sync: AlchemyWAPI = AlchemyWAPI(pspace, engine.sync_engine, metadata)
+        self.results_view: TableClause = self.sync.results_view
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[AsyncConnection]:
+        start = time.perf_counter()
+        try:
+            async with self.engine.begin() as conn:
+                yield conn
+        except Exception as e:
+            if isinstance(e, OperationalError) and is_busy_error(e):
+                self.sync.m_busy.inc()
+            # surrogate ids handed out in a rolled back transaction do not exist
+            if self.sync.key_encoder is not None:
+                self.sync.key_encoder.reset()
+            raise
+        self.sync.m_batches.inc()
+        self.sync.m_ingest_seconds.observe(time.perf_counter() - start)
+
+    async def insert_batch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert already validated rows (run key included), in one transaction.
+        """
+        if len(rows) == 0:
+            return
+
+        async with self.begin() as conn:
+            await conn.run_sync(self.sync._insert_chunk, rows)
+
+    async def insert_rows(
+        self,
+        df: DataFrame,
+        quarantine: QuarantineWriter | None = None,
+        first_line: int = CSV_FIRST_LINE,
+    ) -> Status:
+        status, valid_rows = self.sync.validate_rows(df, quarantine, first_line)
+
+        await self.insert_batch(valid_rows)
+        status.add_note(
+            note=f"added {len(valid_rows)} rows to results table in problem {self.pspace.name}",
+            file=__file__,
+        )
+
+        return status
+
+    async def insert_frame(
+        self,
+        frame: ResultFrame,
+        chunksize: int = _CHUNK,
+        quarantine: QuarantineWriter | None = None,
+        first_line: int = CSV_FIRST_LINE,
+    ) -> Status:
+        status, valid, run_key = self.sync.validate_frame_rows(
+            frame, quarantine, first_line
+        )
+
+        async with self.begin() as conn:
+            for rows in valid.iter_rows(chunksize=chunksize):
+                for row in rows:
+                    row.update(run_key)
+                await conn.run_sync(self.sync._insert_chunk, rows)
+
+        status.add_note(
+            note=f"added {len(valid)} rows to results table in problem {self.pspace.name}",
+            file=__file__,
+        )
+
+        return status
+
+    async def stream_frames(
+        self, whereclause: ColumnElement[bool] | None = None, chunksize: int = _CHUNK
+    ) -> AsyncIterator[ResultFrame]:
+        """
+        Results rows (run key included), a ResultFrame of at most chunksize rows at a time, fetched with a
+        server side cursor: only one chunk is ever in memory.
+        """
+        features = list(run_key_features().values()) + self.pspace.full_row()
+        stmt = select(*[self.results_view.c[f.name] for f in features])
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+
+        async with self.engine.connect() as conn:
+            res = await conn.stream(stmt)
+            async for part in res.mappings().partitions(chunksize):
+                yield ResultFrame.from_rows(features, part)
+
+    async def query_frame(
+        self, whereclause: ColumnElement[bool] | None = None, chunksize: int = _CHUNK
+    ) -> ResultFrame:
+        features = list(run_key_features().values()) + self.pspace.full_row()
+        with self.sync.m_query_seconds("query_frame").time():
+            frames = [f async for f in self.stream_frames(whereclause, chunksize)]
+
+        if len(frames) == 0:
+            return ResultFrame.from_rows(features, [])
+        return ResultFrame.concat(frames)
+
+    async def runs_since(self, since: datetime, chunksize: int = _CHUNK) -> ResultFrame:
+        return await self.query_frame(
+            self.results_view.c[_TIMESTAMP_ADDED] > since, chunksize=chunksize
+        )
+
+    async def latest_timestamp(self) -> datetime | None:
+        results = self.metadata.tables[_RESULTS_TABLE_NAME]
+        with self.sync.m_query_seconds("latest_timestamp").time():
+            async with self.engine.connect() as conn:
+                return await conn.scalar(
+                    select(results.c[_TIMESTAMP_ADDED])
+                    .order_by(results.c[_TIMESTAMP_ADDED].desc())
+                    .limit(1)
+                )
+
+    async def read_summary(self) -> DataFrame:
+        with self.sync.m_query_seconds("read_summary").time():
+            async with self.engine.connect() as conn:
+                res = await conn.execute(
+                    self.metadata.tables[_SUMMARY_TABLE_NAME].select()
+                )
+                records = [dict(r._mapping) for r in res]
+
+        return summary_to_frame(records, self.pspace)
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+
+
+class AsyncAlchemyFactory:
+    """
+    asyncio twin of AlchemyFactory. Reconciliation (create, reflect, rebuild derived tables) is AlchemyFactory's,
+    run once in a worker thread so it never blocks the event loop; the reconciled metadata is then served through
+    an aiosqlite engine.
+    """
+
+    def __init__(
+        self,
+        pspace: ProblemSpace,
+        encode_keys: bool = True,
+        dbpath: Path | None = None,
+    ):
+        self.pspace: ProblemSpace = pspace
+        self.encode_keys: bool = encode_keys
+        self.dbpath: Path = dbpath or Path(_SPACE) / pspace.name / _EXPERIMENTS_DBFILE
+
+    async def check_and_init_db(self) -> StatusOr[AsyncAlchemyWAPI]:
+        def reconcile() -> StatusOr[AlchemyWAPI]:
+            factory = AlchemyFactory(
+                self.pspace, encode_keys=self.encode_keys, dbpath=self.dbpath
+            )
+            try:
+                return factory.check_and_init_db()
+            finally:
+                factory.engine.dispose()
+
+        res = await asyncio.to_thread(reconcile)
+        if not res.is_ok():
+            return res
+
+        engine = create_async_engine(_AIOSQLITE_PREF + str(self.dbpath))
+        success: Success[AsyncAlchemyWAPI] = Success(
+            value=AsyncAlchemyWAPI(self.pspace, engine, res.unwrap().metadata),
+            title=res.title,
+        )
+        for file, notes in res.unwrap_notes().items():
+            for note in notes:
+                success.add_note(note=note, file=file)
+        return success
+
+
+async def init_async_alchemy_api(
+    pspace: ProblemSpace, encode_keys: bool = True
+) -> StatusOr[AsyncAlchemyWAPI]:
+    af = AsyncAlchemyFactory(pspace, encode_keys=encode_keys)
+    return await af.check_and_init_db()
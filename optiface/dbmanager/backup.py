@@ -0,0 +1,182 @@
+import sqlite3
+import time
+import yaml
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from optiface.core.optierror import Status, StatusOr, Success, Failure
+from optiface.core.optispace import ProblemSpace
+from optiface.dbmanager.dbm import _RESULTS_TABLE_NAME
+from optiface.constants import _SPACE, _EXPERIMENTS_DBFILE, _BACKUPS
+
+# pages copied per backup step, and the pause between steps (lets writers take the lock)
+_BACKUP_PAGES = 256
+_BACKUP_SLEEP_S = 0.005
+
+_KEEP = 7
+
+_BACKUP_STAMP = "%Y%m%dT%H%M%S%fZ"
+_BACKUP_PREF = "experiments-"
+_MANIFEST_FILE = "manifest.yaml"
+
+# manifest keys
+_LAST = "last"
+_FINGERPRINT = "fingerprint"
+
+_INTEGRITY_OK = "ok"
+
+
+def online_backup(
+    src: Path, dst: Path, pages: int = _BACKUP_PAGES, sleep_s: float = _BACKUP_SLEEP_S
+) -> int:
+    """
+    Copy src to dst with sqlite's online backup API, pages at a time with a sleep between steps,
+    so concurrent writers are only ever blocked for one step. The copy is a consistent snapshot.
+    Returns the number of steps taken.
+    """
+    steps = 0
+
+    def pause(status: int, remaining: int, total: int) -> None:
+        # Connection.backup's own sleep only applies to BUSY / LOCKED steps, the pause between steps is ours
+        nonlocal steps
+        steps += 1
+        if remaining > 0 and sleep_s > 0:
+            time.sleep(sleep_s)
+
+    source = sqlite3.connect(src)
+    target = sqlite3.connect(dst)
+    try:
+        source.backup(target, pages=pages, progress=pause, sleep=sleep_s)
+    finally:
+        target.close()
+        source.close()
+    return steps
+
+
+def integrity_errors(path: Path) -> list[str]:
+    """
+    PRAGMA integrity_check of a database file, empty if it is sound.
+    """
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        res = [r[0] for r in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if res == [_INTEGRITY_OK] else res
+
+
+def db_fingerprint(path: Path) -> dict[str, int]:
+    """
+    Cheap change detector: schema version, run count and max run_id (run ids only grow, archival lowers the count).
+    """
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        count, max_id = conn.execute(
+            f"SELECT count(*), coalesce(max(run_id), 0) FROM {_RESULTS_TABLE_NAME}"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"schema_version": schema_version, "runs": count, "max_run_id": max_id}
+
+
+class BackupManager:
+    """
+    Rotated, verified online backups of a problem space's experiments.db, under space/<problem>/backups/.
+
+    Every backup is a full snapshot taken with the sqlite backup API (safe while other processes are writing),
+    verified with PRAGMA integrity_check before it replaces anything; only the newest keep backups are kept.
+    A backup is skipped when the database has not changed since the last one (see db_fingerprint).
+    """
+
+    def __init__(self, pspace: ProblemSpace, keep: int = _KEEP):
+        self.pspace: ProblemSpace = pspace
+        self.keep: int = keep
+        self.dbpath: Path = Path(_SPACE) / pspace.name / _EXPERIMENTS_DBFILE
+        self.dir: Path = Path(_SPACE) / pspace.name / _BACKUPS
+        self.manifest_path: Path = self.dir / _MANIFEST_FILE
+
+    def backups(self) -> list[Path]:
+        # timestamped names sort chronologically
+        return sorted(self.dir.glob(f"{_BACKUP_PREF}*.db"))
+
+    def _read_manifest(self) -> dict[str, Any]:
+        if not self.manifest_path.exists():
+            return dict()
+        with open(self.manifest_path, "r") as file:
+            return yaml.safe_load(file) or dict()
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        with open(self.manifest_path, "w") as file:
+            yaml.safe_dump(manifest, file)
+
+    def backup(
+        self,
+        force: bool = False,
+        pages: int = _BACKUP_PAGES,
+        sleep_s: float = _BACKUP_SLEEP_S,
+    ) -> StatusOr[Path]:
+        failure: Failure[Path] = Failure(title="Backup")
+        if not self.dbpath.exists():
+            failure.add_err(err=f"{self.dbpath} does not exist", file=__file__)
+            return failure
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest()
+        fingerprint = db_fingerprint(self.dbpath)
+        last = manifest.get(_LAST)
+
+        if (
+            not force
+            and last is not None
+            and (self.dir / last).exists()
+            and manifest.get(_FINGERPRINT) == fingerprint
+        ):
+            return Success(
+                value=self.dir / last,
+                title=f"Backup, no changes since {last}",
+            )
+
+        stamp = datetime.now(timezone.utc).strftime(_BACKUP_STAMP)
+        path = self.dir / f"{_BACKUP_PREF}{stamp}.db"
+        tmp = self.dir / f".{path.name}.tmp"
+
+        online_backup(self.dbpath, tmp, pages=pages, sleep_s=sleep_s)
+        errs = integrity_errors(tmp)
+        if len(errs) > 0:
+            tmp.unlink()
+            for e in errs:
+                failure.add_err(err=f"integrity check: {e}", file=__file__)
+            return failure
+        tmp.rename(path)
+
+        self._write_manifest({_LAST: path.name, _FINGERPRINT: fingerprint})
+        status: Success[Path] = Success(value=path, title="Backup")
+        status.add_note(
+            note=f"backed up {fingerprint['runs']} runs of problem {self.pspace.name} to {path}",
+            file=__file__,
+        )
+
+        for old in self.rotate():
+            status.add_note(note=f"removed old backup {old}", file=__file__)
+        return status
+
+    def rotate(self) -> list[Path]:
+        removed = self.backups()[: -self.keep] if self.keep > 0 else []
+        for old in removed:
+            old.unlink()
+        return removed
+
+    def verify(self) -> Status:
+        """
+        Integrity check every kept backup.
+        """
+        failure: Failure[None] = Failure(title="Backup verification")
+        for path in self.backups():
+            for e in integrity_errors(path):
+                failure.add_err(err=f"{path.name}: {e}", file=__file__)
+        if failure.has_errs:
+            return failure
+        return Success(title=f"Backup verification, {len(self.backups())} backups ok")
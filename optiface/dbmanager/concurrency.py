@@ -0,0 +1,120 @@
+import os
+import random
+import threading
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import Engine, event
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no cross-process writer lock
+    fcntl = None
+
+_LOCK_SUFFIX = ".lock"
+
+
+@dataclass
+class WriteConcurrency:
+    """
+    How writers share one experiments.db across processes (e.g. many migratecsv.py / runner jobs at once):
+        - busy_timeout_ms: how long sqlite itself waits on a locked database before giving up with SQLITE_BUSY
+        - immediate: write transactions BEGIN IMMEDIATE, taking the write lock up front (a deferred transaction
+          that reads then writes can deadlock with another writer and fails at once, without waiting)
+        - retries / backoff_s / max_backoff_s: jittered exponential backoff when SQLITE_BUSY still comes through
+        - wal: journal_mode=WAL and synchronous=NORMAL, readers never block the writer and commits do not fsync
+        - writer_lock: writers take turns on a cross-process lock file (a mutex, each writer still commits its
+          own transactions), a BatchWriter that finds it taken keeps buffering (up to max_buffered_rows) so its
+          own batches go out together, in one transaction and one sync
+    """
+
+    busy_timeout_ms: int = 5_000
+    immediate: bool = True
+    retries: int = 10
+    backoff_s: float = 0.005
+    max_backoff_s: float = 0.5
+    wal: bool = True
+    writer_lock: bool = False
+    max_buffered_rows: int = 50_000
+
+    def backoff(self, attempt: int) -> float:
+        # full jitter: writers that collided once do not collide again on the same schedule
+        return random.uniform(0, min(self.max_backoff_s, self.backoff_s * 2**attempt))
+
+
+def configure_sqlite(engine: Engine, concurrency: WriteConcurrency) -> None:
+    """
+    Per connection pragmas, set as the pool opens each connection.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(concurrency.busy_timeout_ms)}")
+        if concurrency.wal:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.close()
+
+
+class WriterLock:
+    """
+    Cross-process writer mutex: an exclusive flock on <database>.lock, held around write transactions. Waiting
+    writers sleep in the kernel's queue instead of polling the database, and the lock being taken is the signal for
+    a BatchWriter to keep buffering. It serializes writers, it does not merge their transactions.
+    flock excludes processes, the inner lock excludes the threads of one process (they share the file description).
+    """
+
+    def __init__(self, path: Path):
+        if fcntl is None:
+            raise RuntimeError("The writer lock needs POSIX file locks (fcntl).")
+        self.path: Path = path
+        self._fd: int | None = None
+        self._thread_lock = threading.Lock()
+
+    @staticmethod
+    def for_database(dbpath: str | Path) -> "WriterLock":
+        return WriterLock(Path(str(dbpath) + _LOCK_SUFFIX))
+
+    def _file(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(self._file(), flags)
+        except BlockingIOError:
+            self._thread_lock.release()
+            return False
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self) -> None:
+        fcntl.flock(self._file(), fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def taken(self) -> bool:
+        """
+        Whether another writer holds the lock right now (a hint, it may be released a moment later).
+        """
+        if self.acquire(blocking=False):
+            self.release()
+            return False
+        return True
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
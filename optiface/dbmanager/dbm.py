@@ -1,10 +1,18 @@
+import time
+
+import numpy as np
+
 from datetime import datetime
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
 
 from pathlib import Path
 
+from sqlalchemy.sql import ColumnElement
+
 from pandas import DataFrame
-from sqlalchemy import Engine, create_engine, engine
+from sqlalchemy import Connection, Engine, create_engine, engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy import (
     MetaData,
     Table,
@@ -14,26 +22,104 @@ from sqlalchemy import (
     Float,
     DateTime,
     Boolean,
+    Index,
     Inspector,
+    TableClause,
+    TypeDecorator,
     inspect,
-    insert,
+    select,
 )
 
 from optiface.core.optispace import (
     ProblemSpace,
     Feature,
+    RowValidator,
+    row_err_message,
     run_key_features,
 )
 
 from optiface.core.optierror import Status, StatusOr, Failure, Success
 
-from optiface.core.featuredata import _RUN_KEY_FDATA
+from optiface.core.resultframe import (
+    ResultFrame,
+    validate_frame,
+    datetime_to_micros,
+    micros_to_datetime,
+)
+
+from optiface.core.featuredata import _RUN_KEY_FDATA, _FROM_CSV, _TIMESTAMP_ADDED
 
 from optiface.core.optidatetime import OptiDateTimeFactory
 
+from optiface.core import optitrace
+
+from optiface import metrics
+
+from optiface.dbmanager.summary import (
+    _SUMMARY_TABLE_NAME,
+    init_summary_table,
+    summary_column_names,
+    summary_in_sync,
+    upsert_summary,
+    summary_upsert_statement,
+    rebuild_summary,
+    summary_to_frame,
+)
+
+from optiface.dbmanager.keyencoding import (
+    KeyEncoder,
+    dim_table_name,
+    encoded_features,
+    init_dim_tables,
+    create_results_view,
+    results_view_clause,
+    _RESULTS_VIEW_NAME,
+)
+
+from optiface.dbmanager.memo import (
+    _MEMO_TABLE_NAME,
+    _KEY_HASH,
+    _MEMO_RUNS,
+    init_memo_table,
+    upsert_memo,
+    memo_upsert_statement,
+    rebuild_memo,
+)
+
+from optiface.dbmanager.sketch import (
+    _SKETCH_TABLE_NAME,
+    FeatureSketch,
+    init_sketch_table,
+    upsert_sketches,
+    rebuild_sketches,
+    read_sketch,
+    read_merged_sketch,
+    sketches_to_frame,
+)
+
+from optiface.dbmanager.plans import PlanCache, StatementPlan
+
+from optiface.dbmanager.quarantine import QuarantineWriter, CSV_FIRST_LINE
+
+from optiface.dbmanager.concurrency import (
+    WriteConcurrency,
+    WriterLock,
+    configure_sqlite,
+)
+
 from optiface.constants import _SQLITE_PREF, _SPACE, _EXPERIMENTS_DBFILE
 
 _RESULTS_TABLE_NAME = "results"
+_RESULTS_KEY_INDEX = "ix_results_key"
+_RESULTS_TIMESTAMP_INDEX = "ix_results_timestamp"
+
+# every table optiface itself maintains in experiments.db, anything else is unknown
+_OPTIFACE_TABLE_NAMES: set[str] = {
+    _RESULTS_TABLE_NAME,
+    _SUMMARY_TABLE_NAME,
+    _MEMO_TABLE_NAME,
+    _SKETCH_TABLE_NAME,
+}
 
 feature_to_alchemy_types: dict[type, type] = {
     str: String,
@@ -44,56 +130,601 @@ feature_to_alchemy_types: dict[type, type] = {
 }
 
 
+def is_busy_error(e: OperationalError) -> bool:
+    # SQLITE_BUSY / SQLITE_LOCKED surface as OperationalError("database is locked" / "... is busy")
+    msg = str(e.orig).lower()
+    return "locked" in msg or "busy" in msg
+
+
+class EpochMicros(TypeDecorator):
+    """
+    timestamp_added stored as integer epoch microseconds (UTC): 8 bytes instead of ~26 of DateTime text,
+    and compared / range-scanned as plain integers. Python sees aware UTC datetimes.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect) -> int | None:
+        return None if value is None else datetime_to_micros(value)
+
+    def process_result_value(self, value: int | None, dialect) -> datetime | None:
+        return None if value is None else micros_to_datetime(value)
+
+
+def results_timestamp_index(results: Table) -> Index:
+    """
+    Index on timestamp_added, for the runs_since / runs_between range scans.
+    """
+    return Index(_RESULTS_TIMESTAMP_INDEX, results.c[_TIMESTAMP_ADDED])
+
+
+def results_key_index(results: Table, pspace: ProblemSpace) -> Index:
+    """
+    Index on the instance_key + solver_key columns, for lookups of the runs of a key (e.g. the missing-runs planner).
+    """
+    keys = list(pspace.instance_key.keys()) + list(pspace.solver_key.keys())
+    return Index(_RESULTS_KEY_INDEX, *[results.c[name] for name in keys])
+
+
 class AlchemyWAPI:
-    def __init__(self, pspace: ProblemSpace, engine: Engine, metadata: MetaData):
+    def __init__(
+        self,
+        pspace: ProblemSpace,
+        engine: Engine,
+        metadata: MetaData,
+        concurrency: WriteConcurrency | None = None,
+    ):
         self.pspace: ProblemSpace = pspace
         self.odtf = OptiDateTimeFactory()
         self.engine: Engine = engine
         self.metadata: MetaData = metadata
 
+        # multi-process writers, see concurrency (None: plain deferred transactions, no retries)
+        self.concurrency: WriteConcurrency | None = concurrency
+        self.writer_lock: WriterLock | None = None
+        if concurrency is not None and concurrency.writer_lock:
+            self.writer_lock = WriterLock.for_database(engine.url.database)
+
+        # encoded layout: string key features live in dimension tables, see keyencoding
+        self.dims: dict[str, Table] = {
+            f.name: metadata.tables[dim_table_name(f.name)]
+            for f in encoded_features(pspace)
+            if dim_table_name(f.name) in metadata.tables
+        }
+        self.key_encoder: KeyEncoder | None = None
+        if len(self.dims) > 0:
+            self.key_encoder = KeyEncoder(self.dims)
+
+        # statements compiled once per schema, for the lifetime of the engine (see plans)
+        self.plans: PlanCache = PlanCache(engine.dialect)
+        results = metadata.tables[_RESULTS_TABLE_NAME]
+        self.results_columns: list[str] = [c.name for c in results.c]
+        # positional rows (insert_tuples): every feature, in full_row order
+        self.row_names: list[str] = [f.name for f in pspace.full_row()]
+
+        # readers always go through the (decoding) results view
+        self.results_view: TableClause = results_view_clause(
+            metadata.tables[_RESULTS_TABLE_NAME], self.dims
+        )
+
+        # metric children resolved once, updates are then a per-thread add
+        self.m_rows_ingested = metrics.ROWS_INGESTED.labels(problem=pspace.name)
+        self.m_rows_rejected = metrics.ROWS_REJECTED.labels(problem=pspace.name)
+        self.m_batches = metrics.INGEST_BATCHES.labels(problem=pspace.name)
+        self.m_ingest_seconds = metrics.INGEST_SECONDS.labels(problem=pspace.name)
+        self.m_busy = metrics.SQLITE_BUSY.labels(problem=pspace.name)
+
+    def m_query_seconds(self, query: str) -> metrics.HistogramChild:
+        return metrics.QUERY_SECONDS.labels(problem=self.pspace.name, query=query)
+
+    @contextmanager
+    def _write_locked(self) -> Iterator[None]:
+        if self.writer_lock is None:
+            yield
+            return
+        with self.writer_lock.hold():
+            yield
+
+    @contextmanager
+    def begin(self) -> Iterator[Connection]:
+        start = time.perf_counter()
+        try:
+            with optitrace.span(optitrace.SPAN_TRANSACTION), self._write_locked():
+                with self.engine.connect() as conn:
+                    trans = conn.begin()
+                    try:
+                        if self.concurrency is not None and self.concurrency.immediate:
+                            # the write lock up front: waits (busy timeout) instead of failing on lock upgrade
+                            conn.exec_driver_sql("BEGIN IMMEDIATE")
+                        yield conn
+                    except Exception:
+                        trans.rollback()
+                        raise
+                    with optitrace.span(optitrace.SPAN_COMMIT):
+                        trans.commit()
+                    optitrace.count(optitrace.COUNT_COMMITS)
+            self.m_batches.inc()
+            self.m_ingest_seconds.observe(time.perf_counter() - start)
+        except Exception as e:
+            if isinstance(e, OperationalError) and is_busy_error(e):
+                self.m_busy.inc()
+            # surrogate ids handed out in a rolled back transaction do not exist
+            if self.key_encoder is not None:
+                self.key_encoder.reset()
+            raise
+
+    def write(self, body: Callable[[Connection], None]) -> None:
+        """
+        Run body in one write transaction, retried from scratch with jittered backoff while the database is busy
+        (with a concurrency mode, otherwise the first busy error is raised).
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.begin() as conn:
+                    body(conn)
+                return
+            except OperationalError as e:
+                if (
+                    self.concurrency is None
+                    or not is_busy_error(e)
+                    or attempt >= self.concurrency.retries
+                ):
+                    raise
+                time.sleep(self.concurrency.backoff(attempt))
+                attempt += 1
+
     def insert_single_row(self, row: dict[str, Any]) -> None:
-        stmt = insert(self.metadata.tables[_RESULTS_TABLE_NAME]).values(**row)
-        stmt.compile()
+        self.insert_batch([row])
+
+    def insert_batch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert already validated rows (run key included), keeping the summary and memo tables in step in the same transaction.
+        """
+        if len(rows) == 0:
+            return
+
+        self.write(lambda conn: self._insert_chunk(conn, rows))
+
+    def insert_tuples(self, rows: list[tuple]) -> None:
+        """
+        Insert already validated rows given positionally, one value per feature in self.row_names
+        (ProblemSpace.full_row) order, all stamped with one run key. A convenience for callers holding tuples, not a
+        faster path: the summary, memo and sketch upserts work on dict rows, so each tuple becomes one.
+        """
+        if len(rows) == 0:
+            return
+
+        run_key: dict[str, Any] = dict()
+        self.pspace.add_run_key(run_key)
+        names = self.row_names
+        self.insert_batch([dict(zip(names, row), **run_key) for row in rows])
+
+    def results_insert_plan(self, row: dict[str, Any]) -> StatementPlan:
+        # rows carry the run key without run_id (autoincremented), the plan is keyed on which columns they have
+        names = [c for c in self.results_columns if c in row]
+        return self.plans.insert(self.metadata.tables[_RESULTS_TABLE_NAME], names)
+
+    def _insert_chunk(self, conn: Connection, rows: list[dict[str, Any]]) -> None:
+        summary = self.metadata.tables[_SUMMARY_TABLE_NAME]
+        memo = self.metadata.tables[_MEMO_TABLE_NAME]
+        with optitrace.span(optitrace.SPAN_SUMMARY):
+            upsert_summary(
+                conn,
+                summary,
+                self.pspace,
+                rows,
+                self.plans.statement(
+                    "summary_upsert",
+                    lambda: summary_upsert_statement(summary, self.pspace),
+                    summary_column_names(self.pspace),
+                ),
+            )
+        with optitrace.span(optitrace.SPAN_MEMO):
+            upsert_memo(
+                conn,
+                memo,
+                self.pspace,
+                rows,
+                self.plans.statement(
+                    "memo_upsert",
+                    lambda: memo_upsert_statement(memo),
+                    [_KEY_HASH, _MEMO_RUNS],
+                ),
+            )
+        with optitrace.span(optitrace.SPAN_SKETCH):
+            upsert_sketches(
+                conn,
+                self.metadata.tables[_SKETCH_TABLE_NAME],
+                self.pspace,
+                rows,
+                self.plans,
+            )
+        if self.key_encoder is not None:
+            with optitrace.span(optitrace.SPAN_KEY_ENCODE):
+                rows = self.key_encoder.encode_rows(conn, rows)
+        with optitrace.span(optitrace.SPAN_RESULTS_INSERT, rows=len(rows)):
+            self.results_insert_plan(rows[0]).execute(conn, rows)
+        optitrace.count(optitrace.COUNT_ROWS_WRITTEN, len(rows))
+        self.m_rows_ingested.inc(len(rows))
+
+    def insert_frame(
+        self,
+        frame: ResultFrame,
+        chunksize: int = 10_000,
+        quarantine: QuarantineWriter | None = None,
+        first_line: int = CSV_FIRST_LINE,
+    ) -> Status:
+        """
+        Columnar counterpart of insert_rows: validate the whole frame at once, then insert the valid rows
+        chunksize at a time in a single transaction (one run key timestamp for the batch).
+        """
+        status, valid, run_key = self.validate_frame_rows(frame, quarantine, first_line)
+
+        def body(conn: Connection) -> None:
+            for rows in valid.iter_rows(chunksize=chunksize):
+                for row in rows:
+                    row.update(run_key)
+                self._insert_chunk(conn, rows)
+
+        self.write(body)
+
+        status.add_note(
+            note=f"added {len(valid)} rows to results table in problem {self.pspace.name}",
+            file=__file__,
+        )
+
+        return status
 
-        with self.engine.connect() as conn:
-            conn.execute(stmt)
-            conn.commit()
+    def validate_frame_rows(
+        self,
+        frame: ResultFrame,
+        quarantine: QuarantineWriter | None = None,
+        first_line: int = CSV_FIRST_LINE,
+    ) -> tuple[Status, ResultFrame, dict[str, Any]]:
+        """
+        Validate the whole frame at once, returns the status (a note per skipped row), the valid rows and the
+        run key to stamp them with. Skipped rows also go to the quarantine, if any (row i is source line first_line + i).
+        """
+        status: Status = Success(title="Frame insertion from AlchemyWAPI")
+        optitrace.count(optitrace.COUNT_ROWS_IN, len(frame))
+        with optitrace.span(optitrace.SPAN_VALIDATE, rows=len(frame)):
+            valid, errors = validate_frame(self.pspace, frame)
+        optitrace.count(optitrace.COUNT_ROWS_REJECTED, len(frame) - len(valid))
+        self.m_rows_rejected.inc(len(frame) - len(valid))
+
+        for i, code, feature_name in errors:
+            status.add_note(
+                note=f"Skipping non-valid row {i}: {code} for feature {feature_name}",
+                file=__file__,
+            )
 
-    def insert_rows(self, df: DataFrame) -> Status:
+        if quarantine is not None and len(errors) > 0:
+            row_errs: dict[int, list[tuple[str, str]]] = dict()
+            for i, code, feature_name in errors:
+                row_errs.setdefault(int(i), []).append((code, feature_name))
+            # the records as read, so the cell that failed coercion (and any non-feature column) is kept
+            bad = np.array(sorted(row_errs), dtype=np.int64)
+            rejected = frame.source_rows(bad)
+            for i, row in zip(bad.tolist(), rejected):
+                quarantine.add(first_line + i, row, row_errs[i])
+
+        run_key: dict[str, Any] = dict()
+        self.pspace.add_run_key(run_key)
+
+        return status, valid, run_key
+
+    def query_frame(
+        self, whereclause: ColumnElement[bool] | None = None, chunksize: int = 10_000
+    ) -> ResultFrame:
+        """
+        Results rows (run key included) as a ResultFrame, streamed from the database chunksize rows at a time.
+        Live runs only: runs moved to the Parquet archive are not in the database (see RunArchive.query).
+        """
+        results = self.results_view
+        features = list(run_key_features().values()) + self.pspace.full_row()
+        stmt = select(*[results.c[f.name] for f in features])
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+
+        frames: list[ResultFrame] = []
+        with self.m_query_seconds("query_frame").time():
+            with self.engine.connect() as conn:
+                res = conn.execution_options(stream_results=True).execute(stmt)
+                for part in res.mappings().partitions(chunksize):
+                    frames.append(ResultFrame.from_rows(features, part))
+
+        if len(frames) == 0:
+            return ResultFrame.from_rows(features, [])
+        return ResultFrame.concat(frames)
+
+    def runs_since(
+        self, since: datetime, chunksize: int = 10_000, include_archived: bool = False
+    ) -> ResultFrame:
+        """
+        Runs added strictly after since, e.g. with since the latest_timestamp() a consumer has already seen.
+        Live runs only, unless include_archived.
+        """
+        live = self.query_frame(
+            self.results_view.c[_TIMESTAMP_ADDED] > since, chunksize=chunksize
+        )
+        if not include_archived:
+            return live
+        return self._with_archived(live, since, None, include_start=False)
+
+    def runs_between(
+        self,
+        start: datetime,
+        end: datetime,
+        chunksize: int = 10_000,
+        include_archived: bool = False,
+    ) -> ResultFrame:
+        """
+        Runs added in [start, end). Live runs only, unless include_archived.
+        """
+        ts = self.results_view.c[_TIMESTAMP_ADDED]
+        live = self.query_frame((ts >= start) & (ts < end), chunksize=chunksize)
+        if not include_archived:
+            return live
+        return self._with_archived(live, start, end, include_start=True)
+
+    def _with_archived(
+        self,
+        live: ResultFrame,
+        start: datetime | None,
+        end: datetime | None,
+        include_start: bool,
+    ) -> ResultFrame:
+        # archived runs are older than live ones, they come first (imported here, archive needs dbm)
+        from optiface.dbmanager.archive import archived_added
+
+        archived = archived_added(self.pspace, start, end, include_start)
+        if archived is None or len(archived) == 0:
+            return live
+        if len(live) == 0:
+            return archived
+        return ResultFrame.concat([archived, live])
+
+    def latest_timestamp(self) -> datetime | None:
+        results = self.metadata.tables[_RESULTS_TABLE_NAME]
+        # max over the timestamp index, a single seek
+        plan = self.plans.select(
+            "latest_timestamp",
+            lambda: select(results.c[_TIMESTAMP_ADDED])
+            .order_by(results.c[_TIMESTAMP_ADDED].desc())
+            .limit(1),
+        )
+        with self.m_query_seconds(
+            "latest_timestamp"
+        ).time(), self.engine.connect() as conn:
+            return plan.scalar(conn)
+
+    def read_summary(self) -> DataFrame:
+        """
+        Per (instance_key, solver_key) group aggregates of every numeric output_key feature, read from the summary table.
+        """
+        with self.m_query_seconds("read_summary").time(), self.engine.connect() as conn:
+            res = conn.execute(self.metadata.tables[_SUMMARY_TABLE_NAME].select())
+            records = [dict(r._mapping) for r in res]
+
+        return summary_to_frame(records, self.pspace)
+
+    def read_sketch(self, group: dict[str, Any], feature: str) -> FeatureSketch | None:
+        """
+        Running moments and quantile sketch of one output_key feature for one (instance_key + solver_key) group,
+        a single index lookup however many runs the group has.
+        """
+        with self.m_query_seconds("read_sketch").time(), self.engine.connect() as conn:
+            return read_sketch(
+                conn,
+                self.metadata.tables[_SKETCH_TABLE_NAME],
+                self.pspace,
+                group,
+                feature,
+            )
+
+    def merged_sketch(
+        self, feature: str, filters: dict[str, Any] | None = None
+    ) -> FeatureSketch:
+        """
+        The sketches of every group matching filters merged into one, e.g. filters={"solver": "MIP"}.
+        """
+        with self.m_query_seconds(
+            "merged_sketch"
+        ).time(), self.engine.connect() as conn:
+            return read_merged_sketch(
+                conn, self.metadata.tables[_SKETCH_TABLE_NAME], feature, filters
+            )
+
+    def read_sketches(
+        self, quantiles: tuple[float, ...] = (0.5, 0.95, 0.99)
+    ) -> DataFrame:
+        """
+        Per group count, mean, std and quantiles of every numeric output_key feature, read from the sketches table.
+        """
+        with self.m_query_seconds(
+            "read_sketches"
+        ).time(), self.engine.connect() as conn:
+            return sketches_to_frame(
+                conn, self.metadata.tables[_SKETCH_TABLE_NAME], self.pspace, quantiles
+            )
+
+    def validate_rows(
+        self,
+        df: DataFrame,
+        quarantine: QuarantineWriter | None = None,
+        first_line: int = CSV_FIRST_LINE,
+    ) -> tuple[Status, list[dict[str, Any]]]:
+        """
+        Validate (and default-fill) the rows of df, stamping the valid ones with one run key for the whole batch.
+        Returns the status, with a note per skipped row, and the valid rows.
+        Skipped rows also go to the quarantine, if any, the i-th row of df as source line first_line + i.
+        """
         status: Status = Success(title="Batch row insertion from AlchemyWAPI")
+        valid_rows: list[dict[str, Any]] = []
+        validator: RowValidator = self.pspace.row_validator
+
+        # one run key timestamp for the whole batch
+        run_key: dict[str, Any] = dict()
+        self.pspace.add_run_key(run_key)
+
+        optitrace.count(optitrace.COUNT_ROWS_IN, len(df))
+        with optitrace.span(optitrace.SPAN_VALIDATE, rows=len(df)):
+            for i, (_, csv_row) in enumerate(df.iterrows()):
+                row = dict(csv_row)
+                errs, _ = validator(row)
+
+                # validate - does not validate the run key (run_id, time_added, added_from), this is generated by us
+                # TODO: need to improve multi-call-stack-level error msg propagation than just adding notes like this.
+                if errs is not None:
+                    status.add_note(
+                        note=f"Skipping non-valid row: {row}, with the following errors:",
+                        file=__file__,
+                    )
+                    for code, feature_name in errs:
+                        status.add_note(
+                            note=f"{code}: {row_err_message(code, feature_name, row)}",
+                            file=__file__,
+                        )
+                    if quarantine is not None:
+                        quarantine.add(first_line + i, row, errs)
+                else:
+                    row.update(run_key)
+                    valid_rows.append(row)
+        optitrace.count(optitrace.COUNT_ROWS_REJECTED, len(df) - len(valid_rows))
+        self.m_rows_rejected.inc(len(df) - len(valid_rows))
+
+        return status, valid_rows
+
+    def insert_rows(
+        self,
+        df: DataFrame,
+        quarantine: QuarantineWriter | None = None,
+        first_line: int = CSV_FIRST_LINE,
+    ) -> Status:
+        status, valid_rows = self.validate_rows(df, quarantine, first_line)
+
+        self.insert_batch(valid_rows)
+        status.add_note(
+            note=f"added {len(valid_rows)} rows to results table in problem {self.pspace.name}",
+            file=__file__,
+        )
 
-        for _, csv_row in df.iterrows():
-            row = dict(csv_row)
-            res: Status = self.pspace.validate_row(row)
+        return status
 
-            # validate - does not validate the run key (run_id, time_added, added_from), this is generated by us
-            # TODO: need to improve multi-call-stack-level error msg propagation than just adding notes like this.
-            if res.is_err():
-                status.add_note(
-                    note=f"Skipping non-valid row: {row}, with the following errors:",
-                    file=__file__,
-                )
-                for errs in res.unwrap_err().values():
-                    for e in errs:
-                        status.add_note(note=e, file=__file__)
-            else:
-                self.pspace.add_run_key(row)
-                self.insert_single_row(row)
-                res.add_note(
-                    note=f"added row {row} to results table in problem {self.pspace.name}",
+
+class BatchWriter:
+    """
+    Single writer in front of an AlchemyWAPI: rows are validated as they are added, buffered, and inserted
+    batch_size at a time (one transaction, and one run key timestamp, per batch) instead of one transaction per row.
+    Not thread-safe, producers (e.g. the local runner's workers) hand their rows to one thread that owns the writer.
+    """
+
+    def __init__(
+        self,
+        wapi: AlchemyWAPI,
+        batch_size: int = 1_000,
+        added_from: str = _FROM_CSV,
+        quarantine: QuarantineWriter | None = None,
+    ):
+        self.wapi: AlchemyWAPI = wapi
+        self.batch_size: int = batch_size
+        self.added_from: str = added_from
+        self.quarantine: QuarantineWriter | None = quarantine
+        self.validator: RowValidator = wapi.pspace.row_validator
+        self.buffer: list[dict[str, Any]] = []
+        self.n_written: int = 0
+        self.status: Status = Success(title="Batched row insertion from AlchemyWAPI")
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, row: dict[str, Any], line: int | None = None) -> bool:
+        """
+        Validate (and default-fill) row, buffer it, flush when the buffer is full. False if the row was skipped
+        (and quarantined with its source line, if the writer has a quarantine).
+        """
+        errs, _ = self.validator(row)
+        if errs is not None:
+            self.status.add_note(
+                note=f"Skipping non-valid row: {row}, with the following errors:",
+                file=__file__,
+            )
+            for code, feature_name in errs:
+                self.status.add_note(
+                    note=f"{code}: {row_err_message(code, feature_name, row)}",
                     file=__file__,
                 )
-
-        return status
+            if self.quarantine is not None:
+                self.quarantine.add(line, row, errs)
+            self.wapi.m_rows_rejected.inc()
+            return False
+
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush(force=False)
+        return True
+
+    def flush(self, force: bool = True) -> None:
+        """
+        Insert the buffered rows. Unless forced, with the writer lock on and another writer holding it, keep buffering
+        (up to max_buffered_rows): the rows then go out with the next batch, in one transaction.
+        """
+        lock = self.wapi.writer_lock
+        if (
+            not force
+            and lock is not None
+            and len(self.buffer) < self.wapi.concurrency.max_buffered_rows
+            and lock.taken()
+        ):
+            return
+
+        rows, self.buffer = self.buffer, []
+        if len(rows) == 0:
+            return
+
+        run_key: dict[str, Any] = dict()
+        self.wapi.pspace.add_run_key(run_key, added_from=self.added_from)
+        for row in rows:
+            row.update(run_key)
+        self.wapi.insert_batch(rows)
+        self.n_written += len(rows)
+
+    def close(self) -> Status:
+        self.flush()
+        if self.quarantine is not None:
+            self.quarantine.close()
+        return self.status
 
 
 class AlchemyFactory:
-    def __init__(self, pspace: ProblemSpace):
+    def __init__(
+        self,
+        pspace: ProblemSpace,
+        encode_keys: bool = True,
+        dbpath: Path | None = None,
+        concurrency: WriteConcurrency | None = None,
+    ):
+        """
+        encode_keys: new databases store str instance_key / solver_key features through dimension tables
+        (existing databases keep whichever layout they were created with).
+        dbpath: defaults to the problem space's experiments.db (see partition for other database files).
+        concurrency: busy timeout, immediate transactions, retries and a writer lock for multi-process writers.
+        """
         self.pspace: ProblemSpace = pspace
-        self.dbpath: Path = Path(_SPACE) / pspace.name / _EXPERIMENTS_DBFILE
+        self.encode_keys: bool = encode_keys
+        self.dbpath: Path = dbpath or Path(_SPACE) / pspace.name / _EXPERIMENTS_DBFILE
+        self.concurrency: WriteConcurrency | None = concurrency
 
         # create_engine does not create db file if it DNE
         self.engine: Engine = create_engine(_SQLITE_PREF + str(self.dbpath), echo=True)
+        if concurrency is not None:
+            configure_sqlite(self.engine, concurrency)
+        optitrace.instrument_engine(self.engine)
         # inspecting creates db file if it DNE
         self.inspector: Inspector = inspect(self.engine)
 
@@ -102,14 +733,18 @@ class AlchemyFactory:
         failure: Failure = Failure(title="DB initialization")
 
         # other unknown tables in database
-        if len(tables) > 1 or (len(tables) == 1 and tables[0] != _RESULTS_TABLE_NAME):
+        dim_names = set(dim_table_name(f.name) for f in encoded_features(self.pspace))
+        known_tables = _OPTIFACE_TABLE_NAMES | dim_names
+        unknown_tables = [t for t in tables if t not in known_tables]
+        if len(unknown_tables) > 0:
             failure.add_err(
-                err=f"I cannot reconcile the problemspace {self.pspace.name} with its database, because there are unknown tables in the database: {', '.join(tables)}",
+                err=f"I cannot reconcile the problemspace {self.pspace.name} with its database, because there are unknown tables in the database: {', '.join(unknown_tables)}",
                 file=__file__,
             )
 
         # no results table
         if not failure.has_errs and len(tables) == 0:
+            self._count_init("created")
             return Success(
                 value=self.create_db(), title="DB initialization, created new db"
             )
@@ -121,13 +756,13 @@ class AlchemyFactory:
         feature_names.extend([f.name for f in self.pspace.full_row()])
         fnames = set(feature_names)
 
-        if tables == [_RESULTS_TABLE_NAME]:
+        if _RESULTS_TABLE_NAME in tables:
             # list[ReflectedColumn], which is effectively list[dict[str, str]]
             columns: list[Any] = self.inspector.get_columns(_RESULTS_TABLE_NAME)
 
             for col in columns:
                 self._process_column(col=col, failure=failure, fnames=fnames)
-                fnames.remove(col["name"])
+                fnames.discard(col["name"])
 
         if len(fnames) > 0:
             failure.add_err(
@@ -135,13 +770,97 @@ class AlchemyFactory:
                 file=__file__,
             )
 
+        present_dims = dim_names.intersection(tables)
+        if len(present_dims) > 0 and present_dims != dim_names:
+            failure.add_err(
+                err=f"I cannot reconcile the problemspace {self.pspace.name} with its database: missing key dimension tables {', '.join(dim_names - present_dims)}",
+                file=__file__,
+            )
+
+        if (
+            not failure.has_errs
+            and len(tables) > 0
+            and _RESULTS_TABLE_NAME not in tables
+        ):
+            failure.add_err(
+                err=f"I cannot reconcile the problemspace {self.pspace.name} with its database: missing {_RESULTS_TABLE_NAME} table",
+                file=__file__,
+            )
+
         if failure.has_errs:
+            self._count_init("failed")
             return failure
 
-        success = Success(value=self.reflect_db(), title="DB initialization, reflected")
+        self._count_init("reflected")
+        success = Success(
+            value=self.reflect_db(encoded=len(present_dims) > 0),
+            title="DB initialization, reflected",
+        )
+
+        # summaries are derived data, so a missing or stale summary table is rebuilt rather than reported
+        if not self._summary_in_sync(tables):
+            self.rebuild_summary_table(success.unwrap())
+            success.add_note(
+                note=f"rebuilt {_SUMMARY_TABLE_NAME} table from {_RESULTS_TABLE_NAME} in problem {self.pspace.name}",
+                file=__file__,
+            )
+
+        if _MEMO_TABLE_NAME not in tables:
+            self.rebuild_memo_table(success.unwrap())
+            success.add_note(
+                note=f"rebuilt {_MEMO_TABLE_NAME} table from {_RESULTS_TABLE_NAME} in problem {self.pspace.name}",
+                file=__file__,
+            )
+
+        if _SKETCH_TABLE_NAME not in tables:
+            self.rebuild_sketch_table(success.unwrap())
+            success.add_note(
+                note=f"rebuilt {_SKETCH_TABLE_NAME} table from {_RESULTS_TABLE_NAME} in problem {self.pspace.name}",
+                file=__file__,
+            )
 
         return success
 
+    def _count_init(self, outcome: str) -> None:
+        metrics.DB_INITS.labels(problem=self.pspace.name, outcome=outcome).inc()
+
+    def _summary_in_sync(self, tables: list[str]) -> bool:
+        if _SUMMARY_TABLE_NAME not in tables:
+            return False
+        columns = self.inspector.get_columns(_SUMMARY_TABLE_NAME)
+        return summary_in_sync([c["name"] for c in columns], self.pspace)
+
+    def _archived_rows(self) -> Iterator[list[dict[str, Any]]]:
+        # archived runs are still runs, derived tables are rebuilt over them too (imported here, archive needs dbm)
+        from optiface.dbmanager.archive import archived_rows
+
+        return archived_rows(self.pspace)
+
+    def rebuild_summary_table(self, wapi: AlchemyWAPI) -> None:
+        summary = wapi.metadata.tables[_SUMMARY_TABLE_NAME]
+        with self.engine.begin() as conn:
+            summary.drop(conn, checkfirst=True)
+            summary.create(conn)
+            rebuild_summary(conn, wapi.results_view, summary, self.pspace)
+            for rows in self._archived_rows():
+                upsert_summary(conn, summary, self.pspace, rows)
+
+    def rebuild_memo_table(self, wapi: AlchemyWAPI) -> None:
+        memo = wapi.metadata.tables[_MEMO_TABLE_NAME]
+        with self.engine.begin() as conn:
+            memo.create(conn, checkfirst=True)
+            rebuild_memo(conn, wapi.results_view, memo, self.pspace)
+            for rows in self._archived_rows():
+                upsert_memo(conn, memo, self.pspace, rows)
+
+    def rebuild_sketch_table(self, wapi: AlchemyWAPI) -> None:
+        sketches = wapi.metadata.tables[_SKETCH_TABLE_NAME]
+        with self.engine.begin() as conn:
+            sketches.create(conn, checkfirst=True)
+            rebuild_sketches(conn, wapi.results_view, sketches, self.pspace)
+            for rows in self._archived_rows():
+                upsert_sketches(conn, sketches, self.pspace, rows)
+
     def _process_column(self, col, failure: Failure, fnames: set[str]) -> None:
         if col["name"] == "run_id" and col["primary_key"] == 0:
             failure.add_err(
@@ -157,6 +876,18 @@ class AlchemyFactory:
     def feature_to_column(self, feature: Feature, pk=False):
         # TODO: default is not actually writing to SQLAlchemy column object rn
         # does this even matter?
+        if feature.name == _TIMESTAMP_ADDED:
+            return Column(
+                feature.name,
+                EpochMicros,
+                primary_key=pk,
+                nullable=not feature.required,
+            )
+        if self.encode_keys and feature.name in self._encoded_names:
+            # surrogate id into the feature's dimension table
+            return Column(
+                feature.name, Integer, primary_key=pk, nullable=not feature.required
+            )
         return Column(
             feature.name,
             feature_to_alchemy_types[feature.feature_type],
@@ -165,6 +896,10 @@ class AlchemyFactory:
             nullable=not feature.required,
         )
 
+    @property
+    def _encoded_names(self) -> set[str]:
+        return set(f.name for f in encoded_features(self.pspace))
+
     def run_key_columns(self) -> list[Column]:
         cols: list[Column] = []
         for feature_name, feature in run_key_features().items():
@@ -202,19 +937,58 @@ class AlchemyFactory:
         columns.extend(self.output_key_columns())
         metadata = MetaData()
         self.results_table = Table(_RESULTS_TABLE_NAME, metadata, *columns)
+        results_key_index(self.results_table, self.pspace)
+        results_timestamp_index(self.results_table)
+        init_summary_table(self.pspace, metadata, feature_to_alchemy_types)
+        init_memo_table(metadata)
+        init_sketch_table(self.pspace, metadata, feature_to_alchemy_types)
+        dims: dict[str, Table] = dict()
+        if self.encode_keys:
+            dims = init_dim_tables(self.pspace, metadata)
         metadata.create_all(self.engine)
-        return AlchemyWAPI(self.pspace, self.engine, metadata)
+        with self.engine.begin() as conn:
+            create_results_view(conn, self.results_table, dims)
+        return AlchemyWAPI(self.pspace, self.engine, metadata, self.concurrency)
 
-    def reflect_db(self) -> AlchemyWAPI:
+    def reflect_db(self, encoded: bool = False) -> AlchemyWAPI:
         metadata = MetaData()
+        overrides: list[Column] = []
+        # integer timestamps (epoch microseconds) reflect as INTEGER, older databases keep DATETIME text
+        for col in self.inspector.get_columns(_RESULTS_TABLE_NAME):
+            if col["name"] == _TIMESTAMP_ADDED and isinstance(col["type"], Integer):
+                overrides.append(Column(_TIMESTAMP_ADDED, EpochMicros))
         self.results_table = Table(
-            _RESULTS_TABLE_NAME, metadata, autoload_with=self.engine
+            _RESULTS_TABLE_NAME, metadata, *overrides, autoload_with=self.engine
         )
-        return AlchemyWAPI(self.pspace, self.engine, metadata)
-
-
-def init_alchemy_api(pspace: ProblemSpace) -> StatusOr[AlchemyWAPI]:
-    af = AlchemyFactory(pspace)
+        # not reflected: the summary, memo, sketch and dimension tables are always defined by the problem space
+        init_summary_table(self.pspace, metadata, feature_to_alchemy_types)
+        init_memo_table(metadata)
+        init_sketch_table(self.pspace, metadata, feature_to_alchemy_types)
+        dims: dict[str, Table] = dict()
+        if encoded:
+            dims = init_dim_tables(self.pspace, metadata)
+
+        # databases from before the view / key index existed
+        if _RESULTS_VIEW_NAME not in self.inspector.get_view_names():
+            with self.engine.begin() as conn:
+                create_results_view(conn, self.results_table, dims)
+
+        indexes = [ix["name"] for ix in self.inspector.get_indexes(_RESULTS_TABLE_NAME)]
+        with self.engine.begin() as conn:
+            if _RESULTS_KEY_INDEX not in indexes:
+                results_key_index(self.results_table, self.pspace).create(conn)
+            if _RESULTS_TIMESTAMP_INDEX not in indexes:
+                results_timestamp_index(self.results_table).create(conn)
+
+        return AlchemyWAPI(self.pspace, self.engine, metadata, self.concurrency)
+
+
+def init_alchemy_api(
+    pspace: ProblemSpace,
+    encode_keys: bool = True,
+    concurrency: WriteConcurrency | None = None,
+) -> StatusOr[AlchemyWAPI]:
+    af = AlchemyFactory(pspace, encode_keys=encode_keys, concurrency=concurrency)
     return af.check_and_init_db()
 
 
@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from pandas import DataFrame
+from sqlalchemy import (
+    Connection,
+    column,
+    table,
+    literal,
+    select,
+    union_all,
+    func,
+)
+
+from optiface.core.optierror import StatusOr, Success, Failure
+from optiface.core.optispace import (
+    ProblemSpace,
+    Feature,
+    OSpaceManager,
+    read_pspace_from_yaml,
+)
+from optiface.dbmanager.dbm import feature_to_alchemy_types, _RESULTS_TABLE_NAME
+from optiface.dbmanager.keyencoding import _RESULTS_VIEW_NAME
+from optiface.dbmanager.partition import _MAX_ATTACHED, memory_attach_engine
+from optiface.constants import _SPACE, _EXPERIMENTS_DBFILE
+
+_PROBLEM_COL = "problem"
+
+# aggregation name -> sql aggregate
+_FEDERATED_AGGS = {
+    "count": func.count,
+    "mean": func.avg,
+    "min": func.min,
+    "max": func.max,
+    "sum": func.sum,
+}
+
+
+@dataclass
+class SharedSchema:
+    """
+    Features every problem space in a federation has, with the same name and type, per key.
+    """
+
+    instance_key: list[Feature]
+    solver_key: list[Feature]
+    output_key: list[Feature]
+
+    def all(self) -> list[Feature]:
+        return self.instance_key + self.solver_key + self.output_key
+
+
+def _shared_key(keys: list[dict[str, Feature]]) -> list[Feature]:
+    shared: list[Feature] = []
+    for name, f in keys[0].items():
+        if all(name in k and k[name].feature_type is f.feature_type for k in keys[1:]):
+            shared.append(f)
+    return shared
+
+
+def shared_schema(pspaces: list[ProblemSpace]) -> SharedSchema:
+    return SharedSchema(
+        instance_key=_shared_key([p.instance_key for p in pspaces]),
+        solver_key=_shared_key([p.solver_key for p in pspaces]),
+        output_key=_shared_key([p.output_key for p in pspaces]),
+    )
+
+
+class FederatedQuery:
+    """
+    Read-only queries across several problem spaces at once: every experiments.db is ATTACHed to one connection,
+    and the features the problem spaces share (see shared_schema) are unioned, with a problem column, so a single
+    SQL aggregation can compare solvers across problems.
+    """
+
+    def __init__(self, pspaces: list[ProblemSpace]):
+        if len(pspaces) == 0:
+            raise ValueError("FederatedQuery needs at least one problem space.")
+        self.pspaces: list[ProblemSpace] = pspaces
+        self.schema: SharedSchema = shared_schema(pspaces)
+
+    @classmethod
+    def from_ospace(
+        cls, osm: OSpaceManager, names: list[str] | None = None
+    ) -> "FederatedQuery":
+        names = names or osm.problems
+        return cls([read_pspace_from_yaml(name) for name in names])
+
+    def dbpath(self, pspace: ProblemSpace) -> Path:
+        return Path(_SPACE) / pspace.name / _EXPERIMENTS_DBFILE
+
+    def _source(self, conn: Connection, schema: str) -> str:
+        # databases not opened since the results view was introduced only have the results table
+        res = conn.exec_driver_sql(
+            f"SELECT name FROM {schema}.sqlite_master WHERE type = 'view' AND name = ?",
+            (_RESULTS_VIEW_NAME,),
+        )
+        return _RESULTS_VIEW_NAME if res.first() is not None else _RESULTS_TABLE_NAME
+
+    def _union(self, conn: Connection, pspaces: list[ProblemSpace]):
+        features = self.schema.all()
+        selects = []
+
+        for i, pspace in enumerate(pspaces):
+            schema = f"f{i}"
+            src = table(
+                self._source(conn, schema),
+                *[
+                    column(f.name, feature_to_alchemy_types[f.feature_type])
+                    for f in features
+                ],
+                schema=schema,
+            )
+            selects.append(select(literal(pspace.name).label(_PROBLEM_COL), *src.c))
+
+        stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+        return stmt.subquery("federated")
+
+    def aggregate(
+        self,
+        group_by: list[str] | None = None,
+        outputs: list[str] | None = None,
+        aggs: list[str] | None = None,
+    ) -> StatusOr[DataFrame]:
+        """
+        One aggregation across all problem spaces:
+            - group_by: shared feature names (and/or "problem"), defaults to problem + shared solver_key features
+            - outputs: shared output_key feature names, defaults to all of them
+            - aggs: names from _FEDERATED_AGGS, defaults to count and mean
+        Result columns are the group columns and <output>__<agg>.
+        Problem spaces without an experiments.db yet are left out, with a note.
+        """
+        failure: Failure[DataFrame] = Failure(title="Federated aggregation")
+        shared_names = set(f.name for f in self.schema.all())
+
+        if group_by is None:
+            group_by = [_PROBLEM_COL] + [f.name for f in self.schema.solver_key]
+        if outputs is None:
+            outputs = [f.name for f in self.schema.output_key]
+        if aggs is None:
+            aggs = ["count", "mean"]
+
+        for name in group_by + outputs:
+            if name != _PROBLEM_COL and name not in shared_names:
+                failure.add_err(
+                    err=f"feature {name} is not shared (same name and type) by problems {', '.join(p.name for p in self.pspaces)}",
+                    file=__file__,
+                )
+        for agg in aggs:
+            if agg not in _FEDERATED_AGGS:
+                failure.add_err(err=f"unknown aggregation {agg}", file=__file__)
+        if len(self.pspaces) > _MAX_ATTACHED:
+            failure.add_err(
+                err=f"cannot federate more than {_MAX_ATTACHED} problem spaces in one query",
+                file=__file__,
+            )
+        if failure.has_errs:
+            return failure
+
+        # mode=ro does not create a missing database, attaching it would fail the whole query
+        attached = [p for p in self.pspaces if self.dbpath(p).exists()]
+        missing = [p.name for p in self.pspaces if not self.dbpath(p).exists()]
+        if len(attached) == 0:
+            failure.add_err(
+                err=f"no experiments database for problems {', '.join(missing)}",
+                file=__file__,
+            )
+            return failure
+
+        engine = memory_attach_engine()
+
+        with engine.connect() as conn:
+            for i, pspace in enumerate(attached):
+                uri = self.dbpath(pspace).resolve().as_uri() + "?mode=ro"
+                conn.exec_driver_sql(f"ATTACH DATABASE ? AS f{i}", (uri,))
+
+            fed = self._union(conn, attached)
+            cols = [fed.c[name] for name in group_by]
+            for name in outputs:
+                for agg in aggs:
+                    cols.append(
+                        _FEDERATED_AGGS[agg](fed.c[name]).label(f"{name}__{agg}")
+                    )
+
+            stmt = (
+                select(*cols)
+                .group_by(*[fed.c[name] for name in group_by])
+                .order_by(*[fed.c[name] for name in group_by])
+            )
+            res = conn.execute(stmt)
+            df = DataFrame.from_records(list(res), columns=list(res.keys()))
+
+        engine.dispose()
+        status: Success[DataFrame] = Success(value=df, title="Federated aggregation")
+        for name in missing:
+            status.add_note(
+                note=f"skipped problem {name}, it has no experiments database",
+                file=__file__,
+            )
+        return status
@@ -0,0 +1,137 @@
+from typing import Any
+
+from sqlalchemy import (
+    Connection,
+    MetaData,
+    Table,
+    Column,
+    Integer,
+    String,
+    TableClause,
+    select,
+    table,
+    column,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from optiface.core.optispace import ProblemSpace, Feature
+
+_DIM_TABLE_PREF = "dim_"
+_DIM_ID = "id"
+_DIM_VALUE = "value"
+_FETCH_CHUNK = 500
+
+# results with every encoded key feature decoded back to its string, what readers should query
+_RESULTS_VIEW_NAME = "results_view"
+
+
+def dim_table_name(feature_name: str) -> str:
+    return _DIM_TABLE_PREF + feature_name
+
+
+def encoded_features(pspace: ProblemSpace) -> list[Feature]:
+    """
+    Key features stored through a dimension table: the str features of instance_key and solver_key.
+    """
+    keys = list(pspace.instance_key.values()) + list(pspace.solver_key.values())
+    return [f for f in keys if f.feature_type is str]
+
+
+def init_dim_tables(pspace: ProblemSpace, metadata: MetaData) -> dict[str, Table]:
+    dims: dict[str, Table] = dict()
+    for f in encoded_features(pspace):
+        dims[f.name] = Table(
+            dim_table_name(f.name),
+            metadata,
+            Column(_DIM_ID, Integer, primary_key=True),
+            Column(_DIM_VALUE, String, nullable=False, unique=True),
+        )
+    return dims
+
+
+def results_view_select(results: Table, dims: dict[str, Table]):
+    cols = []
+    joined = results
+    for c in results.columns:
+        if c.name in dims:
+            dim = dims[c.name]
+            joined = joined.outerjoin(dim, c == dim.c[_DIM_ID])
+            cols.append(dim.c[_DIM_VALUE].label(c.name))
+        else:
+            cols.append(c)
+    return select(*cols).select_from(joined)
+
+
+def create_results_view(conn: Connection, results: Table, dims: dict[str, Table]):
+    """
+    (Re)create the decoding view, so plain sqlite readers never have to know about the dimension tables.
+    """
+    stmt = results_view_select(results, dims)
+    sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    conn.exec_driver_sql(f"DROP VIEW IF EXISTS {_RESULTS_VIEW_NAME}")
+    conn.exec_driver_sql(f"CREATE VIEW {_RESULTS_VIEW_NAME} AS {sql}")
+
+
+def results_view_clause(results: Table, dims: dict[str, Table]) -> TableClause:
+    """
+    Lightweight (non-metadata) table construct for querying the view with decoded column types.
+    """
+    cols = []
+    for c in results.columns:
+        col_type = String() if c.name in dims else c.type
+        cols.append(column(c.name, col_type))
+    return table(_RESULTS_VIEW_NAME, *cols)
+
+
+class KeyEncoder:
+    """
+    In-process encode cache: value -> surrogate id, per encoded feature.
+
+    Ids are never reused or deleted, so cached entries stay correct across writers; values the cache
+    has not seen are inserted (or found) in the dimension table within the caller's transaction.
+    Callers must reset() the cache if that transaction is rolled back.
+    """
+
+    def __init__(self, dims: dict[str, Table]):
+        self.dims: dict[str, Table] = dims
+        self.cache: dict[str, dict[str, int]] = {name: dict() for name in dims}
+
+    def reset(self) -> None:
+        self.cache = {name: dict() for name in self.dims}
+
+    def _fetch(self, conn: Connection, name: str, values: list[str]) -> None:
+        dim = self.dims[name]
+        conn.execute(
+            sqlite_insert(dim).on_conflict_do_nothing(index_elements=[_DIM_VALUE]),
+            [{_DIM_VALUE: v} for v in values],
+        )
+        # stay well under sqlite's bound parameter limit
+        for start in range(0, len(values), _FETCH_CHUNK):
+            chunk = values[start : start + _FETCH_CHUNK]
+            stmt = select(dim.c[_DIM_VALUE], dim.c[_DIM_ID]).where(
+                dim.c[_DIM_VALUE].in_(chunk)
+            )
+            self.cache[name].update({v: i for v, i in conn.execute(stmt)})
+
+    def encode_rows(
+        self, conn: Connection, rows: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Copies of rows with every encoded feature replaced by its surrogate id (rows are left untouched).
+        """
+        for name, cache in self.cache.items():
+            # first-seen order, so ids are handed out deterministically
+            unseen = dict.fromkeys(row[name] for row in rows if row[name] not in cache)
+            unseen.pop(None, None)
+            if len(unseen) > 0:
+                self._fetch(conn, name, list(unseen))
+
+        encoded: list[dict[str, Any]] = []
+        for row in rows:
+            enc = dict(row)
+            for name, cache in self.cache.items():
+                v = enc[name]
+                if v is not None:
+                    enc[name] = cache[v]
+            encoded.append(enc)
+        return encoded
@@ -0,0 +1,279 @@
+import hashlib
+import math
+
+import numpy as np
+
+from collections import Counter
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Iterable
+
+from sqlalchemy import Connection, MetaData, Table, Column, Integer, and_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from optiface.core.optispace import ProblemSpace, Feature
+from optiface.core.featuredata import _TRUE_STRS, _FALSE_STRS
+from optiface.core.resultframe import datetime_to_micros
+
+if TYPE_CHECKING:
+    from optiface.dbmanager.dbm import AlchemyWAPI
+    from optiface.dbmanager.plans import StatementPlan
+
+_MEMO_TABLE_NAME = "run_memo"
+_KEY_HASH = "key_hash"
+_MEMO_RUNS = "runs"
+
+# 64 bit keys: fit a sqlite INTEGER, and collisions stay negligible up to billions of distinct keys
+_KEY_HASH_BYTES = 8
+_KEY_SEP = "\x1f"
+
+_FETCH_CHUNK = 500
+_BLOOM_FP_RATE = 0.01
+
+# instance_key + solver_key values, by feature name
+RunKey = dict[str, Any]
+
+
+def memo_features(pspace: ProblemSpace) -> list[Feature]:
+    return list(pspace.instance_key.values()) + list(pspace.solver_key.values())
+
+
+def _canonical(value: Any, feature: Feature) -> str:
+    # the same key must hash the same whether it comes from a user, a csv (numpy scalars) or the database
+    if value is None:
+        return repr(None)
+    if feature.feature_type is datetime:
+        return repr(datetime_to_micros(value))
+    if feature.feature_type is bool and isinstance(value, str):
+        # bool("False") is True: text is parsed like job outputs are (see runner.localrunner.cast_output)
+        text = value.strip().lower()
+        if text in _TRUE_STRS:
+            return repr(True)
+        if text in _FALSE_STRS:
+            return repr(False)
+        # not a bool, it cannot match any stored key
+        return repr(value)
+    return repr(feature.feature_type(value))
+
+
+def key_hash(pspace: ProblemSpace, key: RunKey) -> int:
+    """
+    Signed 64 bit blake2b hash of the instance_key + solver_key values of key
+    (missing features take their default, as they would when the run is inserted).
+    """
+    parts = [_canonical(key.get(f.name, f.default), f) for f in memo_features(pspace)]
+    digest = hashlib.blake2b(
+        _KEY_SEP.join(parts).encode("utf-8"), digest_size=_KEY_HASH_BYTES
+    ).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def init_memo_table(metadata: MetaData) -> Table:
+    # the primary key is the unique index every membership check goes through
+    return Table(
+        _MEMO_TABLE_NAME,
+        metadata,
+        Column(_KEY_HASH, Integer, primary_key=True, autoincrement=False),
+        Column(_MEMO_RUNS, Integer, nullable=False),
+    )
+
+
+def memo_upsert_statement(table: Table):
+    stmt = sqlite_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[_KEY_HASH],
+        set_={_MEMO_RUNS: table.c[_MEMO_RUNS] + stmt.excluded[_MEMO_RUNS]},
+    )
+
+
+def upsert_memo(
+    conn: Connection,
+    table: Table,
+    pspace: ProblemSpace,
+    rows: list[dict[str, Any]],
+    plan: "StatementPlan | None" = None,
+) -> None:
+    """
+    Count a batch of (validated, decoded) rows into the memo table, on the caller's connection / transaction.
+    plan: the compiled memo_upsert_statement, if the caller keeps one (see plans).
+    """
+    counts = Counter(key_hash(pspace, row) for row in rows)
+    if len(counts) == 0:
+        return
+
+    records = [{_KEY_HASH: h, _MEMO_RUNS: n} for h, n in counts.items()]
+    if plan is not None:
+        plan.execute(conn, records)
+        return
+    conn.execute(memo_upsert_statement(table), records)
+
+
+def rebuild_memo(conn: Connection, results, memo: Table, pspace: ProblemSpace) -> None:
+    """
+    Recompute the memo table out of the (decoded) results, e.g. for databases created before memoization existed.
+    """
+    names = [f.name for f in memo_features(pspace)]
+    counts: Counter[int] = Counter()
+
+    res = conn.execution_options(stream_results=True).execute(
+        select(*[results.c[n] for n in names])
+    )
+    for r in res:
+        counts[key_hash(pspace, dict(zip(names, r)))] += 1
+
+    conn.execute(memo.delete())
+    if len(counts) > 0:
+        conn.execute(
+            memo.insert(),
+            [{_KEY_HASH: h, _MEMO_RUNS: n} for h, n in counts.items()],
+        )
+
+
+class BloomFilter:
+    """
+    Bloom filter over 64 bit key hashes, with k probes derived by double hashing from the two 32 bit halves.
+    No false negatives; a positive only means the key may be present.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = _BLOOM_FP_RATE):
+        capacity = max(capacity, 1)
+        self.nbits: int = max(
+            64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        )
+        self.k: int = max(1, round(self.nbits / capacity * math.log(2)))
+        self.bits: np.ndarray = np.zeros((self.nbits + 7) // 8, dtype=np.uint8)
+
+    def _probes(self, hashes: np.ndarray) -> np.ndarray:
+        h = hashes.astype(np.int64).view(np.uint64)
+        h1 = h & np.uint64(0xFFFFFFFF)
+        # odd step, so the k probes never collapse onto one bit
+        h2 = (h >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.k, dtype=np.uint64)[:, None]
+        return (h1 + i * h2) % np.uint64(self.nbits)
+
+    def add_many(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        probes = self._probes(hashes).ravel()
+        np.bitwise_or.at(
+            self.bits,
+            (probes >> np.uint64(3)).astype(np.int64),
+            (np.uint8(1) << (probes & np.uint64(7)).astype(np.uint8)),
+        )
+
+    def contains_many(self, hashes: np.ndarray) -> np.ndarray:
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=np.bool_)
+        probes = self._probes(hashes)
+        byte = self.bits[(probes >> np.uint64(3)).astype(np.int64)]
+        bit = (byte >> (probes & np.uint64(7)).astype(np.uint8)) & np.uint8(1)
+        return bit.astype(np.bool_).all(axis=0)
+
+
+class RunMemo:
+    """
+    Which (instance_key, solver_key) keys already have runs, so a sweep can skip them before sending work anywhere.
+
+    Keys are hashed (see key_hash) into the run_memo table, which AlchemyWAPI keeps in step with every insert.
+    At construction every stored hash is loaded into a BloomFilter: most keys of a new sweep are not done yet and
+    are answered in memory, only possible hits go to the run_memo primary key. The filter is a snapshot, call
+    refresh() to pick up runs inserted by other writers since.
+    """
+
+    def __init__(self, wapi: "AlchemyWAPI", fp_rate: float = _BLOOM_FP_RATE):
+        self.wapi: "AlchemyWAPI" = wapi
+        self.pspace: ProblemSpace = wapi.pspace
+        self.memo: Table = wapi.metadata.tables[_MEMO_TABLE_NAME]
+        self.fp_rate: float = fp_rate
+        self.refresh()
+
+    def refresh(self) -> None:
+        with self.wapi.engine.connect() as conn:
+            hashes = np.fromiter(
+                conn.execute(select(self.memo.c[_KEY_HASH])).scalars(),
+                dtype=np.int64,
+            )
+        self.bloom: BloomFilter = BloomFilter(len(hashes), self.fp_rate)
+        self.bloom.add_many(hashes)
+
+    def runs(self, key: RunKey) -> int:
+        h = key_hash(self.pspace, key)
+        if not self.bloom.contains_many(np.array([h], dtype=np.int64))[0]:
+            return 0
+        with self.wapi.engine.connect() as conn:
+            n = conn.execute(
+                select(self.memo.c[_MEMO_RUNS]).where(self.memo.c[_KEY_HASH] == h)
+            ).scalar()
+        return n or 0
+
+    def has_run(self, key: RunKey) -> bool:
+        return self.runs(key) > 0
+
+    def lookup(self, key: RunKey) -> list[dict[str, Any]]:
+        """
+        The stored runs of key (decoded rows of the results view), through the results key index.
+        Archived runs count as runs (see runs), but are not returned here, RunArchive.query reads them.
+        """
+        if not self.has_run(key):
+            return []
+        view = self.wapi.results_view
+        where = and_(
+            *[
+                view.c[f.name] == key.get(f.name, f.default)
+                for f in memo_features(self.pspace)
+            ]
+        )
+        with self.wapi.engine.connect() as conn:
+            return [dict(r) for r in conn.execute(select(view).where(where)).mappings()]
+
+    def done(self, keys: Iterable[RunKey]) -> list[bool]:
+        """
+        Bulk membership: one bool per key, True if it has at least one run.
+        """
+        hashes = np.array([key_hash(self.pspace, key) for key in keys], dtype=np.int64)
+        maybe = self.bloom.contains_many(hashes)
+        candidates = list(dict.fromkeys(hashes[maybe].tolist()))
+
+        present: set[int] = set()
+        with self.wapi.engine.connect() as conn:
+            for start in range(0, len(candidates), _FETCH_CHUNK):
+                stmt = select(self.memo.c[_KEY_HASH]).where(
+                    self.memo.c[_KEY_HASH].in_(candidates[start : start + _FETCH_CHUNK])
+                )
+                present.update(conn.execute(stmt).scalars())
+
+        return [h in present for h in hashes.tolist()]
+
+    def not_done(self, keys: Iterable[RunKey]) -> list[RunKey]:
+        keys = list(keys)
+        return [key for key, d in zip(keys, self.done(keys)) if not d]
+
+
+def main():
+    from optiface.core.optispace import read_pspace_from_yaml
+    from optiface.dbmanager.dbm import init_alchemy_api
+    import argparse
+    import sys
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(prog="optiface-memo")
+    parser.add_argument("problem", type=str)
+    parser.add_argument(
+        "keys",
+        type=str,
+        help="csv of instance_key / solver_key values, one run per row",
+    )
+    args = parser.parse_args()
+
+    res = init_alchemy_api(read_pspace_from_yaml(args.problem))
+    if res.is_err():
+        print(res.unwrap_err(), file=sys.stderr)
+        return
+
+    # rows of the csv that still have to run, for submit scripts to pipe on
+    df = pd.read_csv(args.keys)
+    done = RunMemo(res.unwrap()).done(df.to_dict("records"))
+    df[[not d for d in done]].to_csv(sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
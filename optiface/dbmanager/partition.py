@@ -0,0 +1,361 @@
+import os
+import re
+import sqlite3
+import stat
+import yaml
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from pandas import DataFrame
+from sqlalchemy import (
+    Engine,
+    MetaData,
+    TableClause,
+    create_engine,
+    column,
+    table,
+    literal,
+    select,
+    union_all,
+)
+
+from optiface.core.optierror import Status, StatusOr, Success, Failure
+from optiface.core.optispace import (
+    ProblemSpace,
+    Feature,
+    RowValidator,
+    row_err_message,
+    run_key_features,
+)
+from optiface.core.featuredata import _TIMESTAMP_ADDED
+from optiface.dbmanager.dbm import (
+    AlchemyWAPI,
+    AlchemyFactory,
+    EpochMicros,
+    feature_to_alchemy_types,
+)
+from optiface.dbmanager.keyencoding import _RESULTS_VIEW_NAME
+from optiface.dbmanager.sketch import (
+    FeatureSketch,
+    init_sketch_table,
+    merge_sketches,
+    read_merged_sketch,
+)
+from optiface.constants import _SPACE, _PARTITIONS, _PARTITIONING_FILE
+
+_BY_MONTH = "month"
+_MONTH_FORMAT = "%Y_%m"
+
+_BY = "by"
+_FROZEN = "frozen"
+
+# sqlite's default SQLITE_MAX_ATTACHED
+_MAX_ATTACHED = 10
+
+_PARTITION_COL = "partition"
+
+_UNSAFE_LABEL_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def partition_label_for_value(value: Any) -> str:
+    return _UNSAFE_LABEL_CHARS.sub("_", str(value))
+
+
+def month_label(dt: datetime) -> str:
+    return dt.strftime(_MONTH_FORMAT)
+
+
+def memory_attach_engine() -> Engine:
+    """
+    Engine over a private in-memory database, for ATTACHing other database files read-only.
+    """
+    # uri=True on the main connection is what lets ATTACH take file: URIs (read-only mode)
+    return create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(
+            "file::memory:", uri=True, check_same_thread=False
+        ),
+    )
+
+
+class PartitionedStore:
+    """
+    Optional partitioned layout of a problem space's results: one sqlite database (same schema as experiments.db)
+    per partition, under space/<problem>/partitions/.
+
+    Partitions are keyed either by month of timestamp_added (by="month"), so new writes only ever touch the current
+    month's file, or by the value of a str instance_key / solver_key feature (e.g. by="set_name").
+    Queries ATTACH only the partitions a filter can touch and UNION ALL their results views.
+    Frozen partitions are made read-only on disk and refuse new rows.
+
+    Note: run_id is only unique within a partition, query results carry the partition label alongside it.
+    """
+
+    def __init__(self, pspace: ProblemSpace, by: str | None = None):
+        self.pspace: ProblemSpace = pspace
+        self.dir: Path = Path(_SPACE) / pspace.name / _PARTITIONS
+        self.config_path: Path = self.dir / _PARTITIONING_FILE
+        self.writers: dict[str, AlchemyWAPI] = dict()
+
+        if self.config_path.exists():
+            with open(self.config_path, "r") as file:
+                config = yaml.safe_load(file)
+            if by is not None and by != config[_BY]:
+                raise RuntimeError(
+                    f"Problem {pspace.name} is already partitioned by {config[_BY]}, not {by}"
+                )
+            self.by: str = config[_BY]
+            self.frozen: list[str] = config[_FROZEN]
+            return
+
+        if by is None:
+            raise RuntimeError(
+                f"Problem {pspace.name} is not partitioned yet, a partitioning key is required"
+            )
+
+        key_features = list(pspace.instance_key.values()) + list(
+            pspace.solver_key.values()
+        )
+        if by != _BY_MONTH and by not in [
+            f.name for f in key_features if f.feature_type is str
+        ]:
+            raise RuntimeError(
+                f"Cannot partition problem {pspace.name} by {by}: must be {_BY_MONTH} or a str instance_key / solver_key feature"
+            )
+
+        self.by = by
+        self.frozen = []
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._write_config()
+
+    def _write_config(self) -> None:
+        with open(self.config_path, "w") as file:
+            yaml.safe_dump({_BY: self.by, _FROZEN: self.frozen}, file)
+
+    def partitions(self) -> list[str]:
+        return sorted(p.stem for p in self.dir.glob("*.db"))
+
+    def partition_path(self, label: str) -> Path:
+        return self.dir / f"{label}.db"
+
+    def partition_label(self, row: dict[str, Any]) -> str:
+        if self.by == _BY_MONTH:
+            return month_label(row[_TIMESTAMP_ADDED])
+        return partition_label_for_value(row[self.by])
+
+    def writer(self, label: str) -> StatusOr[AlchemyWAPI]:
+        if label in self.writers:
+            return Success(value=self.writers[label])
+
+        res = AlchemyFactory(
+            self.pspace, dbpath=self.partition_path(label)
+        ).check_and_init_db()
+        if res.is_ok():
+            self.writers[label] = res.unwrap()
+        return res
+
+    def insert_rows(self, df: DataFrame) -> Status:
+        """
+        Validate rows like AlchemyWAPI.insert_rows, then route each one to its partition (one transaction per partition).
+        A Failure, with nothing inserted, if any row belongs to a frozen partition.
+        """
+        status: Status = Success(title="Partitioned row insertion")
+        validator: RowValidator = self.pspace.row_validator
+        routed: dict[str, list[dict[str, Any]]] = dict()
+        # one run key timestamp for the whole batch
+        run_key: dict[str, Any] = dict()
+        self.pspace.add_run_key(run_key)
+
+        for _, csv_row in df.iterrows():
+            row = dict(csv_row)
+            errs, _ = validator(row)
+
+            if errs is not None:
+                status.add_note(
+                    note=f"Skipping non-valid row: {row}, with the following errors:",
+                    file=__file__,
+                )
+                for code, feature_name in errs:
+                    status.add_note(
+                        note=f"{code}: {row_err_message(code, feature_name, row)}",
+                        file=__file__,
+                    )
+                continue
+
+            row.update(run_key)
+            routed.setdefault(self.partition_label(row), []).append(row)
+
+        # frozen partitions are read-only: refuse the whole batch before writing any of it
+        frozen = [label for label in routed if label in self.frozen]
+        if len(frozen) > 0:
+            failure: Failure[None] = Failure(title="Partitioned row insertion")
+            for label in frozen:
+                failure.add_err(
+                    err=f"{len(routed[label])} rows for frozen partition {label}",
+                    file=__file__,
+                )
+            return failure
+
+        for label, rows in routed.items():
+            res = self.writer(label)
+            if res.is_err():
+                failure: Failure[None] = Failure(title="Partitioned row insertion")
+                for errs in res.unwrap_err().values():
+                    for e in errs:
+                        failure.add_err(err=f"partition {label}: {e}", file=__file__)
+                return failure
+
+            res.unwrap().insert_batch(rows)
+            status.add_note(
+                note=f"added {len(rows)} rows to partition {label} in problem {self.pspace.name}",
+                file=__file__,
+            )
+
+        return status
+
+    def freeze(self, label: str) -> Status:
+        if label not in self.partitions():
+            failure: Failure[None] = Failure(title="Partition freeze")
+            failure.add_err(err=f"unknown partition {label}", file=__file__)
+            return failure
+
+        if label in self.writers:
+            self.writers.pop(label).engine.dispose()
+
+        path = self.partition_path(label)
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        if label not in self.frozen:
+            self.frozen.append(label)
+            self._write_config()
+
+        return Success(title=f"Partition freeze, {label} is read-only")
+
+    def _features(self) -> list[Feature]:
+        return list(run_key_features().values()) + self.pspace.full_row()
+
+    def _view_clause(self, schema: str) -> TableClause:
+        # partitions are always created by AlchemyFactory, so timestamps are integers
+        cols = [
+            column(
+                f.name,
+                (
+                    EpochMicros()
+                    if f.name == _TIMESTAMP_ADDED
+                    else feature_to_alchemy_types[f.feature_type]
+                ),
+            )
+            for f in self._features()
+        ]
+        return table(_RESULTS_VIEW_NAME, *cols, schema=schema)
+
+    def touched_partitions(
+        self,
+        filters: dict[str, Any] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[str]:
+        """
+        Partitions that can hold rows matching the filters (the rest are never attached).
+        """
+        labels = self.partitions()
+
+        if self.by == _BY_MONTH:
+            if since is not None:
+                labels = [lb for lb in labels if lb >= month_label(since)]
+            if until is not None:
+                labels = [lb for lb in labels if lb <= month_label(until)]
+        elif filters is not None and self.by in filters:
+            values = filters[self.by]
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            wanted = set(partition_label_for_value(v) for v in values)
+            labels = [lb for lb in labels if lb in wanted]
+
+        return labels
+
+    def query(
+        self,
+        filters: dict[str, Any] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> DataFrame:
+        """
+        Union of the matching results rows across partitions, with a partition column.
+            - filters: feature name -> value, or list of accepted values
+            - since / until: inclusive timestamp_added bounds
+        """
+        labels = self.touched_partitions(filters, since, until)
+        columns = [_PARTITION_COL] + [f.name for f in self._features()]
+        records: list[tuple] = []
+
+        engine = memory_attach_engine()
+        # attach at most _MAX_ATTACHED partitions per statement
+        for start in range(0, len(labels), _MAX_ATTACHED):
+            group = labels[start : start + _MAX_ATTACHED]
+            with engine.connect() as conn:
+                for i, label in enumerate(group):
+                    uri = self.partition_path(label).resolve().as_uri() + "?mode=ro"
+                    conn.exec_driver_sql(f"ATTACH DATABASE ? AS p{i}", (uri,))
+
+                selects = [
+                    self._select(f"p{i}", label, filters, since, until)
+                    for i, label in enumerate(group)
+                ]
+                stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+                records.extend(tuple(r) for r in conn.execute(stmt))
+
+                conn.rollback()
+                for i in range(len(group)):
+                    conn.exec_driver_sql(f"DETACH DATABASE p{i}")
+
+        engine.dispose()
+        return DataFrame.from_records(records, columns=columns)
+
+    def sketch(
+        self, feature: str, filters: dict[str, Any] | None = None
+    ) -> FeatureSketch:
+        """
+        The sketches of feature for the groups matching filters, merged across the partitions they can be in.
+        """
+        labels = self.touched_partitions(filters)
+        parts: list[FeatureSketch] = []
+
+        engine = memory_attach_engine()
+        with engine.connect() as conn:
+            for label in labels:
+                uri = self.partition_path(label).resolve().as_uri() + "?mode=ro"
+                conn.exec_driver_sql("ATTACH DATABASE ? AS p", (uri,))
+                sketches = init_sketch_table(
+                    self.pspace, MetaData(schema="p"), feature_to_alchemy_types
+                )
+                parts.append(read_merged_sketch(conn, sketches, feature, filters))
+                conn.rollback()
+                conn.exec_driver_sql("DETACH DATABASE p")
+
+        engine.dispose()
+        return merge_sketches(parts)
+
+    def _select(
+        self,
+        schema: str,
+        label: str,
+        filters: dict[str, Any] | None,
+        since: datetime | None,
+        until: datetime | None,
+    ):
+        view = self._view_clause(schema)
+        stmt = select(literal(label).label(_PARTITION_COL), *view.c)
+
+        for name, value in (filters or dict()).items():
+            if isinstance(value, (list, tuple, set)):
+                stmt = stmt.where(view.c[name].in_(list(value)))
+            else:
+                stmt = stmt.where(view.c[name] == value)
+        if since is not None:
+            stmt = stmt.where(view.c[_TIMESTAMP_ADDED] >= since)
+        if until is not None:
+            stmt = stmt.where(view.c[_TIMESTAMP_ADDED] <= until)
+
+        return stmt
@@ -0,0 +1,270 @@
+import math
+
+from typing import Any, Iterator
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Integer,
+    MetaData,
+    Table,
+    and_,
+    exists,
+    func,
+    literal,
+    select,
+    true,
+)
+
+from optiface.core.optierror import StatusOr, Success, Failure
+from optiface.core.optispace import Feature, validate_allowed_types
+from optiface.dbmanager.dbm import (
+    AlchemyWAPI,
+    feature_to_alchemy_types,
+    _RESULTS_TABLE_NAME,
+)
+from optiface.dbmanager.keyencoding import _DIM_ID, _DIM_VALUE, _FETCH_CHUNK
+from optiface.dbmanager.archive import archived_run_counts
+
+_GRID_TABLE_PREF = "grid_"
+# grid column holding the value as the user declared it
+_GRID_VALUE = "v"
+# grid column holding what the results table stores for it (the value itself, or its surrogate id)
+_GRID_KEY = "k"
+# temporary table of the archived run counts per combination of grid values
+_ARCHIVED_TABLE = "archived_runs"
+
+_RUNS = "runs"
+_MISSING = "missing"
+
+# a surrogate id no dimension table hands out, for grid values that were never stored
+_NO_ID = -1
+
+_INSERT_CHUNK = 10_000
+
+# one combination of grid values, with its run count and how many repetitions are still missing
+PlannedRun = dict[str, Any]
+
+
+class RunPlanner:
+    """
+    Works out which combinations of a declared (instance_key x solver_key) grid have fewer than a number of runs.
+
+    Every grid dimension is loaded into a temporary table, and the cross product is anti-joined in sqlite against
+    the results table through its key index (ix_results_key), so no combination is ever materialized in python.
+    Archived runs (see archive) count as runs: their per-combination counts are loaded into one more temporary table.
+    Features of the problem space that are not in the grid are not constrained.
+    """
+
+    def __init__(self, wapi: AlchemyWAPI):
+        self.wapi: AlchemyWAPI = wapi
+        self.key_features: dict[str, Feature] = {
+            **wapi.pspace.instance_key,
+            **wapi.pspace.solver_key,
+        }
+
+    def check_grid(self, grid: dict[str, list[Any]]) -> Failure[Any]:
+        failure: Failure[Any] = Failure(title="Run planning")
+
+        for name, values in grid.items():
+            if name not in self.key_features:
+                failure.add_err(
+                    err=f"{name} is not an instance_key or solver_key feature of problem {self.wapi.pspace.name}",
+                    file=__file__,
+                )
+                continue
+            if len(values) == 0:
+                failure.add_err(err=f"grid has no values for {name}", file=__file__)
+            validate = validate_allowed_types[self.key_features[name].feature_type]
+            for v in values:
+                if not validate(v):
+                    failure.add_err(
+                        err=f"type not valid for feature {name}, value is: {v}",
+                        file=__file__,
+                    )
+
+        if len(grid) == 0:
+            failure.add_err(err="grid is empty", file=__file__)
+
+        return failure
+
+    def grid_size(self, grid: dict[str, list[Any]]) -> int:
+        return math.prod(len(set(values)) for values in grid.values())
+
+    def plan(
+        self, grid: dict[str, list[Any]], reps: int = 1, chunksize: int = 10_000
+    ) -> StatusOr[Iterator[list[PlannedRun]]]:
+        """
+        Stream the combinations with fewer than reps runs, chunksize at a time, as dicts of
+        grid feature values plus the number of runs found and missing.
+        """
+        failure = self.check_grid(grid)
+        if failure.has_errs:
+            return failure
+
+        return Success(
+            value=self._stream(grid, reps, chunksize),
+            title="Run planning",
+        )
+
+    def _stream(
+        self, grid: dict[str, list[Any]], reps: int, chunksize: int
+    ) -> Iterator[list[PlannedRun]]:
+        names = list(grid.keys())
+        metadata = MetaData()
+        grid_tables: dict[str, Table] = dict()
+
+        for name in names:
+            f = self.key_features[name]
+            key_type = Integer if name in self.wapi.dims else None
+            grid_tables[name] = Table(
+                _GRID_TABLE_PREF + name,
+                metadata,
+                Column(_GRID_VALUE, feature_to_alchemy_types[f.feature_type]),
+                Column(_GRID_KEY, key_type or feature_to_alchemy_types[f.feature_type]),
+                prefixes=["TEMPORARY"],
+            )
+
+        archived_counts = archived_run_counts(self.wapi.pspace, names)
+        archived: Table | None = None
+        if len(archived_counts) > 0:
+            archived = Table(
+                _ARCHIVED_TABLE,
+                metadata,
+                *[
+                    Column(
+                        n, feature_to_alchemy_types[self.key_features[n].feature_type]
+                    )
+                    for n in names
+                ],
+                Column(_RUNS, Integer),
+                prefixes=["TEMPORARY"],
+            )
+
+        with self.wapi.engine.connect() as conn:
+            try:
+                metadata.create_all(conn)
+                if archived is not None:
+                    records = [
+                        {**dict(zip(names, values)), _RUNS: n}
+                        for values, n in archived_counts.items()
+                    ]
+                    for start in range(0, len(records), _INSERT_CHUNK):
+                        conn.execute(
+                            archived.insert(), records[start : start + _INSERT_CHUNK]
+                        )
+                yield from self._anti_join(
+                    conn, grid, grid_tables, archived, reps, chunksize
+                )
+            finally:
+                # temporary tables live as long as the (pooled) connection
+                conn.rollback()
+                metadata.drop_all(conn)
+
+    def _anti_join(
+        self,
+        conn: Connection,
+        grid: dict[str, list[Any]],
+        grid_tables: dict[str, Table],
+        archived: Table | None,
+        reps: int,
+        chunksize: int,
+    ) -> Iterator[list[PlannedRun]]:
+        names = list(grid.keys())
+        results = self.wapi.metadata.tables[_RESULTS_TABLE_NAME]
+
+        for name in names:
+            records = self._grid_records(conn, name, grid[name])
+            for start in range(0, len(records), _INSERT_CHUNK):
+                conn.execute(
+                    grid_tables[name].insert(),
+                    records[start : start + _INSERT_CHUNK],
+                )
+
+        grid_cols = [grid_tables[n].c[_GRID_VALUE].label(n) for n in names]
+        key_order = list(self.key_features.keys())
+
+        # explicit cross product of the grid dimensions
+        product = grid_tables[names[0]]
+        for n in names[1:]:
+            product = product.join(grid_tables[n], true())
+
+        # archived runs of each combination, one row at most per combination
+        archived_runs = (
+            func.coalesce(
+                select(archived.c[_RUNS])
+                .where(*[archived.c[n] == grid_tables[n].c[_GRID_VALUE] for n in names])
+                .scalar_subquery(),
+                0,
+            )
+            if archived is not None
+            else None
+        )
+
+        if key_order[0] in grid:
+            # the grid pins the leading column of ix_results_key: probe the index once per combination
+            match = and_(*[results.c[n] == grid_tables[n].c[_GRID_KEY] for n in names])
+            if reps == 1:
+                # plain anti-join, a combination is missing iff it has no run at all
+                runs = literal(0)
+                where = ~exists().where(match)
+                if archived_runs is not None:
+                    where = and_(where, archived_runs == 0)
+            else:
+                runs = (
+                    select(func.count())
+                    .select_from(results)
+                    .where(match)
+                    .scalar_subquery()
+                )
+                if archived_runs is not None:
+                    runs = runs + archived_runs
+                where = runs < reps
+            stmt = (
+                select(*grid_cols, runs.label(_RUNS)).select_from(product).where(where)
+            )
+        else:
+            # index unusable: count the runs of every key in one grouped pass, then left join the grid onto it
+            keys = [results.c[n] for n in names]
+            counts = (
+                select(*keys, func.count().label(_RUNS))
+                .group_by(*keys)
+                .subquery("counts")
+            )
+            on = and_(*[counts.c[n] == grid_tables[n].c[_GRID_KEY] for n in names])
+            runs = func.coalesce(counts.c[_RUNS], 0)
+            if archived_runs is not None:
+                runs = runs + archived_runs
+            stmt = (
+                select(*grid_cols, runs.label(_RUNS))
+                .select_from(product.outerjoin(counts, on))
+                .where(runs < reps)
+            )
+
+        res = conn.execution_options(stream_results=True).execute(stmt)
+        for part in res.mappings().partitions(chunksize):
+            planned: list[PlannedRun] = []
+            for r in part:
+                run = dict(r)
+                run[_MISSING] = reps - run[_RUNS]
+                planned.append(run)
+            yield planned
+
+    def _grid_records(
+        self, conn: Connection, name: str, values: list[Any]
+    ) -> list[dict]:
+        # dict.fromkeys: drop duplicate grid values, keep declared order
+        values = list(dict.fromkeys(values))
+
+        if name not in self.wapi.dims:
+            return [{_GRID_VALUE: v, _GRID_KEY: v} for v in values]
+
+        dim = self.wapi.dims[name]
+        ids: dict[Any, int] = dict()
+        for start in range(0, len(values), _FETCH_CHUNK):
+            stmt = select(dim.c[_DIM_VALUE], dim.c[_DIM_ID]).where(
+                dim.c[_DIM_VALUE].in_(values[start : start + _FETCH_CHUNK])
+            )
+            ids.update({v: i for v, i in conn.execute(stmt)})
+
+        return [{_GRID_VALUE: v, _GRID_KEY: ids.get(v, _NO_ID)} for v in values]
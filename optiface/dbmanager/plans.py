@@ -0,0 +1,139 @@
+from operator import itemgetter
+from typing import Any, Callable, Hashable, Sequence
+
+from sqlalchemy import Connection, Dialect, Table, insert
+from sqlalchemy.sql import ClauseElement
+
+# (position in the parameter tuple, bind processor) for the parameters whose type converts them (e.g. EpochMicros)
+_Processors = list[tuple[int, Callable[[Any], Any]]]
+
+
+def _processors(types: Sequence[Any], dialect: Dialect) -> _Processors:
+    procs: _Processors = []
+    for i, t in enumerate(types):
+        p = t.bind_processor(dialect)
+        if p is not None:
+            procs.append((i, p))
+    return procs
+
+
+class StatementPlan:
+    """
+    A statement compiled once for a dialect: its driver-level sql, the order of its parameters and their bind
+    processors. Executing a plan hands the sql straight to the driver (executemany for several rows), skipping
+    SQLAlchemy's per-execution statement construction, cache key generation and compilation.
+
+    Rows come as dicts, their values are picked out in the plan's order (plan.names).
+    """
+
+    def __init__(self, stmt: ClauseElement, dialect: Dialect, names: list[str]):
+        compiled = stmt.compile(dialect=dialect, column_keys=names)
+        # qmark paramstyle: positiontup is the bind name of every ?, in order
+        self.names: list[str] = list(compiled.positiontup)
+        self.sql: str = str(compiled)
+        self.procs: _Processors = _processors(
+            [compiled.binds[name].type for name in self.names], dialect
+        )
+        self._get = itemgetter(*self.names)
+        self._single: bool = len(self.names) == 1
+
+    def bind(self, row: dict[str, Any]) -> tuple:
+        values = self._get(row)
+        return self.bind_tuple((values,) if self._single else values)
+
+    def bind_tuple(self, values: tuple) -> tuple:
+        if len(self.procs) == 0:
+            return values
+        values = list(values)
+        for i, p in self.procs:
+            values[i] = p(values[i])
+        return tuple(values)
+
+    def execute(self, conn: Connection, rows: list[dict[str, Any]]) -> None:
+        if len(rows) == 0:
+            return
+        conn.exec_driver_sql(self.sql, [self.bind(row) for row in rows])
+
+
+class SelectPlan:
+    """
+    A select compiled once, with its parameters bound positionally and its result columns converted by their
+    result processors (e.g. EpochMicros back to datetimes).
+    """
+
+    def __init__(self, stmt, dialect: Dialect):
+        compiled = stmt.compile(dialect=dialect)
+        self.names: list[str] = list(compiled.positiontup or [])
+        # values bound in the statement itself (e.g. a limit), used when not given
+        self.defaults: dict[str, Any] = compiled.params
+        self.sql: str = str(compiled)
+        self.procs: _Processors = _processors(
+            [compiled.binds[name].type for name in self.names], dialect
+        )
+        self.columns: list[str] = [c.name for c in stmt.selected_columns]
+        self.result_procs: _Processors = []
+        for i, c in enumerate(stmt.selected_columns):
+            p = c.type.result_processor(dialect, None)
+            if p is not None:
+                self.result_procs.append((i, p))
+
+    def _params(self, params: dict[str, Any]) -> tuple:
+        values = [params.get(name, self.defaults.get(name)) for name in self.names]
+        for i, p in self.procs:
+            values[i] = p(values[i])
+        return tuple(values)
+
+    def _row(self, row: tuple) -> tuple:
+        if len(self.result_procs) == 0:
+            return tuple(row)
+        row = list(row)
+        for i, p in self.result_procs:
+            row[i] = p(row[i])
+        return tuple(row)
+
+    def all(self, conn: Connection, **params: Any) -> list[tuple]:
+        res = conn.exec_driver_sql(self.sql, self._params(params))
+        return [self._row(r) for r in res]
+
+    def first(self, conn: Connection, **params: Any) -> tuple | None:
+        r = conn.exec_driver_sql(self.sql, self._params(params)).first()
+        return None if r is None else self._row(r)
+
+    def scalar(self, conn: Connection, **params: Any) -> Any:
+        r = self.first(conn, **params)
+        return None if r is None else r[0]
+
+
+class PlanCache:
+    """
+    The plans of one AlchemyWAPI, built on first use and kept for the lifetime of its engine.
+    Plans only depend on the table schemas, which are fixed by the problem space for that lifetime.
+    """
+
+    def __init__(self, dialect: Dialect):
+        self.dialect: Dialect = dialect
+        self.plans: dict[Hashable, StatementPlan | SelectPlan] = dict()
+
+    def statement(
+        self, key: Hashable, build: Callable[[], ClauseElement], names: list[str]
+    ) -> StatementPlan:
+        plan = self.plans.get(key)
+        if plan is None:
+            plan = StatementPlan(build(), self.dialect, names)
+            self.plans[key] = plan
+        return plan
+
+    def insert(self, table: Table, names: list[str]) -> StatementPlan:
+        """
+        INSERT INTO table (names...) VALUES (?, ...), parameters in names order.
+        """
+        return self.statement(
+            ("insert", table.name, tuple(names)), lambda: insert(table), names
+        )
+
+    def select(self, key: Hashable, build: Callable[[], Any]) -> SelectPlan:
+        plan = self.plans.get(key)
+        if plan is None:
+            plan = SelectPlan(build(), self.dialect)
+            self.plans[key] = plan
+        return plan
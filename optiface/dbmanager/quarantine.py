@@ -0,0 +1,150 @@
+import csv
+import json
+import math
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+_QUARANTINE_SUFFIX = ".quarantine"
+_JSONL = ".jsonl"
+_CSV = ".csv"
+_FORMATS = [_JSONL, _CSV]
+
+# bookkeeping fields of a quarantined row, next to its original values
+_LINE = "_line"
+_ERRORS = "_errors"
+_CODE = "code"
+_FEATURE = "feature"
+_ROW = "row"
+
+_FLUSH_ROWS = 1_000
+
+# a row that does not even parse (wrong number of fields) is quarantined with this code, as {RAW_TEXT: its text}
+PARSE_ERROR = "E_PARSE"
+RAW_TEXT = "_text"
+
+# the header is line 1 of a csv, data rows start at line 2 (rows with quoted newlines shift this)
+CSV_FIRST_LINE = 2
+
+
+def quarantine_path(source: Path, fmt: str = _JSONL) -> Path:
+    """
+    migrations/<problem>/data.csv -> migrations/<problem>/data.quarantine.jsonl
+    """
+    return source.with_name(f"{source.stem}{_QUARANTINE_SUFFIX}{fmt}")
+
+
+def is_quarantine(path: Path) -> bool:
+    return f"{_QUARANTINE_SUFFIX}." in path.name
+
+
+def _plain(value: Any) -> Any:
+    # json / csv friendly: nulls as None, numpy scalars as python values
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class QuarantineWriter:
+    """
+    Rejected rows, streamed to a JSONL (default) or CSV file as they are rejected, with their source line number and
+    error codes, so fixing and re-ingesting them never means re-reading the whole source.
+
+    At most flush_rows rows are buffered in memory, the file is only created once a row is rejected.
+        - JSONL: {"_line": 12, "_errors": [{"code": "E_TYPE", "feature": "objective"}], "row": {...}} per line
+        - CSV: the original columns, then _line and _errors ("E_TYPE:objective;E_MISSING:solver")
+    """
+
+    def __init__(self, path: Path, flush_rows: int = _FLUSH_ROWS):
+        if path.suffix not in _FORMATS:
+            raise ValueError(
+                f"Unknown quarantine format {path.suffix}, expected one of {', '.join(_FORMATS)}"
+            )
+        self.path: Path = path
+        self.flush_rows: int = flush_rows
+        self.n_rows: int = 0
+        self.buffer: list[tuple[int | None, dict[str, Any], list[tuple[str, str]]]] = []
+        self._file = None
+        self._csv: csv.DictWriter | None = None
+
+    def __enter__(self) -> "QuarantineWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(
+        self, line: int | None, row: dict[str, Any], errs: list[tuple[str, str]]
+    ) -> None:
+        self.buffer.append((line, row, errs))
+        self.n_rows += 1
+        if len(self.buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self.buffer) == 0:
+            return
+        if self._file is None:
+            # a fresh quarantine per ingest, a previous one is replaced
+            self._file = open(self.path, "w", newline="")
+
+        entries, self.buffer = self.buffer, []
+        if self.path.suffix == _JSONL:
+            for line, row, errs in entries:
+                record = {
+                    _LINE: line,
+                    _ERRORS: [{_CODE: c, _FEATURE: f} for c, f in errs],
+                    _ROW: {k: _plain(v) for k, v in row.items()},
+                }
+                self._file.write(json.dumps(record, default=str) + "\n")
+        else:
+            for line, row, errs in entries:
+                if self._csv is None:
+                    self._csv = csv.DictWriter(
+                        self._file,
+                        fieldnames=list(row.keys()) + [_LINE, _ERRORS],
+                        extrasaction="ignore",
+                    )
+                    self._csv.writeheader()
+                record = {k: _plain(v) for k, v in row.items()}
+                record[_LINE] = line
+                record[_ERRORS] = ";".join(f"{c}:{f}" for c, f in errs)
+                self._csv.writerow(record)
+        self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_quarantine(path: Path) -> pd.DataFrame:
+    """
+    The quarantined rows of a JSONL or CSV quarantine file as a DataFrame, with their _line and _errors
+    (drop those two columns before re-ingesting).
+    """
+    if path.suffix == _CSV:
+        return pd.read_csv(path)
+
+    records = []
+    with open(path, "r") as file:
+        for text in file:
+            entry = json.loads(text)
+            record = dict(entry[_ROW])
+            record[_LINE] = entry[_LINE]
+            record[_ERRORS] = ";".join(
+                f"{e[_CODE]}:{e[_FEATURE]}" for e in entry[_ERRORS]
+            )
+            records.append(record)
+    return pd.DataFrame.from_records(records)
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, TypeVar
+
+from pandas import DataFrame
+from sqlalchemy import Executable, func, select
+from sqlalchemy.sql import ColumnElement
+
+from optiface import metrics
+from optiface.core.resultframe import ResultFrame
+from optiface.core.featuredata import _RUN_ID
+from optiface.dbmanager.dbm import AlchemyWAPI, _RESULTS_TABLE_NAME
+from optiface.dbmanager.summary import _SUMMARY_TABLE_NAME, group_features
+
+V = TypeVar("V")
+
+_MAX_ENTRIES = 256
+_MAX_BYTES = 64 << 20
+
+_QUERY_CACHE_FILE = "query_cache.pkl"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(sql: str) -> str:
+    """
+    Whitespace-insensitive form of a sql string, so the same query written twice shares one cache entry.
+    """
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def statement_key(stmt: Executable) -> tuple[str, tuple]:
+    """
+    (normalized sql, sorted bound parameters) of a SQLAlchemy statement.
+    """
+    compiled = stmt.compile()
+    params = tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+    return normalize_query(str(compiled)), params
+
+
+def _size(value: Any) -> int:
+    if isinstance(value, DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, ResultFrame):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    LRU cache of query results in front of an AlchemyWAPI, bounded by entry count and (estimated) bytes.
+
+    Every lookup first checks whether the database changed, which is one cheap round trip on a connection the cache
+    keeps to itself:
+        - PRAGMA data_version: changes whenever any other connection (any process) commits to the database
+        - min / max run_id: rowid seeks, catching new runs (and archived old ones) independently of data_version
+    Any change drops every entry, results are never served stale.
+
+    With a path, entries are saved by save() (and close()) and reloaded only while the database still has the same
+    fingerprint: run_id range, results row count, and a hash of the summary table's contents.
+    Not thread-safe across processes, but safe to share between the threads of one.
+    """
+
+    def __init__(
+        self,
+        wapi: AlchemyWAPI,
+        max_entries: int = _MAX_ENTRIES,
+        max_bytes: int = _MAX_BYTES,
+        path: Path | None = None,
+    ):
+        self.wapi: AlchemyWAPI = wapi
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self.path: Path | None = path
+        self.entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.nbytes: int = 0
+        self._lock = threading.Lock()
+
+        results = wapi.metadata.tables[_RESULTS_TABLE_NAME]
+        self._range_sql: str = str(
+            select(func.min(results.c[_RUN_ID]), func.max(results.c[_RUN_ID])).compile(
+                wapi.engine
+            )
+        )
+        # a raw dbapi connection: data_version is per connection, it has to be the same one every time
+        self._conn = wapi.engine.raw_connection()
+        self._token: tuple = self._read_token()
+
+        summary = wapi.metadata.tables[_SUMMARY_TABLE_NAME]
+        self._count_sql: str = str(
+            select(func.count()).select_from(results).compile(wapi.engine)
+        )
+        self._summary_sql: str = str(
+            select(summary)
+            .order_by(*[summary.c[f.name] for f in group_features(wapi.pspace)])
+            .compile(wapi.engine)
+        )
+
+        self.m_hits = metrics.QUERY_CACHE.labels(
+            problem=wapi.pspace.name, outcome="hit"
+        )
+        self.m_misses = metrics.QUERY_CACHE.labels(
+            problem=wapi.pspace.name, outcome="miss"
+        )
+        self.m_invalidations = metrics.QUERY_CACHE.labels(
+            problem=wapi.pspace.name, outcome="invalidated"
+        )
+
+        if path is not None and path.exists():
+            self._load()
+
+    @staticmethod
+    def for_problem(wapi: AlchemyWAPI, **kwargs) -> "QueryCache":
+        """
+        Persistent cache next to the problem's database: space/<problem>/query_cache.pkl.
+        """
+        path = Path(wapi.engine.url.database).with_name(_QUERY_CACHE_FILE)
+        return QueryCache(wapi, path=path, **kwargs)
+
+    def _read_token(self) -> tuple:
+        cursor = self._conn.cursor()
+        try:
+            data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+            run_range = tuple(cursor.execute(self._range_sql).fetchone())
+        finally:
+            cursor.close()
+        return data_version, run_range
+
+    def _fingerprint(self) -> tuple:
+        # what persisted entries are checked against: unlike data_version, it means the same to every connection
+        cursor = self._conn.cursor()
+        try:
+            count = cursor.execute(self._count_sql).fetchone()[0]
+            digest = hashlib.sha256()
+            for row in cursor.execute(self._summary_sql):
+                digest.update(repr(tuple(row)).encode())
+        finally:
+            cursor.close()
+        return self._token[1], count, digest.hexdigest()
+
+    def _check(self) -> None:
+        token = self._read_token()
+        if token != self._token:
+            self._token = token
+            if len(self.entries) > 0:
+                self.m_invalidations.inc()
+            self.clear()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], V]) -> V:
+        """
+        The cached value of key if the database has not changed since it was computed, otherwise compute() it.
+        Cached values are shared: do not mutate them.
+        """
+        with self._lock:
+            self._check()
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.m_hits.inc()
+                return self.entries[key][0]
+            # the database state the value is computed from
+            token = self._token
+
+        self.m_misses.inc()
+        value = compute()
+        size = _size(value)
+
+        with self._lock:
+            # a write may have landed while computing, the value could then already be stale
+            self._check()
+            if token != self._token or size > self.max_bytes:
+                return value
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.nbytes += size
+            self._evict()
+        return value
+
+    def _evict(self) -> None:
+        # least recently used first
+        while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+
+    # cached versions of the AlchemyWAPI reads
+
+    def execute(self, stmt: Executable) -> DataFrame:
+        """
+        Any select, e.g. an aggregation over wapi.results_view, as a DataFrame.
+        """
+
+        def compute() -> DataFrame:
+            with self.wapi.engine.connect() as conn:
+                res = conn.execute(stmt)
+                return DataFrame.from_records(list(res), columns=list(res.keys()))
+
+        return self.get_or_compute(("execute", statement_key(stmt)), compute)
+
+    def query_frame(
+        self, whereclause: ColumnElement[bool] | None = None
+    ) -> ResultFrame:
+        stmt = select(self.wapi.results_view)
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+        return self.get_or_compute(
+            ("query_frame", statement_key(stmt)),
+            lambda: self.wapi.query_frame(whereclause),
+        )
+
+    def read_summary(self) -> DataFrame:
+        return self.get_or_compute(("read_summary",), self.wapi.read_summary)
+
+    def read_sketches(
+        self, quantiles: tuple[float, ...] = (0.5, 0.95, 0.99)
+    ) -> DataFrame:
+        return self.get_or_compute(
+            ("read_sketches", quantiles), lambda: self.wapi.read_sketches(quantiles)
+        )
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            self._check()
+            state = (self._fingerprint(), list(self.entries.items()))
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as file:
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as file:
+                fingerprint, entries = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        if fingerprint != self._fingerprint():
+            return
+        for key, (value, size) in entries:
+            self.entries[key] = (value, size)
+            self.nbytes += size
+        self._evict()
+
+    def close(self) -> None:
+        self.save()
+        self._conn.close()
@@ -0,0 +1,190 @@
+from pathlib import Path
+from typing import Callable, Iterator, TypeAlias
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: pip install optiface[parquet]
+    pq = None
+
+from optiface.core import optitrace
+from optiface.core.optispace import ProblemSpace
+from optiface.core.resultframe import ResultFrame
+from optiface.dbmanager.quarantine import CSV_FIRST_LINE, QuarantineWriter
+from optiface.dbmanager.arrowcsv import arrow_available, arrow_csv_frames, _BATCH_ROWS
+
+# (source line / row number of the batch's first row, the batch's rows restricted to problem space features)
+Batch: TypeAlias = tuple[int, pd.DataFrame]
+# path, the columns to keep (None: every column), batch rows
+Reader: TypeAlias = Callable[[Path, list[str] | None, int], Iterator[Batch]]
+
+_READERS: dict[str, Reader] = dict()
+
+# csv parsing engines for read_frames: Arrow when pyarrow is installed (auto), or pandas through the readers
+_ENGINE_AUTO = "auto"
+_ENGINE_ARROW = "arrow"
+_ENGINE_PANDAS = "pandas"
+ENGINES = [_ENGINE_AUTO, _ENGINE_ARROW, _ENGINE_PANDAS]
+_ARROW_CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+
+
+def register_reader(*suffixes: str) -> Callable[[Reader], Reader]:
+    """
+    Register a reader for file suffixes (".csv.gz", compound suffixes included). A reader streams the file in
+    batches of at most batch_rows rows, keeping only the given feature columns (every column for None), and never
+    writes to disk.
+    """
+
+    def register(reader: Reader) -> Reader:
+        for suffix in suffixes:
+            _READERS[suffix.lower()] = reader
+        return reader
+
+    return register
+
+
+def supported_suffixes() -> list[str]:
+    return sorted(_READERS)
+
+
+def reader_for(path: Path) -> Reader | None:
+    # longest match first, so data.csv.gz is gzip csv and not whatever .gz is
+    name = path.name.lower()
+    for suffix in sorted(_READERS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return _READERS[suffix]
+    return None
+
+
+def read_batches(
+    path: Path,
+    pspace: ProblemSpace,
+    batch_rows: int = _BATCH_ROWS,
+    all_columns: bool = False,
+) -> Iterator[Batch]:
+    """
+    Stream a migration file of any registered format as batches of problem space feature columns
+    (and of every other column too, with all_columns).
+    """
+    reader = reader_for(path)
+    if reader is None:
+        raise ValueError(
+            f"No reader for {path}, supported formats: {', '.join(supported_suffixes())}"
+        )
+
+    names = None if all_columns else [f.name for f in pspace.full_row()]
+    batches = reader(path, names, batch_rows)
+    while True:
+        with optitrace.span(optitrace.SPAN_CSV_PARSE, file=str(path)):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        yield batch
+
+
+def read_frames(
+    path: Path,
+    pspace: ProblemSpace,
+    batch_rows: int = _BATCH_ROWS,
+    engine: str = _ENGINE_AUTO,
+    quarantine: QuarantineWriter | None = None,
+) -> Iterator[tuple[int, ResultFrame]]:
+    """
+    Stream a migration file as typed ResultFrames (for insert_frame), with the source line of each frame's first row.
+    csv files go through the multithreaded Arrow engine (see arrowcsv), other formats and the pandas engine
+    through the registered readers. Rows that do not parse at all go to the quarantine with the Arrow engine
+    (see arrow_csv_frames), the readers raise on them.
+    """
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}"
+        )
+
+    is_csv = path.name.lower().endswith(_ARROW_CSV_SUFFIXES)
+    if engine == _ENGINE_ARROW or (
+        engine == _ENGINE_AUTO and is_csv and arrow_available()
+    ):
+        yield from arrow_csv_frames(path, pspace, batch_rows, quarantine=quarantine)
+        return
+
+    features = pspace.full_row()
+    # every column: the frames' source, what rejected rows are quarantined with
+    for line, df in read_batches(path, pspace, batch_rows, all_columns=True):
+        yield line, ResultFrame.from_dataframe(features, df, coerce=True)
+
+
+def _csv_batches(
+    path: Path, names: list[str] | None, batch_rows: int, compression: str | None
+) -> Iterator[Batch]:
+    # compression is streamed by pandas (gzip / zstandard file objects), nothing is decompressed to disk
+    chunks = pd.read_csv(
+        path,
+        usecols=None if names is None else lambda c: c in names,
+        chunksize=batch_rows,
+        compression=compression,
+    )
+    line = CSV_FIRST_LINE
+    with chunks:
+        for df in chunks:
+            yield line, df
+            line += len(df)
+
+
+@register_reader(".csv")
+def csv_reader(path: Path, names: list[str] | None, batch_rows: int) -> Iterator[Batch]:
+    return _csv_batches(path, names, batch_rows, None)
+
+
+@register_reader(".csv.gz")
+def csv_gz_reader(
+    path: Path, names: list[str] | None, batch_rows: int
+) -> Iterator[Batch]:
+    return _csv_batches(path, names, batch_rows, "gzip")
+
+
+@register_reader(".csv.zst")
+def csv_zst_reader(
+    path: Path, names: list[str] | None, batch_rows: int
+) -> Iterator[Batch]:
+    # pandas needs the optional zstandard package for this one
+    return _csv_batches(path, names, batch_rows, "zstd")
+
+
+@register_reader(".jsonl", ".ndjson", ".jsonl.gz")
+def jsonl_reader(
+    path: Path, names: list[str] | None, batch_rows: int
+) -> Iterator[Batch]:
+    # no dtype / date guessing, values are validated against the features as they are
+    chunks = pd.read_json(
+        path,
+        lines=True,
+        chunksize=batch_rows,
+        dtype=False,
+        convert_dates=False,
+        compression="infer",
+    )
+    line = 1
+    with chunks:
+        for df in chunks:
+            yield line, (
+                df if names is None else df[[c for c in df.columns if c in names]]
+            )
+            line += len(df)
+
+
+@register_reader(".parquet")
+def parquet_reader(
+    path: Path, names: list[str] | None, batch_rows: int
+) -> Iterator[Batch]:
+    if pq is None:
+        raise RuntimeError(
+            "Reading parquet needs the optional pyarrow dependency (pip install optiface[parquet])."
+        )
+    file = pq.ParquetFile(path)
+    columns = [c for c in file.schema_arrow.names if names is None or c in names]
+    # parquet has no lines, rows are numbered from 1
+    row = 1
+    for batch in file.iter_batches(batch_size=batch_rows, columns=columns):
+        yield row, batch.to_pandas()
+        row += batch.num_rows
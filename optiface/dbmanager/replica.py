@@ -0,0 +1,173 @@
+import sqlite3
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from sqlalchemy import Column, Connection, MetaData, Table, create_engine
+from sqlalchemy.pool import StaticPool
+
+from optiface.core.featuredata import _RUN_ID
+from optiface.core.resultframe import ResultFrame, datetime_to_micros
+from optiface.dbmanager.dbm import (
+    AlchemyWAPI,
+    feature_to_alchemy_types,
+    results_key_index,
+    results_timestamp_index,
+    _RESULTS_TABLE_NAME,
+)
+from optiface.dbmanager.summary import _SUMMARY_TABLE_NAME, init_summary_table
+from optiface.dbmanager.memo import _MEMO_TABLE_NAME, init_memo_table
+from optiface.dbmanager.sketch import _SKETCH_TABLE_NAME, init_sketch_table
+from optiface.dbmanager.keyencoding import _RESULTS_VIEW_NAME, create_results_view
+
+# schema name of the (read-only) source database, attached to the replica's connection
+_SOURCE = "src"
+
+
+def _cols(names: list[str]) -> str:
+    return ", ".join(f'"{n}"' for n in names)
+
+
+class MemoryReplica(AlchemyWAPI):
+    """
+    Read-only copy of a problem space's results, summary, run_memo and sketches tables in a private :memory: database,
+    serving the AlchemyWAPI query API (query_frame, runs_since, read_summary, ...) without touching the disk.
+
+    The source experiments.db stays ATTACHed read-only: the initial load and every refresh() are single
+    INSERT ... SELECT statements run inside sqlite. String keys are stored decoded (plain layout), and the
+    key and timestamp indexes are built after the bulk load.
+
+    refresh() pulls only runs with a run_id above the last one seen (plus the small summary / memo / sketches tables),
+    so runs deleted from the source (e.g. archived) stay in the replica until it is rebuilt.
+    """
+
+    def __init__(self, source: AlchemyWAPI):
+        self.source: AlchemyWAPI = source
+        # one connection for the replica's lifetime (StaticPool): a :memory: database lives and dies with its
+        # connection, uri=True is what lets ATTACH take the read-only file: URI
+        engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(
+                "file::memory:", uri=True, check_same_thread=False
+            ),
+            poolclass=StaticPool,
+        )
+
+        metadata = MetaData()
+        results = Table(
+            _RESULTS_TABLE_NAME,
+            metadata,
+            *[
+                Column(c.name, c.type, primary_key=c.name == _RUN_ID)
+                for c in source.results_view.c
+            ],
+        )
+        init_summary_table(source.pspace, metadata, feature_to_alchemy_types)
+        init_memo_table(metadata)
+        init_sketch_table(source.pspace, metadata, feature_to_alchemy_types)
+
+        with engine.begin() as conn:
+            metadata.create_all(conn)
+            create_results_view(conn, results, dict())
+            # attached last: unqualified names (e.g. in create_results_view) would resolve to the source too
+            uri = Path(source.engine.url.database).resolve().as_uri() + "?mode=ro"
+            conn.exec_driver_sql(f"ATTACH DATABASE ? AS {_SOURCE}", (uri,))
+
+        super().__init__(source.pspace, engine, metadata)
+        self.last_run_id: int = 0
+
+        with self.engine.begin() as conn:
+            self._pull(conn)
+            # indexes once the bulk of the rows is in, cheaper than maintaining them row by row
+            results_key_index(results, self.pspace).create(conn)
+            results_timestamp_index(results).create(conn)
+
+    def _pull(self, conn: Connection) -> int:
+        results = self.metadata.tables[_RESULTS_TABLE_NAME]
+        names = [c.name for c in results.c]
+        res = conn.exec_driver_sql(
+            f"INSERT INTO main.{_RESULTS_TABLE_NAME} ({_cols(names)}) "
+            f"SELECT {_cols(names)} FROM {_SOURCE}.{_RESULTS_VIEW_NAME} WHERE {_RUN_ID} > ?",
+            (self.last_run_id,),
+        )
+
+        for name in [_SUMMARY_TABLE_NAME, _MEMO_TABLE_NAME, _SKETCH_TABLE_NAME]:
+            cols = _cols([c.name for c in self.metadata.tables[name].c])
+            conn.exec_driver_sql(f"DELETE FROM main.{name}")
+            conn.exec_driver_sql(
+                f"INSERT INTO main.{name} ({cols}) SELECT {cols} FROM {_SOURCE}.{name}"
+            )
+
+        last = conn.exec_driver_sql(
+            f"SELECT max({_RUN_ID}) FROM main.{_RESULTS_TABLE_NAME}"
+        ).scalar()
+        self.last_run_id = last or 0
+        return res.rowcount
+
+    def refresh(self) -> int:
+        """
+        Pull the runs added to the source since the last load, returns how many.
+        """
+        with self.engine.begin() as conn:
+            return self._pull(conn)
+
+    # every insert path (insert_batch, insert_tuples, insert_frame, insert_rows) ends in write / _insert_chunk
+
+    def write(self, body: Callable[[Connection], None]) -> None:
+        raise RuntimeError(
+            f"MemoryReplica of problem {self.pspace.name} is read-only, insert into the source database."
+        )
+
+    def _insert_chunk(self, conn: Connection, rows: list[dict[str, Any]]) -> None:
+        self.write(lambda conn: None)
+
+
+class FrameCache:
+    """
+    The NumPy-backed alternative to MemoryReplica: every run of a problem space held as one ResultFrame,
+    filtered with vectorized masks, and refreshed by run_id like the replica.
+    """
+
+    def __init__(self, source: AlchemyWAPI):
+        self.source: AlchemyWAPI = source
+        self.frame: ResultFrame = source.query_frame()
+        self.last_run_id: int = self._max_run_id()
+
+    def _max_run_id(self) -> int:
+        if len(self.frame) == 0:
+            return 0
+        return int(self.frame[_RUN_ID].values.max())
+
+    def refresh(self) -> int:
+        new = self.source.query_frame(
+            self.source.results_view.c[_RUN_ID] > self.last_run_id
+        )
+        if len(new) > 0:
+            self.frame = ResultFrame.concat([self.frame, new])
+            self.last_run_id = self._max_run_id()
+        return len(new)
+
+    def select(self, filters: dict[str, Any] | None = None) -> ResultFrame:
+        """
+        Runs whose features equal the filter values (or are in the filter lists).
+        """
+        mask = np.ones(len(self.frame), dtype=np.bool_)
+        for name, value in (filters or dict()).items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            col = self.frame[name]
+
+            if col.dictionary is not None:
+                # compare codes, never the strings
+                codes = [i for i, s in enumerate(col.dictionary) if s in values]
+                hit = np.isin(col.values, codes)
+            elif col.feature.feature_type is datetime:
+                hit = np.isin(col.values, [datetime_to_micros(v) for v in values])
+            else:
+                hit = np.isin(col.values, list(values))
+
+            mask &= hit & col.valid_mask()
+
+        return self.frame.take(np.flatnonzero(mask))
@@ -0,0 +1,532 @@
+import math
+import struct
+
+import numpy as np
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterable
+
+from pandas import DataFrame
+from sqlalchemy import (
+    Connection,
+    Table,
+    Column,
+    Integer,
+    Float,
+    String,
+    LargeBinary,
+    Index,
+    MetaData,
+    bindparam,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from optiface.core.optispace import ProblemSpace, Feature
+from optiface.dbmanager.summary import group_features, stat_column_name
+
+if TYPE_CHECKING:
+    from optiface.dbmanager.plans import PlanCache
+
+_SKETCH_TABLE_NAME = "sketches"
+
+# one row per (instance_key + solver_key group, output_key feature): Welford moments in plain columns (queryable
+# in sql), the quantile sketch as a blob
+_FEATURE = "_feature"
+_COUNT = "_count"
+_MEAN = "_mean"
+_M2 = "_m2"
+_DIGEST = "_digest"
+
+_COMPRESSION = 100.0
+# points buffered before a digest compresses them into its centroids
+_BUFFER_FACTOR = 5
+_QUANTILES = (0.5, 0.95, 0.99)
+
+_FETCH_CHUNK = 300
+_REBUILD_CHUNK = 10_000
+
+# compression, min, max, number of centroids, then the centroid means and weights as little endian float64
+_DIGEST_HEADER = struct.Struct("<dddI")
+
+
+def sketch_features(pspace: ProblemSpace) -> list[Feature]:
+    """
+    The output_key features that are sketched: the numeric ones.
+    """
+    return [f for f in pspace.output_key.values() if f.feature_type in (int, float)]
+
+
+@dataclass
+class Welford:
+    """
+    Running count, mean and sum of squared deviations (m2), numerically stable where sum / sumsq cancel.
+    Merged with Chan et al.'s parallel update, so partial moments combine exactly in any order.
+    """
+
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add_many(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        self.merge(Welford(len(values), mean, float(((values - mean) ** 2).sum())))
+
+    def merge(self, other: "Welford") -> None:
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self) -> float:
+        # sample variance, like the summary table's std
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+def _k(q: float, compression: float) -> float:
+    # the t-digest k1 scale function: centroids are small near the tails, so extreme quantiles stay accurate
+    return compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+
+def _q_limit(k: float, compression: float) -> float:
+    # inverse of _k: the largest quantile a centroid starting at k may reach (its k-size is at most 1)
+    angle = min(max(k * 2 * math.pi / compression, -math.pi / 2), math.pi / 2)
+    return (math.sin(angle) + 1) / 2
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning): a sorted list of weighted centroids, at most ~compression of them, whatever the
+    number of values. Values are buffered and merged in sorted passes; two digests merge by merging their centroids.
+    """
+
+    def __init__(self, compression: float = _COMPRESSION):
+        self.compression: float = compression
+        self.means: np.ndarray = np.empty(0, dtype=np.float64)
+        self.weights: np.ndarray = np.empty(0, dtype=np.float64)
+        self.min: float = math.inf
+        self.max: float = -math.inf
+        self._buffer: list[np.ndarray] = []
+        self._buffered: int = 0
+
+    @property
+    def count(self) -> float:
+        self._flush()
+        return float(self.weights.sum())
+
+    def add_many(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        values = values.astype(np.float64)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self._buffered >= _BUFFER_FACTOR * self.compression:
+            self._flush()
+
+    def merge(self, other: "TDigest") -> None:
+        other._flush()
+        if len(other.means) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+
+    def _flush(self) -> None:
+        if self._buffered == 0:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))]),
+        )
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order].tolist(), weights[order].tolist()
+        total = sum(weights)
+
+        out_means: list[float] = []
+        out_weights: list[float] = []
+        cur_mean, cur_weight = means[0], weights[0]
+        # weight strictly left of the current centroid, and the most weight it may grow to (k-size at most 1)
+        left = 0.0
+        limit = _q_limit(_k(0.0, self.compression) + 1.0, self.compression) * total
+        for m, w in zip(means[1:], weights[1:]):
+            if left + cur_weight + w <= limit:
+                cur_weight += w
+                cur_mean += (m - cur_mean) * w / cur_weight
+                continue
+            out_means.append(cur_mean)
+            out_weights.append(cur_weight)
+            left += cur_weight
+            k_left = _k(left / total, self.compression)
+            limit = _q_limit(k_left + 1.0, self.compression) * total
+            cur_mean, cur_weight = m, w
+        out_means.append(cur_mean)
+        out_weights.append(cur_weight)
+
+        self.means = np.array(out_means, dtype=np.float64)
+        self.weights = np.array(out_weights, dtype=np.float64)
+
+    def quantile(self, q: float) -> float:
+        self._flush()
+        if len(self.means) == 0:
+            return math.nan
+        # each centroid's weight is centered on its mean, interpolated linearly in between (and out to min / max)
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[0.0], centers, [total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * total, xs, ys))
+
+    def to_bytes(self) -> bytes:
+        self._flush()
+        header = _DIGEST_HEADER.pack(
+            self.compression, self.min, self.max, len(self.means)
+        )
+        return (
+            header
+            + self.means.astype("<f8").tobytes()
+            + self.weights.astype("<f8").tobytes()
+        )
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "TDigest":
+        compression, lo, hi, k = _DIGEST_HEADER.unpack_from(data)
+        digest = TDigest(compression)
+        digest.min, digest.max = lo, hi
+        start = _DIGEST_HEADER.size
+        digest.means = np.frombuffer(data, dtype="<f8", count=k, offset=start).copy()
+        digest.weights = np.frombuffer(
+            data, dtype="<f8", count=k, offset=start + 8 * k
+        ).copy()
+        return digest
+
+
+@dataclass
+class FeatureSketch:
+    """
+    Mergeable sketch of one output feature over one group (or over any merge of groups, partitions, problem spaces):
+    exact count / mean / variance, approximate quantiles.
+    """
+
+    moments: Welford = field(default_factory=Welford)
+    digest: TDigest = field(default_factory=TDigest)
+
+    def add_many(self, values: Iterable[Any]) -> None:
+        xs = np.array([v for v in values if v is not None], dtype=np.float64)
+        xs = xs[~np.isnan(xs)]
+        self.moments.add_many(xs)
+        self.digest.add_many(xs)
+
+    def merge(self, other: "FeatureSketch") -> "FeatureSketch":
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.moments.n
+
+    @property
+    def mean(self) -> float:
+        return self.moments.mean if self.moments.n > 0 else math.nan
+
+    @property
+    def variance(self) -> float:
+        return self.moments.variance
+
+    @property
+    def std(self) -> float:
+        return self.moments.std
+
+    def quantile(self, q: float) -> float:
+        return self.digest.quantile(q)
+
+
+def merge_sketches(sketches: Iterable[FeatureSketch]) -> FeatureSketch:
+    """
+    One sketch out of many, e.g. the same feature across partitions or problem spaces.
+    """
+    merged = FeatureSketch()
+    for s in sketches:
+        merged.merge(s)
+    return merged
+
+
+def init_sketch_table(
+    pspace: ProblemSpace, metadata: MetaData, feature_to_alchemy_types: dict[type, type]
+) -> Table:
+    cols: list[Column] = [
+        Column(f.name, feature_to_alchemy_types[f.feature_type])
+        for f in group_features(pspace)
+    ]
+    table = Table(
+        _SKETCH_TABLE_NAME,
+        metadata,
+        *cols,
+        Column(_FEATURE, String, nullable=False),
+        Column(_COUNT, Integer, nullable=False),
+        Column(_MEAN, Float, nullable=False),
+        Column(_M2, Float, nullable=False),
+        Column(_DIGEST, LargeBinary, nullable=False),
+    )
+    # every read of one group's sketch, and the ON CONFLICT upsert, go through this index
+    Index(
+        f"ix_{_SKETCH_TABLE_NAME}_group",
+        *[table.c[f.name] for f in group_features(pspace)],
+        table.c[_FEATURE],
+        unique=True,
+    )
+    return table
+
+
+def _from_record(record: Any) -> FeatureSketch:
+    return FeatureSketch(
+        Welford(record[_COUNT], record[_MEAN], record[_M2]),
+        TDigest.from_bytes(record[_DIGEST]),
+    )
+
+
+def _to_record(
+    group_names: list[str], group: tuple, feature: str, sketch: FeatureSketch
+) -> dict[str, Any]:
+    record: dict[str, Any] = dict(zip(group_names, group))
+    record[_FEATURE] = feature
+    record[_COUNT] = sketch.moments.n
+    record[_MEAN] = sketch.moments.mean
+    record[_M2] = sketch.moments.m2
+    record[_DIGEST] = sketch.digest.to_bytes()
+    return record
+
+
+def sketch_rows(
+    pspace: ProblemSpace, rows: list[dict[str, Any]]
+) -> dict[tuple, dict[str, FeatureSketch]]:
+    """
+    Per group (instance_key + solver_key values) sketches of every numeric output_key feature of rows.
+    """
+    group_names = [f.name for f in group_features(pspace)]
+    values: dict[tuple, list[dict[str, Any]]] = dict()
+    for row in rows:
+        values.setdefault(tuple(row[n] for n in group_names), []).append(row)
+
+    sketches: dict[tuple, dict[str, FeatureSketch]] = dict()
+    for group, group_rows in values.items():
+        sketches[group] = dict()
+        for f in sketch_features(pspace):
+            sketch = FeatureSketch()
+            sketch.add_many(row[f.name] for row in group_rows)
+            sketches[group][f.name] = sketch
+    return sketches
+
+
+def sketch_upsert_statement(table: Table, pspace: ProblemSpace):
+    stmt = sqlite_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[f.name for f in group_features(pspace)] + [_FEATURE],
+        set_={c: stmt.excluded[c] for c in [_COUNT, _MEAN, _M2, _DIGEST]},
+    )
+
+
+def sketch_group_select(table: Table, pspace: ProblemSpace):
+    """
+    Every stored sketch of one group, the group values bound by feature name and matched with IS (NULL IS NULL).
+    """
+    return select(table).where(
+        *[
+            table.c[f.name].is_not_distinct_from(bindparam(f.name))
+            for f in group_features(pspace)
+        ]
+    )
+
+
+def upsert_sketches(
+    conn: Connection,
+    table: Table,
+    pspace: ProblemSpace,
+    rows: list[dict[str, Any]],
+    plans: "PlanCache | None" = None,
+) -> None:
+    """
+    Merge a batch of (validated, decoded) rows into the stored sketches, on the caller's connection / transaction.
+    A digest cannot be merged in sql, so the batch's groups are read, merged and written back: inside the write
+    transaction, no other writer can interleave.
+    plans: the caller's compiled statements, if it keeps them (see plans).
+    """
+    batch = sketch_rows(pspace, rows)
+    if len(batch) == 0 or len(sketch_features(pspace)) == 0:
+        return
+
+    group_names = [f.name for f in group_features(pspace)]
+    stored: list[Any] = []
+    if plans is not None:
+        fetch = plans.select(
+            ("sketch_group", table.name), lambda: sketch_group_select(table, pspace)
+        )
+        for group in batch:
+            for r in fetch.all(conn, **dict(zip(group_names, group))):
+                stored.append(dict(zip(fetch.columns, r)))
+    else:
+        groups = [g for g in batch if None not in g]
+        key = tuple_(*[table.c[n] for n in group_names])
+        for start in range(0, len(groups), _FETCH_CHUNK):
+            stmt = select(table).where(key.in_(groups[start : start + _FETCH_CHUNK]))
+            stored.extend(conn.execute(stmt).mappings())
+        # IN never matches a NULL
+        fetch_group = sketch_group_select(table, pspace)
+        for group in (g for g in batch if None in g):
+            res = conn.execute(fetch_group, dict(zip(group_names, group)))
+            stored.extend(res.mappings())
+
+    for r in stored:
+        group = tuple(r[n] for n in group_names)
+        if group in batch and r[_FEATURE] in batch[group]:
+            batch[group][r[_FEATURE]].merge(_from_record(r))
+
+    records = [
+        _to_record(group_names, group, name, sketch)
+        for group, sketches in batch.items()
+        if None not in group
+        for name, sketch in sketches.items()
+    ]
+
+    # the unique group index treats NULLs as distinct, a group with a NULL value would never conflict (and get a
+    # new row every batch): its merged sketches replace the stored ones, matched with IS
+    for group, sketches in batch.items():
+        if None not in group:
+            continue
+        for name, sketch in sketches.items():
+            conn.execute(
+                table.delete().where(
+                    *[
+                        table.c[n].is_not_distinct_from(v)
+                        for n, v in zip(group_names, group)
+                    ],
+                    table.c[_FEATURE] == name,
+                )
+            )
+            conn.execute(table.insert(), _to_record(group_names, group, name, sketch))
+
+    if len(records) == 0:
+        return
+    if plans is not None:
+        upsert = plans.statement(
+            ("sketch_upsert", table.name),
+            lambda: sketch_upsert_statement(table, pspace),
+            list(records[0].keys()),
+        )
+        upsert.execute(conn, records)
+        return
+    conn.execute(sketch_upsert_statement(table, pspace), records)
+
+
+def rebuild_sketches(
+    conn: Connection, results, table: Table, pspace: ProblemSpace
+) -> None:
+    """
+    Recompute the sketches out of the (decoded) results, e.g. for databases created before sketches existed.
+    """
+    group_names = [f.name for f in group_features(pspace)]
+    names = group_names + [f.name for f in sketch_features(pspace)]
+    sketches: dict[tuple, dict[str, FeatureSketch]] = dict()
+
+    res = conn.execution_options(stream_results=True).execute(
+        select(*[results.c[n] for n in names])
+    )
+    for part in res.mappings().partitions(_REBUILD_CHUNK):
+        for group, batch in sketch_rows(pspace, [dict(r) for r in part]).items():
+            stored = sketches.setdefault(group, dict())
+            for name, sketch in batch.items():
+                stored[name] = stored[name].merge(sketch) if name in stored else sketch
+
+    conn.execute(table.delete())
+    records = [
+        _to_record(group_names, group, name, sketch)
+        for group, by_name in sketches.items()
+        for name, sketch in by_name.items()
+    ]
+    if len(records) > 0:
+        conn.execute(table.insert(), records)
+
+
+def read_sketch(
+    conn: Connection,
+    table: Any,
+    pspace: ProblemSpace,
+    group: dict[str, Any],
+    feature: str,
+) -> FeatureSketch | None:
+    """
+    The stored sketch of one group's feature, a single unique index lookup (missing non-required group features
+    take their default, as they did when the runs were inserted).
+    """
+    stmt = select(table).where(table.c[_FEATURE] == feature)
+    for f in group_features(pspace):
+        stmt = stmt.where(
+            table.c[f.name].is_not_distinct_from(group.get(f.name, f.default))
+        )
+    r = conn.execute(stmt).mappings().first()
+    return None if r is None else _from_record(r)
+
+
+def read_merged_sketch(
+    conn: Connection,
+    table: Any,
+    feature: str,
+    filters: dict[str, Any] | None = None,
+) -> FeatureSketch:
+    """
+    The sketches of every group matching filters (group feature name -> value), merged into one:
+    e.g. {"solver": "MIP"} for one solver across all instances.
+    """
+    stmt = select(table).where(table.c[_FEATURE] == feature)
+    for name, value in (filters or dict()).items():
+        stmt = stmt.where(table.c[name] == value)
+    return merge_sketches(_from_record(r) for r in conn.execute(stmt).mappings())
+
+
+def sketches_to_frame(
+    conn: Connection,
+    table: Table,
+    pspace: ProblemSpace,
+    quantiles: tuple[float, ...] = _QUANTILES,
+) -> DataFrame:
+    """
+    One row per group, with count, mean, std and the requested quantiles (p50, p95, ...) of every sketched feature.
+    """
+    group_names = [f.name for f in group_features(pspace)]
+    by_group: dict[tuple, dict[str, Any]] = dict()
+    for r in conn.execute(select(table)).mappings():
+        group = tuple(r[n] for n in group_names)
+        record = by_group.setdefault(group, dict(zip(group_names, group)))
+        sketch = _from_record(r)
+        name = r[_FEATURE]
+        record[stat_column_name(name, "count")] = sketch.count
+        record[stat_column_name(name, "mean")] = sketch.mean
+        record[stat_column_name(name, "std")] = sketch.std
+        for q in quantiles:
+            record[stat_column_name(name, f"p{q * 100:g}")] = sketch.quantile(q)
+
+    columns = list(group_names)
+    for f in sketch_features(pspace):
+        columns.extend(stat_column_name(f.name, s) for s in ["count", "mean", "std"])
+        columns.extend(stat_column_name(f.name, f"p{q * 100:g}") for q in quantiles)
+    return DataFrame.from_records(list(by_group.values()), columns=columns)
@@ -0,0 +1,710 @@
+import argparse
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from pandas import DataFrame
+from sqlalchemy import func, select
+
+from optiface.core.optispace import ProblemSpace, Feature, read_pspace_from_yaml
+from optiface.core.optierror import StatusOr, Success, Failure
+from optiface.core.featuredata import _RUN_ID
+from optiface.dbmanager.dbm import (
+    AlchemyWAPI,
+    BatchWriter,
+    init_alchemy_api,
+    _RESULTS_TABLE_NAME,
+)
+from optiface.dbmanager.summary import (
+    _SUMMARY_TABLE_NAME,
+    _COUNT,
+    stat_column_name,
+    summary_features,
+)
+from optiface.dbmanager.sketch import TDigest
+from optiface.dbmanager.concurrency import WriteConcurrency
+from optiface.constants import _SPACE, check_make_dir
+
+_STRESS = "stress"
+# writer processes run this module (see main)
+_MODULE = "optiface.dbmanager.stress"
+
+# the csv migration cli, run as is by the migrator threads (absent from an installed package)
+_MIGRATECSV: Path = Path(__file__).resolve().parents[2] / "migratecsv.py"
+
+# int tags: writer * stride + sequence number
+_WRITER_STRIDE = 10**9
+# distinct values of each non-tag str feature, so the summary and sketch groups are shared between writers
+_VOCABULARY = 8
+
+# latency ops
+_INSERT_BATCH = "insert_batch"
+_INSERT_TUPLES = "insert_tuples"
+_MIGRATE = "migrate"
+_READ_COUNT = "read_count"
+_READ_LATEST = "read_latest"
+_READ_RECENT = "read_recent"
+_READ_SUMMARY = "read_summary"
+
+_QUANTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+@dataclass
+class StressConfig:
+    """
+    One stress run against a problem space's experiments.db, all on this machine:
+        - processes x threads writer threads, each with its own AlchemyWAPI, inserting batches of synthetic rows
+          (alternately through a BatchWriter and insert_tuples)
+        - migrators: threads running migratecsv.py over and over, each time on a freshly generated csv of
+          batches * batch_size rows (the cli migration path, in its own process)
+        - readers: threads querying the database for as long as anything writes
+    Every writer inserts `batches` batches, unless soak_s > 0: then every writer and migrator keeps going for soak_s
+    seconds.
+    """
+
+    processes: int = 2
+    threads: int = 2
+    migrators: int = 1
+    readers: int = 2
+    batch_size: int = 100
+    batches: int = 10
+    soak_s: float = 0.0
+    busy_timeout_ms: int = 5_000
+    writer_lock: bool = False
+    seed: int = 0
+
+    def concurrency(self) -> WriteConcurrency:
+        return WriteConcurrency(
+            busy_timeout_ms=self.busy_timeout_ms, writer_lock=self.writer_lock
+        )
+
+    def args(self) -> list[str]:
+        # the writer process command line (see main)
+        args = [
+            "--threads",
+            str(self.threads),
+            "--batch-size",
+            str(self.batch_size),
+            "--batches",
+            str(self.batches),
+            "--soak-s",
+            str(self.soak_s),
+            "--busy-timeout-ms",
+            str(self.busy_timeout_ms),
+            "--seed",
+            str(self.seed),
+        ]
+        if self.writer_lock:
+            args.append("--writer-lock")
+        return args
+
+
+def tag_feature(pspace: ProblemSpace) -> Feature | None:
+    """
+    The instance_key feature that identifies every synthetic row: the first str (or else int) one.
+    """
+    features = list(pspace.instance_key.values())
+    for feature_type in (str, int):
+        for f in features:
+            if f.feature_type is feature_type:
+                return f
+    return None
+
+
+def tag_value(tag: Feature, writer: int, seq: int) -> str | int:
+    if tag.feature_type is str:
+        return f"{_STRESS}-{writer}-{seq}"
+    return writer * _WRITER_STRIDE + seq
+
+
+def _synthetic_value(feature: Feature, rng: random.Random) -> Any:
+    if feature.feature_type is str:
+        return f"{feature.name}{rng.randrange(_VOCABULARY)}"
+    if feature.feature_type is int:
+        return rng.randrange(100)
+    if feature.feature_type is float:
+        return rng.uniform(0.0, 1000.0)
+    if feature.feature_type is bool:
+        return rng.random() < 0.5
+    return datetime.now(tz=timezone.utc)
+
+
+def synthetic_rows(
+    pspace: ProblemSpace,
+    tag: Feature,
+    writer: int,
+    start: int,
+    n: int,
+    rng: random.Random,
+) -> list[dict[str, Any]]:
+    """
+    n valid rows (every feature set, run key excluded), tagged writer / start ... start + n - 1.
+    """
+    features = pspace.full_row()
+    rows: list[dict[str, Any]] = []
+    for seq in range(start, start + n):
+        row = {f.name: _synthetic_value(f, rng) for f in features}
+        row[tag.name] = tag_value(tag, writer, seq)
+        rows.append(row)
+    return rows
+
+
+def _digest_to_str(digest: TDigest) -> str:
+    return base64.b64encode(digest.to_bytes()).decode()
+
+
+def _digest_from_str(data: str) -> TDigest:
+    return TDigest.from_bytes(base64.b64decode(data))
+
+
+@dataclass
+class WriterLog:
+    """
+    What one writer (thread or migrator) generated, by sequence number ranges (start, n):
+        - failed: batches whose insert raised, rolled back as a whole, so none of their rows may be stored
+        - uncertain: migrator runs that failed part way, any of their rows may be stored (at most once)
+    Every other generated row must be stored exactly once.
+    """
+
+    writer: int
+    op: str
+    generated: int = 0
+    failed: list[tuple[int, int]] = field(default_factory=list)
+    uncertain: list[tuple[int, int]] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    latency: TDigest = field(default_factory=TDigest)
+
+    def observe(self, start: float) -> None:
+        self.latency.add_many(np.array([(time.perf_counter() - start) * 1_000]))
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "writer": self.writer,
+            "op": self.op,
+            "generated": self.generated,
+            "failed": self.failed,
+            "uncertain": self.uncertain,
+            "errors": self.errors,
+            "latency": _digest_to_str(self.latency),
+        }
+
+    @staticmethod
+    def from_json(data: dict[str, Any]) -> "WriterLog":
+        return WriterLog(
+            writer=data["writer"],
+            op=data["op"],
+            generated=data["generated"],
+            failed=[tuple(r) for r in data["failed"]],
+            uncertain=[tuple(r) for r in data["uncertain"]],
+            errors=data["errors"],
+            latency=_digest_from_str(data["latency"]),
+        )
+
+
+@dataclass
+class StressReport:
+    """
+    The outcome of a run, over the rows it added (run_id past the largest one before it started):
+        - missing: rows a writer committed that are not stored
+        - duplicated: rows stored more than once
+        - unexpected: stored rows that no writer committed (e.g. from a batch that reported failure)
+        - summary_rows: rows added to the summary table's counts, which must match rows_found (None without
+          numeric output features, nothing is summarized)
+    errors are the writes that failed (e.g. still busy after every retry) and reader anomalies.
+    """
+
+    rows_expected: int
+    rows_found: int
+    missing: int
+    duplicated: int
+    unexpected: int
+    summary_rows: int | None
+    elapsed_s: float
+    errors: list[str]
+    latency: dict[str, TDigest]
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.missing == 0
+            and self.duplicated == 0
+            and self.unexpected == 0
+            and self.summary_rows in (None, self.rows_found)
+            and len(self.errors) == 0
+        )
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows_found / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def latency_frame(self) -> DataFrame:
+        """
+        Per op: number of calls, latency quantiles and max, in milliseconds.
+        """
+        records = []
+        for op, digest in sorted(self.latency.items()):
+            record: dict[str, Any] = {"op": op, "count": int(digest.count)}
+            for q in _QUANTILES:
+                record[f"p{int(q * 100)}_ms"] = digest.quantile(q)
+            record["max_ms"] = digest.max
+            records.append(record)
+        return DataFrame.from_records(records)
+
+
+def _harness_api(pspace: ProblemSpace, config: StressConfig) -> StatusOr[AlchemyWAPI]:
+    res = init_alchemy_api(pspace, concurrency=config.concurrency())
+    if res.is_ok():
+        # statement echo would be most of the measured latency
+        res.unwrap().engine.echo = False
+    return res
+
+
+def _keep_going(config: StressConfig, i: int, deadline: float, runs: int) -> bool:
+    # soak deadlines are per writer, from its own start (process startup is not part of the soak)
+    if config.soak_s > 0:
+        return time.time() < deadline
+    return i < runs
+
+
+def _write(pspace: ProblemSpace, config: StressConfig, writer: int) -> WriterLog:
+    """
+    One writer thread: even writers go through a BatchWriter (validated dict rows), odd ones through insert_tuples.
+    """
+    positional = writer % 2 == 1
+    log = WriterLog(writer, _INSERT_TUPLES if positional else _INSERT_BATCH)
+    res = _harness_api(pspace, config)
+    if not res.is_ok():
+        log.errors.append(f"writer {writer}: {res.unwrap_err()}")
+        return log
+    wapi = res.unwrap()
+    tag = tag_feature(pspace)
+    rng = random.Random(f"{config.seed}-{writer}")
+    batch_writer = BatchWriter(wapi, batch_size=config.batch_size)
+
+    deadline = time.time() + config.soak_s
+    i = 0
+    while _keep_going(config, i, deadline, config.batches):
+        rows = synthetic_rows(
+            pspace, tag, writer, log.generated, config.batch_size, rng
+        )
+        start = time.perf_counter()
+        try:
+            if positional:
+                wapi.insert_tuples([tuple(r[n] for n in wapi.row_names) for r in rows])
+            else:
+                for row in rows:
+                    batch_writer.add(row)
+                batch_writer.flush()
+            log.observe(start)
+        except Exception as e:
+            log.failed.append((log.generated, len(rows)))
+            log.errors.append(f"writer {writer}, batch {i}: {e!r}")
+            batch_writer.buffer = []
+        log.generated += len(rows)
+        i += 1
+
+    wapi.engine.dispose()
+    return log
+
+
+def _env() -> dict[str, str]:
+    # the child processes import this very optiface
+    root = str(Path(__file__).resolve().parents[2])
+    path = os.environ.get("PYTHONPATH")
+    return {
+        **os.environ,
+        "PYTHONPATH": root if path is None else os.pathsep.join([root, path]),
+    }
+
+
+def _last_error(stderr: bytes) -> str:
+    # the exception line of a traceback, not sqlalchemy's trailing "(Background on this error ...)"
+    lines = stderr.decode(errors="replace").strip().splitlines()
+    errors = [line for line in lines if "Error" in line] or lines
+    return errors[-1] if len(errors) > 0 else ""
+
+
+def _migrate(
+    pspace: ProblemSpace,
+    config: StressConfig,
+    writer: int,
+    workdir: Path,
+) -> WriterLog:
+    """
+    One migrator thread: a csv of batches * batch_size fresh rows per migratecsv.py run.
+    """
+    log = WriterLog(writer, _MIGRATE)
+    tag = tag_feature(pspace)
+    rng = random.Random(f"{config.seed}-{writer}")
+    n = config.batches * config.batch_size
+
+    deadline = time.time() + config.soak_s
+    i = 0
+    while _keep_going(config, i, deadline, 1):
+        path = workdir / f"migrator{writer}_{i}.csv"
+        DataFrame.from_records(
+            synthetic_rows(pspace, tag, writer, log.generated, n, rng)
+        ).to_csv(path, index=False)
+
+        args = [sys.executable, str(_MIGRATECSV), pspace.name, str(path)]
+        args += ["--batch-size", str(config.batch_size)]
+        args += ["--busy-timeout-ms", str(config.busy_timeout_ms)]
+        if config.writer_lock:
+            args.append("--writer-lock")
+        start = time.perf_counter()
+        proc = subprocess.run(
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=_env()
+        )
+        if proc.returncode == 0:
+            log.observe(start)
+        else:
+            # some of its batches may have committed before it failed
+            log.uncertain.append((log.generated, n))
+            log.errors.append(
+                f"migrator {writer}, run {i}: exit {proc.returncode}: {_last_error(proc.stderr)}"
+            )
+        path.unlink()
+        log.generated += n
+        i += 1
+
+    return log
+
+
+class _Reader(threading.Thread):
+    """
+    Queries the database in a loop until stopped, checking that the row count never goes back.
+    """
+
+    def __init__(self, pspace: ProblemSpace, config: StressConfig, n: int):
+        super().__init__(name=f"stress-reader-{n}", daemon=True)
+        self.pspace: ProblemSpace = pspace
+        self.config: StressConfig = config
+        self.stop: threading.Event = threading.Event()
+        self.latency: dict[str, TDigest] = dict()
+        self.errors: list[str] = []
+
+    def run(self) -> None:
+        res = _harness_api(self.pspace, self.config)
+        if not res.is_ok():
+            self.errors.append(f"{self.name}: {res.unwrap_err()}")
+            return
+        wapi = res.unwrap()
+        results = wapi.metadata.tables[_RESULTS_TABLE_NAME]
+
+        def count() -> int:
+            with wapi.engine.connect() as conn:
+                return conn.execute(select(func.count()).select_from(results)).scalar()
+
+        ops: list[tuple[str, Callable[[], Any]]] = [
+            (_READ_COUNT, count),
+            (_READ_LATEST, wapi.latest_timestamp),
+            (
+                _READ_RECENT,
+                lambda: wapi.runs_since(wapi.odtf.optinow() - timedelta(seconds=1)),
+            ),
+            (_READ_SUMMARY, wapi.read_summary),
+        ]
+        last_count = 0
+        while not self.stop.is_set():
+            for op, query in ops:
+                start = time.perf_counter()
+                try:
+                    value = query()
+                except Exception as e:
+                    self.errors.append(f"{self.name}, {op}: {e!r}")
+                    continue
+                elapsed_ms = (time.perf_counter() - start) * 1_000
+                self.latency.setdefault(op, TDigest()).add_many(np.array([elapsed_ms]))
+                if op == _READ_COUNT:
+                    if value < last_count:
+                        self.errors.append(
+                            f"{self.name}: row count went back from {last_count} to {value}"
+                        )
+                    last_count = value
+        wapi.engine.dispose()
+
+
+def _max_run_id(wapi: AlchemyWAPI) -> int:
+    results = wapi.metadata.tables[_RESULTS_TABLE_NAME]
+    with wapi.engine.connect() as conn:
+        return conn.execute(select(func.max(results.c[_RUN_ID]))).scalar() or 0
+
+
+def _summary_count(wapi: AlchemyWAPI) -> int | None:
+    # every synthetic row sets every output feature, any summarized feature's count counts every row
+    features = summary_features(wapi.pspace)
+    if len(features) == 0:
+        return None
+    name = stat_column_name(features[0].name, _COUNT)
+    summary = wapi.metadata.tables[_SUMMARY_TABLE_NAME]
+    with wapi.engine.connect() as conn:
+        return conn.execute(select(func.sum(summary.c[name]))).scalar() or 0
+
+
+def _stored_tags(wapi: AlchemyWAPI, tag: Feature, after: int) -> Counter:
+    view = wapi.results_view
+    stmt = (
+        select(view.c[tag.name], func.count())
+        .where(view.c[_RUN_ID] > after)
+        .group_by(view.c[tag.name])
+    )
+    with wapi.engine.connect() as conn:
+        return Counter({value: n for value, n in conn.execute(stmt)})
+
+
+def _ranges_tags(tag: Feature, writer: int, ranges: list[tuple[int, int]]) -> set:
+    return {
+        tag_value(tag, writer, seq)
+        for start, n in ranges
+        for seq in range(start, start + n)
+    }
+
+
+def _run_writer_processes(
+    pspace: ProblemSpace, config: StressConfig, workdir: Path
+) -> tuple[list[WriterLog], list[str]]:
+    procs = []
+    for p in range(config.processes):
+        out = workdir / f"writers{p}.json"
+        args = [sys.executable, "-m", _MODULE, pspace.name, *config.args()]
+        args += ["--worker-out", str(out), "--first-writer", str(p * config.threads)]
+        procs.append(
+            (
+                out,
+                subprocess.Popen(
+                    args,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    env=_env(),
+                ),
+            )
+        )
+
+    logs: list[WriterLog] = []
+    errors: list[str] = []
+    for p, (out, proc) in enumerate(procs):
+        _, stderr = proc.communicate()
+        if proc.returncode != 0 or not out.exists():
+            errors.append(
+                f"writer process {p}: exit {proc.returncode}: {_last_error(stderr)}"
+            )
+            continue
+        with open(out) as file:
+            logs.extend(WriterLog.from_json(data) for data in json.load(file))
+    return logs, errors
+
+
+def run_stress(
+    pspace: ProblemSpace, config: StressConfig, workdir: Path | None = None
+) -> StatusOr[StressReport]:
+    """
+    Run config's writers, migrators and readers at once against pspace's experiments.db (created if needed), then
+    check every row they added: see StressReport. Scratch files (writer logs, migration csvs) go to a fresh
+    space/<problem>/stress/run-<i> directory unless workdir is given.
+
+    A Failure is only for a run that could not start, a run with lost or duplicated rows is a Success whose
+    report is not ok (its notes say what went wrong).
+    """
+    failure: Failure[StressReport] = Failure(title="Stress run")
+    res = _harness_api(pspace, config)
+    if not res.is_ok():
+        failure.add_err(err=f"{res.unwrap_err()}", file=__file__)
+        return failure
+    wapi = res.unwrap()
+    tag = tag_feature(pspace)
+    if tag is None:
+        failure.add_err(
+            err="the problem space needs a str or int instance_key feature to tag synthetic rows with",
+            file=__file__,
+        )
+        return failure
+    if config.migrators > 0 and not _MIGRATECSV.is_file():
+        failure.add_err(
+            err=f"no {_MIGRATECSV.name} at {_MIGRATECSV}, run with 0 migrators",
+            file=__file__,
+        )
+        return failure
+
+    if workdir is None:
+        parent = Path(_SPACE) / pspace.name / _STRESS
+        parent.mkdir(parents=True, exist_ok=True)
+        workdir = check_make_dir(parent / "run", 0)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    baseline = _max_run_id(wapi)
+    summary_before = _summary_count(wapi)
+    writers = config.processes * config.threads
+
+    start = time.perf_counter()
+
+    readers = [_Reader(pspace, config, n) for n in range(config.readers)]
+    for reader in readers:
+        reader.start()
+
+    migrator_logs: list[WriterLog] = []
+    migrator_threads = [
+        threading.Thread(
+            target=lambda w=w: migrator_logs.append(
+                _migrate(pspace, config, w, workdir)
+            ),
+            name=f"stress-migrator-{w}",
+        )
+        for w in range(writers, writers + config.migrators)
+    ]
+    for thread in migrator_threads:
+        thread.start()
+
+    logs, errors = _run_writer_processes(pspace, config, workdir)
+    for thread in migrator_threads:
+        thread.join()
+    logs.extend(migrator_logs)
+    elapsed_s = time.perf_counter() - start
+
+    for reader in readers:
+        reader.stop.set()
+    for reader in readers:
+        reader.join()
+
+    latency: dict[str, TDigest] = dict()
+    for log in logs:
+        errors.extend(log.errors)
+        latency.setdefault(log.op, TDigest()).merge(log.latency)
+    for reader in readers:
+        errors.extend(reader.errors)
+        for op, digest in reader.latency.items():
+            latency.setdefault(op, TDigest()).merge(digest)
+
+    expected: set = set()
+    uncertain: set = set()
+    for log in logs:
+        excluded = _ranges_tags(tag, log.writer, log.failed + log.uncertain)
+        uncertain |= _ranges_tags(tag, log.writer, log.uncertain)
+        expected |= _ranges_tags(tag, log.writer, [(0, log.generated)]) - excluded
+
+    stored = _stored_tags(wapi, tag, baseline)
+    report = StressReport(
+        rows_expected=len(expected),
+        rows_found=sum(stored.values()),
+        missing=len(expected - stored.keys()),
+        duplicated=sum(n - 1 for n in stored.values() if n > 1),
+        unexpected=len(stored.keys() - expected - uncertain),
+        summary_rows=(
+            None if summary_before is None else _summary_count(wapi) - summary_before
+        ),
+        elapsed_s=elapsed_s,
+        errors=errors,
+        latency=latency,
+    )
+    wapi.engine.dispose()
+
+    success: Success[StressReport] = Success(value=report, title="Stress run")
+    success.add_note(
+        note=f"{report.rows_found} rows of {report.rows_expected} expected in {elapsed_s:.1f} s ({report.rows_per_s:.0f} rows/s), "
+        f"{writers} writer threads in {config.processes} processes, {config.migrators} migrators, {config.readers} readers",
+        file=__file__,
+    )
+    if report.missing > 0:
+        success.add_note(note=f"{report.missing} committed rows missing", file=__file__)
+    if report.duplicated > 0:
+        success.add_note(note=f"{report.duplicated} duplicated rows", file=__file__)
+    if report.unexpected > 0:
+        success.add_note(
+            note=f"{report.unexpected} rows stored from failed batches", file=__file__
+        )
+    if report.summary_rows not in (None, report.rows_found):
+        success.add_note(
+            note=f"summary counts {report.summary_rows} new rows, results {report.rows_found}",
+            file=__file__,
+        )
+    for err in errors:
+        success.add_note(note=err, file=__file__)
+    return success
+
+
+def _work(pspace: ProblemSpace, config: StressConfig, first: int, out: Path) -> None:
+    # a writer process: config.threads writer threads, their logs to out
+    logs: list[WriterLog] = []
+    threads = [
+        threading.Thread(
+            target=lambda w=w: logs.append(_write(pspace, config, w)),
+            name=f"stress-writer-{w}",
+        )
+        for w in range(first, first + config.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    tmp = out.with_name(f".{out.name}.tmp")
+    with open(tmp, "w") as file:
+        json.dump([log.to_json() for log in logs], file)
+    os.replace(tmp, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="OptiFace concurrent writer stress / soak test",
+    )
+    parser.add_argument("problem", type=str)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--migrators", type=int, default=1)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--batches", type=int, default=10)
+    # soak: keep every writer going for this many seconds instead of a fixed number of batches
+    parser.add_argument("--soak-s", type=float, default=0.0)
+    parser.add_argument("--busy-timeout-ms", type=int, default=5_000)
+    parser.add_argument("--writer-lock", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    # set by run_stress for its writer processes
+    parser.add_argument("--worker-out", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--first-writer", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    pspace = read_pspace_from_yaml(args.problem)
+    config = StressConfig(
+        processes=args.processes,
+        threads=args.threads,
+        migrators=args.migrators,
+        readers=args.readers,
+        batch_size=args.batch_size,
+        batches=args.batches,
+        soak_s=args.soak_s,
+        busy_timeout_ms=args.busy_timeout_ms,
+        writer_lock=args.writer_lock,
+        seed=args.seed,
+    )
+
+    if args.worker_out is not None:
+        _work(pspace, config, args.first_writer, Path(args.worker_out))
+        return
+
+    res = run_stress(pspace, config)
+    if not res.is_ok():
+        print(res.unwrap_err())
+        sys.exit(1)
+    report = res.unwrap()
+    print(res.unwrap_notes())
+    print(report.latency_frame().to_string(index=False))
+    print("OK" if report.ok else "FAILED")
+    if not report.ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import math
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from pandas import DataFrame
+from sqlalchemy import (
+    Connection,
+    Table,
+    Column,
+    Integer,
+    Float,
+    Index,
+    MetaData,
+    bindparam,
+    func,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from optiface.core.optispace import ProblemSpace, Feature
+
+if TYPE_CHECKING:
+    from optiface.dbmanager.plans import StatementPlan
+
+_SUMMARY_TABLE_NAME = "summary"
+
+# per numeric output_key feature, the summary table holds one column per statistic, named <feature>__<stat>
+_COUNT = "count"
+_SUM = "sum"
+_SUMSQ = "sumsq"
+_MIN = "min"
+_MAX = "max"
+_SUMLOG = "sumlog"
+# logs are only taken over strictly positive values, so the geometric mean needs its own count
+_LOGCOUNT = "logcount"
+
+_SUMMARY_STATS: list[str] = [_COUNT, _SUM, _SUMSQ, _MIN, _MAX, _SUMLOG, _LOGCOUNT]
+
+_SEP = "__"
+
+# bind parameter prefix in summary_update_statement, plain column names are reserved for its SET clause
+_BIND = "b_"
+
+
+def stat_column_name(feature_name: str, stat: str) -> str:
+    return feature_name + _SEP + stat
+
+
+def group_features(pspace: ProblemSpace) -> list[Feature]:
+    """
+    The summary group key: instance_key + solver_key features, in problem space order.
+    """
+    return list(pspace.instance_key.values()) + list(pspace.solver_key.values())
+
+
+def summary_features(pspace: ProblemSpace) -> list[Feature]:
+    """
+    The output_key features that are summarized: the numeric ones (str, bool, datetime outputs have no sum / log).
+    """
+    return [f for f in pspace.output_key.values() if f.feature_type in (int, float)]
+
+
+def summary_columns(
+    pspace: ProblemSpace, feature_to_alchemy_types: dict[type, type]
+) -> list[Column]:
+    cols: list[Column] = []
+
+    for f in group_features(pspace):
+        cols.append(Column(f.name, feature_to_alchemy_types[f.feature_type]))
+
+    for f in summary_features(pspace):
+        for stat in _SUMMARY_STATS:
+            stat_type = Integer if stat in (_COUNT, _LOGCOUNT) else Float
+            cols.append(Column(stat_column_name(f.name, stat), stat_type))
+
+    return cols
+
+
+def summary_column_names(pspace: ProblemSpace) -> list[str]:
+    names: list[str] = [f.name for f in group_features(pspace)]
+    for f in summary_features(pspace):
+        names.extend(stat_column_name(f.name, stat) for stat in _SUMMARY_STATS)
+    return names
+
+
+def summary_in_sync(column_names: list[str], pspace: ProblemSpace) -> bool:
+    """
+    Whether a stored summary table (its column names) matches the problem space. Compared by name: a problem space
+    read back from yaml lists its features in another order than the one it was created with, and that alone must
+    not rebuild (drop) the summary under concurrent writers.
+    """
+    return sorted(column_names) == sorted(summary_column_names(pspace))
+
+
+def init_summary_table(
+    pspace: ProblemSpace, metadata: MetaData, feature_to_alchemy_types: dict[type, type]
+) -> Table:
+    table = Table(
+        _SUMMARY_TABLE_NAME,
+        metadata,
+        *summary_columns(pspace, feature_to_alchemy_types),
+    )
+    # the unique group index is what makes the ON CONFLICT upsert possible
+    Index(
+        f"ix_{_SUMMARY_TABLE_NAME}_group",
+        *[table.c[f.name] for f in group_features(pspace)],
+        unique=True,
+    )
+    return table
+
+
+class SummaryAccumulator:
+    """
+    Folds rows into per-group (instance_key + solver_key) running statistics for every numeric output_key feature.
+    Missing values (None, NaN) are not counted.
+
+    Statistics are chosen to be mergeable by addition (count, sum, sumsq, sumlog, logcount) or by min / max,
+    so a batch accumulator can be upserted on top of the stored summary without rereading any runs.
+    """
+
+    def __init__(self, pspace: ProblemSpace):
+        self.group_names: list[str] = [f.name for f in group_features(pspace)]
+        self.output_names: list[str] = [f.name for f in summary_features(pspace)]
+        self.groups: dict[tuple, dict[str, list[Any]]] = dict()
+
+    def add_row(self, row: dict[str, Any]) -> None:
+        group = tuple(row[name] for name in self.group_names)
+
+        if group not in self.groups:
+            self.groups[group] = {
+                name: [0, 0.0, 0.0, None, None, 0.0, 0] for name in self.output_names
+            }
+
+        stats = self.groups[group]
+
+        for name in self.output_names:
+            x = row[name]
+            if x is None or (isinstance(x, float) and math.isnan(x)):
+                continue
+
+            s = stats[name]
+            s[0] += 1
+            s[1] += x
+            s[2] += x * x
+            s[3] = x if s[3] is None else min(s[3], x)
+            s[4] = x if s[4] is None else max(s[4], x)
+            if x > 0:
+                s[5] += math.log(x)
+                s[6] += 1
+
+    def add_rows(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            self.add_row(row)
+
+    def to_records(self) -> list[dict[str, Any]]:
+        records: list[dict[str, Any]] = []
+
+        for group, stats in self.groups.items():
+            record: dict[str, Any] = dict(zip(self.group_names, group))
+            for name, s in stats.items():
+                for stat, value in zip(_SUMMARY_STATS, s):
+                    record[stat_column_name(name, stat)] = value
+            records.append(record)
+
+        return records
+
+
+def _merged_stats(
+    table: Table, pspace: ProblemSpace, new: Callable[[str], Any]
+) -> dict[str, Any]:
+    # stat column -> the stored value merged with new(column), the record's value
+    set_: dict[str, Any] = dict()
+
+    for name in (f.name for f in summary_features(pspace)):
+        for stat in _SUMMARY_STATS:
+            col = stat_column_name(name, stat)
+            old, value = table.c[col], new(col)
+            if stat == _MIN:
+                set_[col] = func.min(
+                    func.coalesce(old, value), func.coalesce(value, old)
+                )
+            elif stat == _MAX:
+                set_[col] = func.max(
+                    func.coalesce(old, value), func.coalesce(value, old)
+                )
+            else:
+                set_[col] = old + value
+
+    return set_
+
+
+def summary_upsert_statement(table: Table, pspace: ProblemSpace):
+    """
+    INSERT ... ON CONFLICT (group) DO UPDATE, merging a record's statistics into the stored ones.
+    """
+    stmt = sqlite_insert(table)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[f.name for f in group_features(pspace)],
+        set_=_merged_stats(table, pspace, lambda col: excluded[col]),
+    )
+
+
+def summary_update_statement(table: Table, pspace: ProblemSpace):
+    """
+    UPDATE merging a record's statistics into its group's stored ones, the group matched with IS (NULL IS NULL).
+    Parameters: every record column as b_<column>.
+    """
+    set_ = _merged_stats(table, pspace, lambda col: bindparam(_BIND + col))
+    return (
+        table.update()
+        .where(
+            *[
+                table.c[f.name].is_not_distinct_from(bindparam(_BIND + f.name))
+                for f in group_features(pspace)
+            ]
+        )
+        .values(set_)
+    )
+
+
+def upsert_summary(
+    conn: Connection,
+    table: Table,
+    pspace: ProblemSpace,
+    rows: list[dict[str, Any]],
+    plan: "StatementPlan | None" = None,
+) -> None:
+    """
+    Merge a batch of (validated) rows into the summary table, on the caller's connection / transaction.
+    plan: the compiled summary_upsert_statement, if the caller keeps one (see plans).
+    """
+    acc = SummaryAccumulator(pspace)
+    acc.add_rows(rows)
+    records = acc.to_records()
+
+    # the unique group index treats NULLs as distinct, a group with a NULL value would never conflict (and get a
+    # new row every batch): those groups are updated in place, matched with IS, and inserted only if new
+    keyed: list[dict[str, Any]] = []
+    null_groups: list[dict[str, Any]] = []
+    for r in records:
+        if any(r[n] is None for n in acc.group_names):
+            null_groups.append(r)
+        else:
+            keyed.append(r)
+    records = keyed
+
+    if len(null_groups) > 0:
+        update = summary_update_statement(table, pspace)
+        for record in null_groups:
+            params = {_BIND + c: v for c, v in record.items()}
+            if conn.execute(update, params).rowcount == 0:
+                conn.execute(table.insert(), record)
+
+    if len(records) == 0:
+        return
+
+    if plan is not None:
+        plan.execute(conn, records)
+        return
+    conn.execute(summary_upsert_statement(table, pspace), records)
+
+
+def rebuild_summary(
+    conn: Connection, results: Table, summary: Table, pspace: ProblemSpace
+) -> None:
+    """
+    Recompute the summary table from scratch out of the results table (e.g. for databases created before summaries existed).
+    """
+    acc = SummaryAccumulator(pspace)
+    names = acc.group_names + acc.output_names
+
+    stmt = select(*[results.c[n] for n in names])
+    for r in conn.execute(stmt):
+        acc.add_row(dict(zip(names, r)))
+
+    conn.execute(summary.delete())
+    records = acc.to_records()
+    if len(records) > 0:
+        conn.execute(summary.insert(), records)
+
+
+def summary_to_frame(records: list[dict[str, Any]], pspace: ProblemSpace) -> DataFrame:
+    """
+    Summary rows as a DataFrame, with mean, std and (positive values) geometric mean derived per numeric
+    output_key feature.
+    """
+    df = DataFrame.from_records(records, columns=summary_column_names(pspace))
+
+    for name in (f.name for f in summary_features(pspace)):
+        n = df[stat_column_name(name, _COUNT)]
+        s = df[stat_column_name(name, _SUM)]
+        ss = df[stat_column_name(name, _SUMSQ)]
+        mean = s / n
+        df[stat_column_name(name, "mean")] = mean
+        # sample variance from the raw moments
+        var = (ss - n * mean * mean) / (n - 1)
+        df[stat_column_name(name, "std")] = var.clip(lower=0.0) ** 0.5
+        df[stat_column_name(name, "geomean")] = (
+            df[stat_column_name(name, _SUMLOG)] / df[stat_column_name(name, _LOGCOUNT)]
+        ).map(math.exp, na_action="ignore")
+
+    return df
@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+
+# latency buckets (seconds), from sub-millisecond batches to multi-second queries
+_DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_LOCALHOST = "127.0.0.1"
+_DEFAULT_PORT = 9464
+
+_PROBLEM = "problem"
+
+
+class _Shards:
+    """
+    One cell per thread: a thread only ever writes its own cell, so updates need no lock.
+    Readers sum every cell (and may see a concurrent update or not, which is fine for monitoring).
+    """
+
+    def __init__(self, make: Callable[[], list]):
+        self._make = make
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.cells: list[list] = []
+
+    def get(self) -> list:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._make()
+            # only taken once per thread
+            with self._lock:
+                self.cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+
+class CounterChild:
+    def __init__(self):
+        self._shards = _Shards(lambda: [0])
+
+    def inc(self, n: int | float = 1) -> None:
+        self._shards.get()[0] += n
+
+    def value(self) -> int | float:
+        return sum(c[0] for c in self._shards.cells)
+
+
+class HistogramChild:
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds: tuple[float, ...] = bounds
+        # per bucket counts (the last one is +Inf), then the sum of observations
+        self._shards = _Shards(lambda: [0] * (len(bounds) + 1) + [0.0])
+
+    def observe(self, value: float) -> None:
+        cell = self._shards.get()
+        cell[bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> tuple[list[int], float]:
+        """
+        Cumulative bucket counts (prometheus le semantics, last is +Inf) and the sum.
+        """
+        counts = [0] * (len(self.bounds) + 1)
+        total = 0.0
+        for cell in self._shards.cells:
+            for i in range(len(counts)):
+                counts[i] += cell[i]
+            total += cell[-1]
+        for i in range(1, len(counts)):
+            counts[i] += counts[i - 1]
+        return counts, total
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: int | float) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+class _Metric:
+    _TYPE = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...]):
+        self.name: str = name
+        self.help: str = help
+        self.labelnames: tuple[str, ...] = labelnames
+        self._children: dict[tuple[str, ...], object] = dict()
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        """
+        The child for these label values; callers on hot paths should keep the child rather than call this per update.
+        """
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self._TYPE}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: tuple[str, ...], child) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    _TYPE = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def labels(self, **labels: str) -> CounterChild:
+        return super().labels(**labels)
+
+    def _render_child(self, key: tuple[str, ...], child: CounterChild) -> list[str]:
+        return [f"{self.name}{_label_str(self.labelnames, key)} {_fmt(child.value())}"]
+
+
+class Histogram(_Metric):
+    _TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def labels(self, **labels: str) -> HistogramChild:
+        return super().labels(**labels)
+
+    def _render_child(self, key: tuple[str, ...], child: HistogramChild) -> list[str]:
+        counts, total = child.snapshot()
+        lines = []
+        for bound, n in zip(list(self.buckets) + [float("inf")], counts):
+            le = f'le="{_fmt(float(bound))}"'
+            lines.append(
+                f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {n}"
+            )
+        labels = _label_str(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_fmt(total)}")
+        lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, _Metric] = dict()
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self.metrics[metric.name] = metric
+
+    def counter(
+        self, name: str, help: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        counter = Counter(name, help, labelnames)
+        self._register(counter)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name, help, labelnames, buckets)
+        self._register(histogram)
+        return histogram
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format.
+        """
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str | Path) -> None:
+        """
+        For node_exporter's textfile collector: written to a temporary file and renamed, so scrapes never see half a file.
+        """
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render())
+        os.replace(tmp, path)
+
+    def serve(
+        self, port: int = _DEFAULT_PORT, host: str = _LOCALHOST
+    ) -> ThreadingHTTPServer:
+        """
+        Serve /metrics from a daemon thread (localhost by default), call shutdown() on the returned server to stop.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", _CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+REGISTRY = Registry()
+
+# ingest
+ROWS_INGESTED = REGISTRY.counter(
+    "optiface_rows_ingested_total", "Rows written to the results table.", (_PROBLEM,)
+)
+ROWS_REJECTED = REGISTRY.counter(
+    "optiface_rows_rejected_total", "Rows that failed validation.", (_PROBLEM,)
+)
+INGEST_BATCHES = REGISTRY.counter(
+    "optiface_ingest_batches_total", "Committed insert transactions.", (_PROBLEM,)
+)
+INGEST_SECONDS = REGISTRY.histogram(
+    "optiface_ingest_seconds", "Insert transaction latency.", (_PROBLEM,)
+)
+MIGRATED_FILES = REGISTRY.counter(
+    "optiface_migrated_files_total", "Files migrated into a problem space.", (_PROBLEM,)
+)
+MIGRATED_BYTES = REGISTRY.counter(
+    "optiface_migrated_bytes_total", "Bytes of migrated files.", (_PROBLEM,)
+)
+SQLITE_BUSY = REGISTRY.counter(
+    "optiface_sqlite_busy_retries_total",
+    "Transactions that hit a locked / busy database.",
+    (_PROBLEM,),
+)
+
+# query
+QUERY_SECONDS = REGISTRY.histogram(
+    "optiface_query_seconds", "Query latency.", (_PROBLEM, "query")
+)
+
+QUERY_CACHE = REGISTRY.counter(
+    "optiface_query_cache_total",
+    "Query cache lookups, by outcome (hit, miss, invalidated).",
+    (_PROBLEM, "outcome"),
+)
+
+# database initialization
+DB_INITS = REGISTRY.counter(
+    "optiface_db_init_total",
+    "Database reconciliations, by outcome (created, reflected, failed).",
+    (_PROBLEM, "outcome"),
+)
@@ -0,0 +1,337 @@
+import itertools
+import json
+import os
+import queue
+import shlex
+import subprocess
+import time
+import yaml
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from optiface.core.optierror import Status, StatusOr, Success, Failure
+from optiface.core.optispace import Feature
+from optiface.core.featuredata import _FROM_RUNNER, _TRUE_STRS, _FALSE_STRS
+from optiface.dbmanager.dbm import AlchemyWAPI, BatchWriter
+from optiface.dbmanager.planner import RunPlanner, _MISSING, _RUNS
+
+# template placeholder for the repetition number, next to the grid feature names
+_REPETITION = "repetition"
+
+# stdout -> output_key feature values
+OutputParser = Callable[[str, dict[str, Feature]], dict[str, Any]]
+
+
+@dataclass
+class Job:
+    key: dict[str, Any]
+    rep: int
+    argv: list[str]
+
+
+@dataclass
+class JobResult:
+    job: Job
+    returncode: int | None
+    timed_out: bool
+    elapsed_ms: float
+    stdout: str = ""
+    stderr: str = ""
+    outputs: dict[str, Any] = field(default_factory=dict)
+
+
+def cast_output(value: Any, feature: Feature) -> Any:
+    """
+    Cast a value printed by a job to the feature's type (json already gives numbers, key=value lines give strings).
+    """
+    if value is None or feature.feature_type is str:
+        return value if value is None else str(value)
+    if feature.feature_type is bool:
+        if isinstance(value, bool):
+            return value
+        s = str(value).strip().lower()
+        if s in _TRUE_STRS:
+            return True
+        if s in _FALSE_STRS:
+            return False
+        raise ValueError(f"{value} is not a bool")
+    if feature.feature_type is int:
+        f = float(value)
+        if not f.is_integer():
+            raise ValueError(f"{value} is not an int")
+        return int(f)
+    return feature.feature_type(value)
+
+
+def parse_output(stdout: str, outputs: dict[str, Feature]) -> dict[str, Any]:
+    """
+    Default output parser: the last line of stdout that is a json object, otherwise every name=value line.
+    Only output_key features are kept, values that do not cast to their feature type are dropped.
+    """
+    lines = stdout.strip().splitlines()
+    found: dict[str, Any] = dict()
+
+    for line in reversed(lines):
+        line = line.strip()
+        if line.startswith("{") and line.endswith("}"):
+            try:
+                found = json.loads(line)
+                break
+            except json.JSONDecodeError:
+                continue
+    else:
+        for line in lines:
+            name, sep, value = line.partition("=")
+            if sep:
+                found[name.strip()] = value.strip()
+
+    parsed: dict[str, Any] = dict()
+    for name, value in found.items():
+        if name not in outputs:
+            continue
+        try:
+            parsed[name] = cast_output(value, outputs[name])
+        except (TypeError, ValueError):
+            continue
+    return parsed
+
+
+class LocalRunner:
+    """
+    Runs a command template over an instance_key x solver_key grid on a local pool of processes, and records
+    every finished job straight into the problem space's experiments.db.
+
+    The template is formatted with the grid feature values and {repetition}, e.g. "./solve {set_name} --solver {solver}".
+    Jobs run as subprocesses, at most workers at a time, each one optionally pinned to its own cpu and killed after
+    timeout_s. Worker threads only wait on their process; parsed rows are handed back to the calling thread, which
+    owns the single BatchWriter, so there is no writer contention however many cores are busy.
+    """
+
+    def __init__(
+        self,
+        wapi: AlchemyWAPI,
+        template: str,
+        workers: int | None = None,
+        timeout_s: float | None = None,
+        pin_cpus: bool = False,
+        batch_size: int = 100,
+        parse: OutputParser = parse_output,
+    ):
+        self.wapi: AlchemyWAPI = wapi
+        self.template: str = template
+        self.timeout_s: float | None = timeout_s
+        self.batch_size: int = batch_size
+        self.parse: OutputParser = parse
+        self.planner: RunPlanner = RunPlanner(wapi)
+
+        # pinning needs sched_setaffinity (linux)
+        self.pin_cpus: bool = pin_cpus and hasattr(os, "sched_setaffinity")
+        self.cpus: list[int] = (
+            sorted(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity")
+            else list(range(os.cpu_count() or 1))
+        )
+        self.workers: int = workers or len(self.cpus)
+        if self.pin_cpus:
+            self.workers = min(self.workers, len(self.cpus))
+
+        self.free_cpus: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for cpu in self.cpus:
+            self.free_cpus.put(cpu)
+
+    def _job(self, key: dict[str, Any], rep: int) -> Job:
+        argv = shlex.split(self.template.format_map({_REPETITION: rep, **key}))
+        return Job(key=key, rep=rep, argv=argv)
+
+    def expand(
+        self, grid: dict[str, list[Any]], reps: int = 1, only_missing: bool = False
+    ) -> StatusOr[Iterator[Job]]:
+        """
+        Jobs of the grid, reps per combination, or only the missing repetitions (see RunPlanner) if only_missing.
+        """
+        failure = self.planner.check_grid(grid)
+        if failure.has_errs:
+            return failure
+
+        try:
+            self.template.format_map(
+                {_REPETITION: 0, **{n: v[0] for n, v in grid.items()}}
+            )
+        except (KeyError, IndexError) as e:
+            failure.add_err(
+                err=f"command template uses {e}, which is not a grid feature or {_REPETITION}",
+                file=__file__,
+            )
+            return failure
+
+        return Success(
+            value=self._expand(grid, reps, only_missing), title="Job expansion"
+        )
+
+    def _expand(
+        self, grid: dict[str, list[Any]], reps: int, only_missing: bool
+    ) -> Iterator[Job]:
+        names = list(grid.keys())
+
+        if not only_missing:
+            values = [list(dict.fromkeys(v)) for v in grid.values()]
+            for combination in itertools.product(*values):
+                key = dict(zip(names, combination))
+                for rep in range(reps):
+                    yield self._job(key, rep)
+            return
+
+        # read the whole plan first: the planner's connection (read transaction, temp tables) is released before
+        # the first job runs, instead of blocking the runner's own commits for as long as jobs are pulled
+        res = self.planner.plan(grid, reps=reps)
+        plan = [planned for chunk in res.unwrap() or [] for planned in chunk]
+        for planned in plan:
+            key = {n: planned[n] for n in names}
+            for rep in range(planned[_RUNS], planned[_RUNS] + planned[_MISSING]):
+                yield self._job(key, rep)
+
+    def _run_job(self, job: Job) -> JobResult:
+        cpu: int | None = self.free_cpus.get() if self.pin_cpus else None
+        start = time.perf_counter()
+        timed_out = False
+
+        try:
+            try:
+                proc = subprocess.Popen(
+                    job.argv,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    # pinned in the child before exec: the job never runs a single instruction on another cpu
+                    preexec_fn=(
+                        None if cpu is None else lambda: os.sched_setaffinity(0, {cpu})
+                    ),
+                )
+            except (OSError, subprocess.SubprocessError) as e:
+                # e.g. missing executable or a cpu it cannot be pinned to, reported like a failed job
+                return JobResult(
+                    job=job,
+                    returncode=None,
+                    timed_out=False,
+                    elapsed_ms=(time.perf_counter() - start) * 1000,
+                    stderr=str(e),
+                )
+            try:
+                stdout, stderr = proc.communicate(timeout=self.timeout_s)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                stdout, stderr = proc.communicate()
+                timed_out = True
+        finally:
+            if cpu is not None:
+                self.free_cpus.put(cpu)
+
+        return JobResult(
+            job=job,
+            returncode=proc.returncode,
+            timed_out=timed_out,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            stdout=stdout,
+            stderr=stderr,
+        )
+
+    def _record(self, writer: BatchWriter, result: JobResult, status: Status) -> None:
+        job = result.job
+        if result.timed_out:
+            status.add_note(
+                note=f"Job timed out after {self.timeout_s}s: {shlex.join(job.argv)}",
+                file=__file__,
+            )
+            return
+        if result.returncode != 0:
+            status.add_note(
+                note=f"Job exited with {result.returncode}: {shlex.join(job.argv)}, stderr: {result.stderr.strip()}",
+                file=__file__,
+            )
+            return
+
+        result.outputs = self.parse(result.stdout, self.wapi.pspace.output_key)
+        writer.add({**job.key, **result.outputs})
+
+    def run(self, jobs: Iterator[Job]) -> Status:
+        """
+        Run every job, recording the successful ones through one BatchWriter; failed, timed out, and non-valid
+        jobs are reported as notes.
+        """
+        status: Status = Success(title="Local run")
+        n_jobs = 0
+
+        with BatchWriter(
+            self.wapi, batch_size=self.batch_size, added_from=_FROM_RUNNER
+        ) as writer:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending: set[Future[JobResult]] = set()
+
+                # keep the in-flight set bounded, the job iterator can be arbitrarily long
+                for job in jobs:
+                    if len(pending) >= 2 * self.workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            self._record(writer, fut.result(), status)
+                    pending.add(pool.submit(self._run_job, job))
+                    n_jobs += 1
+
+                for fut in wait(pending).done:
+                    self._record(writer, fut.result(), status)
+
+        for notes in writer.status.unwrap_notes().values():
+            for note in notes:
+                status.add_note(note=note, file=__file__)
+        status.add_note(
+            note=f"ran {n_jobs} jobs, added {writer.n_written} rows to results table in problem {self.wapi.pspace.name}",
+            file=__file__,
+        )
+        return status
+
+
+def main():
+    from optiface.core.optispace import read_pspace_from_yaml
+    from optiface.dbmanager.dbm import init_alchemy_api
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="optiface-run")
+    parser.add_argument("problem", type=str)
+    parser.add_argument("template", type=str)
+    parser.add_argument("grid", type=str, help="yaml file, feature -> list of values")
+    parser.add_argument("--reps", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--pin", action="store_true")
+    parser.add_argument("--only-missing", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.grid, "r") as file:
+        grid = yaml.safe_load(file)
+
+    res = init_alchemy_api(read_pspace_from_yaml(args.problem))
+    if res.is_err():
+        print(res.unwrap_err())
+        return
+
+    runner = LocalRunner(
+        res.unwrap(),
+        args.template,
+        workers=args.workers,
+        timeout_s=args.timeout,
+        pin_cpus=args.pin,
+    )
+    jobs = runner.expand(grid, reps=args.reps, only_missing=args.only_missing)
+    if jobs.is_err():
+        print(jobs.unwrap_err())
+        return
+
+    status = runner.run(jobs.unwrap() or iter([]))
+    for notes in status.unwrap_notes().values():
+        for note in notes:
+            print(note)
+
+
+if __name__ == "__main__":
+    main()
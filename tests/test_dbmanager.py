@@ -1,5 +1,52 @@
+import asyncio
+import math
+import os
+import random
+import shlex
+import sqlite3
+import subprocess
+import sys
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from optiface import metrics
+from optiface.core.optispace import (
+    Feature,
+    ProblemSpace,
+    init_default_problem_space,
+)
+from optiface.core.resultframe import ResultFrame
+from optiface.dbmanager.dbm import AlchemyWAPI, init_alchemy_api
+from optiface.dbmanager.concurrency import WriteConcurrency
+from optiface.dbmanager.summary import SummaryAccumulator, stat_column_name
+from optiface.dbmanager.partition import PartitionedStore
+from optiface.dbmanager.federation import FederatedQuery, shared_schema
+from optiface.dbmanager.planner import RunPlanner
+from optiface.dbmanager.memo import RunMemo, key_hash
+from optiface.dbmanager.sketch import FeatureSketch, TDigest, merge_sketches
+from optiface.dbmanager.querycache import QueryCache, statement_key
+from optiface.dbmanager.stress import (
+    StressConfig,
+    run_stress,
+    synthetic_rows,
+    tag_feature,
+)
+from optiface.dbmanager.backup import BackupManager, online_backup, integrity_errors
+from optiface.dbmanager.replica import MemoryReplica, FrameCache
+from optiface.dbmanager.asyncdbm import init_async_alchemy_api
+from optiface.dbmanager.quarantine import (
+    QuarantineWriter,
+    quarantine_path,
+    read_quarantine,
+)
+from optiface.dbmanager.readers import read_batches, read_frames, reader_for
+from optiface.runner.localrunner import LocalRunner
+
 _TEST_PSPACE_NAME: str = "testproblem"
 
 _SPACE = "space"
@@ -7,6 +54,34 @@ _EXPERIMENTS_DB = "experiments.db"
 _TEST_PSPACEDB_PATH: Path = Path(_SPACE) / _TEST_PSPACE_NAME / _EXPERIMENTS_DB
 
 
+@pytest.fixture
+def pspace(tmp_path, monkeypatch) -> ProblemSpace:
+    # space/ is resolved relative to the working directory, keep test databases out of the repo
+    monkeypatch.chdir(tmp_path)
+    Path(_SPACE).mkdir()
+    ps = init_default_problem_space(_TEST_PSPACE_NAME)
+    ps.write_to_yaml()
+    return ps
+
+
+@pytest.fixture
+def wapi(pspace: ProblemSpace) -> AlchemyWAPI:
+    res = init_alchemy_api(pspace)
+    assert res.is_ok()
+    return res.unwrap()
+
+
+def default_rows_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "set_name": ["layer", "layer", "layer", "grid"],
+            "solver": ["MIP", "MIP", "BENDERS", "MIP"],
+            "objective": [10.0, 20.0, 30.0, 5.0],
+            "time_ms": [100.0, 300.0, 50.0, 1.0],
+        }
+    )
+
+
 class TestAlchemyFactory:
     """
     AlchemyFactory is an alignment object that validates the active ProblemSpace's database, returning a ready to use AlchemyWAPI.
@@ -30,9 +105,215 @@ class TestAlchemyWAPI:
         - when row is complete -> row is there when queried
         - when row has missing values -> correct defaults are used
         - when row has incorrect columns -> error
+    - summary table is updated with every batch, per (instance_key, solver_key) group, NULL group values included
     """
 
-    pass
+    def test_summary_updated_on_insert(self, wapi: AlchemyWAPI):
+        status = wapi.insert_rows(default_rows_df())
+        assert status.is_ok()
+
+        summary = wapi.read_summary().set_index(["set_name", "solver"])
+        assert len(summary) == 3
+
+        mip = summary.loc[("layer", "MIP")]
+        assert mip["time_ms__count"] == 2
+        assert mip["time_ms__sum"] == 400.0
+        assert mip["time_ms__sumsq"] == 100.0**2 + 300.0**2
+        assert mip["time_ms__min"] == 100.0
+        assert mip["time_ms__max"] == 300.0
+        assert mip["time_ms__mean"] == 200.0
+        assert math.isclose(mip["time_ms__geomean"], math.sqrt(100.0 * 300.0))
+
+        # a second batch merges into the existing groups
+        wapi.insert_rows(default_rows_df())
+        summary = wapi.read_summary().set_index(["set_name", "solver"])
+        assert len(summary) == 3
+        assert summary.loc[("layer", "MIP")]["time_ms__count"] == 4
+        assert summary.loc[("grid", "MIP")]["objective__min"] == 5.0
+
+    def test_summary_null_group_merged(self, wapi: AlchemyWAPI):
+        # rows inserted as already validated may carry a NULL group value, unique indexes never match NULLs
+        wapi.insert_tuples([("layer", None, "MIP", 1.0, 2.0)])
+        wapi.insert_tuples(
+            [("layer", None, "MIP", 3.0, 4.0), ("layer", 0, "MIP", 5.0, 6.0)]
+        )
+
+        summary = wapi.read_summary()
+        assert len(summary) == 2
+        null_rep = summary[summary["rep"].isna()].iloc[0]
+        assert null_rep["objective__count"] == 2
+        assert null_rep["objective__min"] == 1.0
+        assert null_rep["time_ms__max"] == 4.0
+
+    def test_insert_and_query_frame(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        frame = ResultFrame.from_dataframe(pspace.full_row(), default_rows_df())
+        status = wapi.insert_frame(frame)
+        assert status.is_ok()
+
+        stored = wapi.query_frame()
+        assert len(stored) == 4
+        assert stored["run_id"].to_pylist() == [1, 2, 3, 4]
+        assert stored["solver"].dictionary == ["MIP", "BENDERS"]
+        assert stored["rep"].to_pylist() == [0, 0, 0, 0]
+
+        mip = wapi.query_frame(wapi.results_view.c.solver == "MIP")
+        assert mip["time_ms"].to_pylist() == [100.0, 300.0, 1.0]
+
+        assert wapi.read_summary()["time_ms__count"].sum() == 4
+
+    def test_encoded_key_features(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        wapi.insert_rows(default_rows_df())
+
+        with wapi.engine.connect() as conn:
+            stored = conn.exec_driver_sql("SELECT DISTINCT solver FROM results")
+            assert sorted(r[0] for r in stored) == [1, 2]
+            dim = conn.exec_driver_sql("SELECT value FROM dim_solver ORDER BY id")
+            assert [r[0] for r in dim] == ["MIP", "BENDERS"]
+            decoded = conn.exec_driver_sql("SELECT solver FROM results_view")
+            assert [r[0] for r in decoded].count("BENDERS") == 2
+
+        # reflected databases keep the encoded layout
+        res = init_alchemy_api(pspace)
+        assert res.is_ok()
+        reflected = res.unwrap()
+        assert set(reflected.dims.keys()) == {"set_name", "solver"}
+        reflected.insert_rows(default_rows_df())
+        assert len(reflected.query_frame()) == 12
+
+    def test_plain_key_features(self, pspace: ProblemSpace):
+        res = init_alchemy_api(pspace, encode_keys=False)
+        assert res.is_ok()
+        wapi = res.unwrap()
+        assert wapi.key_encoder is None
+
+        wapi.insert_rows(default_rows_df())
+        with wapi.engine.connect() as conn:
+            stored = conn.exec_driver_sql("SELECT DISTINCT solver FROM results")
+            assert sorted(r[0] for r in stored) == ["BENDERS", "MIP"]
+        assert wapi.query_frame()["solver"].dictionary == ["MIP", "BENDERS"]
+
+    def test_non_numeric_outputs_not_summarized(self, pspace: ProblemSpace):
+        pspace.output_key["status"] = Feature(
+            name="status",
+            required=False,
+            default="",
+            verbose_name="Status",
+            short_name="st",
+            feature_type_str="str",
+        )
+        pspace.output_key["optimal"] = Feature(
+            name="optimal",
+            required=False,
+            default=False,
+            verbose_name="Optimal",
+            short_name="opt",
+            feature_type_str="bool",
+        )
+        wapi = init_alchemy_api(pspace).unwrap()
+
+        df = default_rows_df()
+        df["status"] = ["OPTIMAL", "TIME_LIMIT", "OPTIMAL", "INFEASIBLE"]
+        df["optimal"] = [True, False, True, False]
+        status = wapi.insert_rows(df)
+        assert status.is_ok()
+        assert len(wapi.query_frame()) == 4
+
+        summary = wapi.read_summary()
+        assert summary["objective__count"].sum() == 4
+        assert not any(c.startswith(("status__", "optimal__")) for c in summary)
+
+        # the rebuild skips them too
+        with wapi.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE summary")
+        assert (
+            init_alchemy_api(pspace).unwrap().read_summary()["objective__count"].sum()
+            == 4
+        )
+
+    def test_summary_skips_missing_values(self, pspace: ProblemSpace):
+        acc = SummaryAccumulator(pspace)
+        acc.add_rows(
+            [
+                {
+                    "set_name": "a",
+                    "rep": 0,
+                    "solver": "MIP",
+                    "objective": 1.0,
+                    "time_ms": None,
+                },
+                {
+                    "set_name": "a",
+                    "rep": 0,
+                    "solver": "MIP",
+                    "objective": float("nan"),
+                    "time_ms": 2.0,
+                },
+            ]
+        )
+        [record] = acc.to_records()
+        assert record["objective__count"] == 1 and record["objective__sum"] == 1.0
+        assert record["time_ms__count"] == 1
+
+    def test_summary_rebuilt_on_reflect(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        with wapi.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE summary")
+
+        res = init_alchemy_api(pspace)
+        assert res.is_ok()
+        summary = res.unwrap().read_summary()
+        assert summary["objective__count"].sum() == 4
+
+    def test_summary_kept_when_features_reordered(
+        self, pspace: ProblemSpace, wapi: AlchemyWAPI
+    ):
+        wapi.insert_rows(default_rows_df())
+        # as read back from yaml, in another order than the problem space was created with
+        pspace.output_key = dict(reversed(list(pspace.output_key.items())))
+
+        res = init_alchemy_api(pspace)
+        assert res.is_ok()
+        notes = [n for ns in res.unwrap_notes().values() for n in ns]
+        assert not any("rebuilt summary" in n for n in notes)
+        assert res.unwrap().read_summary()["objective__count"].sum() == 4
+
+    def test_metrics_updated(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        ingested = metrics.ROWS_INGESTED.labels(problem=pspace.name)
+        batches = metrics.INGEST_BATCHES.labels(problem=pspace.name)
+        rows_before, batches_before = ingested.value(), batches.value()
+
+        wapi.insert_rows(default_rows_df())
+        wapi.query_frame()
+
+        assert ingested.value() - rows_before == 4
+        assert batches.value() - batches_before == 1
+        counts, _ = wapi.m_query_seconds("query_frame").snapshot()
+        assert counts[-1] >= 1
+
+    def test_integer_timestamps(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        assert wapi.latest_timestamp() is None
+        wapi.insert_rows(default_rows_df())
+        first = wapi.latest_timestamp()
+        wapi.insert_rows(default_rows_df().head(1))
+        second = wapi.latest_timestamp()
+
+        with wapi.engine.connect() as conn:
+            stored = conn.exec_driver_sql(
+                "SELECT DISTINCT typeof(timestamp_added), timestamp_added FROM results"
+            ).all()
+        # one timestamp per batch, stored as integers
+        assert [t for t, _ in stored] == ["integer", "integer"]
+        assert first < second
+
+        assert len(wapi.runs_since(first)) == 1
+        assert len(wapi.runs_between(first, second)) == 4
+        assert len(wapi.runs_between(first, second + timedelta(microseconds=1))) == 5
+
+        # reflected as integer timestamps again
+        res = init_alchemy_api(pspace)
+        assert res.is_ok()
+        assert res.unwrap().latest_timestamp() == second
 
 
 class TestMigrations:
@@ -44,3 +325,1170 @@ class TestMigrations:
     """
 
     pass
+
+
+class TestPartitionedStore:
+    """
+    PartitionedStore is the optional layout with one sqlite file per partition.
+
+    Behaviors:
+    - rows are routed to the partition of their key (month of timestamp_added, or a str key feature)
+    - queries only attach the partitions the filter touches, and union them
+    - frozen partitions are read-only and refuse new rows
+    """
+
+    def test_partition_by_feature(self, pspace: ProblemSpace):
+        store = PartitionedStore(pspace, by="set_name")
+        status = store.insert_rows(default_rows_df())
+        assert status.is_ok()
+        assert store.partitions() == ["grid", "layer"]
+
+        assert store.touched_partitions({"set_name": "grid"}) == ["grid"]
+        grid = store.query({"set_name": "grid"})
+        assert list(grid["partition"]) == ["grid"]
+        assert list(grid["time_ms"]) == [1.0]
+
+        mip = store.query({"solver": "MIP"})
+        assert sorted(mip["time_ms"]) == [1.0, 100.0, 300.0]
+
+        # partitioning is persisted with the problem space
+        assert PartitionedStore(pspace).by == "set_name"
+        with pytest.raises(RuntimeError):
+            PartitionedStore(pspace, by="month")
+
+    def test_partition_by_month_and_freeze(self, pspace: ProblemSpace):
+        store = PartitionedStore(pspace, by="month")
+        store.insert_rows(default_rows_df())
+        (label,) = store.partitions()
+
+        assert store.freeze(label).is_ok()
+        assert os.stat(store.partition_path(label)).st_mode & 0o222 == 0
+
+        status = store.insert_rows(default_rows_df())
+        assert status.is_err()
+        errs = [e for es in status.unwrap_err().values() for e in es]
+        assert errs == [f"4 rows for frozen partition {label}"]
+        assert len(store.query()) == 4
+        assert store.query(since=datetime(2000, 1, 1), until=datetime(2000, 2, 1)).empty
+
+
+class TestFederatedQuery:
+    """
+    FederatedQuery attaches several problem space databases to aggregate across them.
+
+    Behaviors:
+    - only features with the same name and type in every problem space are shared
+    - one aggregation spans every attached problem space, grouped by problem by default
+    - problem spaces without an experiments.db are skipped with a note
+    """
+
+    def test_aggregate_across_problems(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        other = init_default_problem_space("otherproblem")
+        other.output_key.pop("objective")
+        other.write_to_yaml()
+        other_wapi = init_alchemy_api(other, encode_keys=False).unwrap()
+
+        wapi.insert_rows(default_rows_df())
+        other_wapi.insert_rows(default_rows_df().drop(columns="objective"))
+
+        fq = FederatedQuery([pspace, other])
+        assert [f.name for f in fq.schema.output_key] == ["time_ms"]
+
+        res = fq.aggregate(aggs=["count", "max"])
+        assert res.is_ok()
+        df = res.unwrap().set_index(["problem", "solver"])
+        assert df.loc[(pspace.name, "MIP")]["time_ms__count"] == 3
+        assert df.loc[("otherproblem", "BENDERS")]["time_ms__max"] == 50.0
+
+        by_set = fq.aggregate(group_by=["set_name"], aggs=["sum"]).unwrap()
+        assert list(by_set["set_name"]) == ["grid", "layer"]
+        assert list(by_set["time_ms__sum"]) == [2.0, 900.0]
+
+        assert fq.aggregate(outputs=["objective"]).is_err()
+
+    def test_missing_database_skipped(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        other = init_default_problem_space("nodbproblem")
+        other.write_to_yaml()
+        wapi.insert_rows(default_rows_df())
+
+        res = FederatedQuery([pspace, other]).aggregate(aggs=["count"])
+        assert res.is_ok()
+        assert set(res.unwrap()["problem"]) == {pspace.name}
+        notes = [n for ns in res.unwrap_notes().values() for n in ns]
+        assert notes == ["skipped problem nodbproblem, it has no experiments database"]
+
+        assert FederatedQuery([other]).aggregate().is_err()
+
+
+def collect_plan(planner: RunPlanner, grid: dict, reps: int = 1) -> list[tuple]:
+    res = planner.plan(grid, reps=reps, chunksize=2)
+    assert res.is_ok()
+    runs = [r for chunk in res.unwrap() for r in chunk]
+    return sorted(tuple(r[k] for k in list(grid.keys()) + ["runs"]) for r in runs)
+
+
+class TestRunPlanner:
+    """
+    RunPlanner anti-joins a declared instance x solver grid against the results table.
+
+    Behaviors:
+    - combinations with no runs (or fewer than reps runs) are streamed back, with their run count
+    - grid values never stored (unknown to the dimension tables) count as missing
+    - grids with unknown features or wrongly typed values are rejected
+    """
+
+    def test_missing_runs(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        planner = RunPlanner(wapi)
+        grid = {
+            "set_name": ["layer", "grid", "new"],
+            "solver": ["MIP", "BENDERS"],
+        }
+
+        assert planner.grid_size(grid) == 6
+        assert collect_plan(planner, grid) == [
+            ("grid", "BENDERS", 0),
+            ("new", "BENDERS", 0),
+            ("new", "MIP", 0),
+        ]
+        assert collect_plan(planner, grid, reps=2) == [
+            ("grid", "BENDERS", 0),
+            ("grid", "MIP", 1),
+            ("layer", "BENDERS", 1),
+            ("new", "BENDERS", 0),
+            ("new", "MIP", 0),
+        ]
+
+        # the leading index column pinned, probing the key index instead
+        grid_with_rep = {"rep": [0, 1], **grid}
+        assert len(collect_plan(planner, grid_with_rep)) == 9
+        assert len(collect_plan(planner, grid_with_rep, reps=2)) == 11
+
+    def test_invalid_grid(self, wapi: AlchemyWAPI):
+        planner = RunPlanner(wapi)
+        assert planner.plan({"objective": [1.0]}).is_err()
+        assert planner.plan({"rep": ["one"]}).is_err()
+        assert planner.plan({}).is_err()
+
+
+_SOLVE_SCRIPT = """
+import json, sys
+set_name, solver, repetition = sys.argv[1:]
+if solver == "FAIL":
+    sys.exit(3)
+if solver == "SLOW":
+    import time
+    time.sleep(30)
+print("solving", set_name)
+print(json.dumps({"objective": len(set_name) + int(repetition), "time_ms": 1, "other": 0}))
+"""
+
+
+class TestLocalRunner:
+    """
+    LocalRunner expands a command template over a grid, runs the jobs on a local pool and records them.
+
+    Behaviors:
+    - the stdout of every successful job is parsed into output_key features and inserted through one BatchWriter
+    - failed and timed out jobs are reported in the status and not recorded
+    - only_missing expands only the repetitions the planner reports as missing
+    - pinned jobs run on their cpu from their first instruction
+    """
+
+    def runner(self, wapi: AlchemyWAPI, **kwargs) -> LocalRunner:
+        Path("solve.py").write_text(_SOLVE_SCRIPT)
+        template = f"{shlex.quote(sys.executable)} solve.py {{set_name}} {{solver}} {{repetition}}"
+        return LocalRunner(wapi, template, workers=2, **kwargs)
+
+    def test_run_grid(self, wapi: AlchemyWAPI):
+        runner = self.runner(wapi, timeout_s=1)
+        grid = {"set_name": ["layer", "grid"], "solver": ["MIP", "FAIL", "SLOW"]}
+
+        res = runner.expand(grid, reps=2)
+        assert res.is_ok()
+        status = runner.run(res.unwrap())
+        notes = [n for ns in status.unwrap_notes().values() for n in ns]
+        assert sum("exited with 3" in n for n in notes) == 4
+        assert sum("timed out" in n for n in notes) == 4
+
+        df = wapi.query_frame().to_dataframe()
+        assert sorted(zip(df["set_name"], df["objective"])) == [
+            ("grid", 4.0),
+            ("grid", 5.0),
+            ("layer", 5.0),
+            ("layer", 6.0),
+        ]
+        assert set(df["added_from"]) == {"RUNNER"}
+
+    def test_only_missing(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        runner = self.runner(wapi)
+        grid = {"set_name": ["layer", "grid"], "solver": ["MIP"]}
+
+        jobs = runner.expand(grid, reps=2, only_missing=True).unwrap()
+        assert [(j.key["set_name"], j.rep) for j in jobs] == [("grid", 1)]
+
+        # the job generator straight into run, as the cli does
+        res = runner.expand(grid, reps=2, only_missing=True)
+        assert res.is_ok()
+        status = runner.run(res.unwrap())
+        assert status.is_ok()
+
+        df = wapi.query_frame().to_dataframe()
+        assert len(df) == 5
+        assert df["added_from"].tolist()[-1] == "RUNNER"
+        assert df["set_name"].tolist()[-1] == "grid"
+        assert runner.expand({"set_name": ["layer"]}).is_err()
+
+    def test_only_missing_streamed_into_run(self, wapi: AlchemyWAPI):
+        # the runner commits batches while it is still pulling planned jobs
+        runner = self.runner(wapi, batch_size=2)
+        grid = {"set_name": [f"set{i}" for i in range(30)], "solver": ["MIP"]}
+
+        res = runner.expand(grid, reps=2, only_missing=True)
+        assert res.is_ok()
+        status = runner.run(res.unwrap())
+        assert status.is_ok()
+        assert len(wapi.query_frame()) == 60
+
+    def test_pinned_job_starts_on_its_cpu(self, wapi: AlchemyWAPI):
+        if not hasattr(os, "sched_setaffinity"):
+            pytest.skip("cpu pinning needs sched_setaffinity")
+        template = f"{shlex.quote(sys.executable)} -c 'import os; print(sorted(os.sched_getaffinity(0)))'"
+        runner = LocalRunner(wapi, template, pin_cpus=True)
+
+        result = runner._run_job(runner._job({}, 0))
+        assert result.returncode == 0
+        assert result.stdout.strip() == str([runner.cpus[0]])
+
+
+class TestRunMemo:
+    """
+    RunMemo answers which instance_key x solver_key keys already have runs.
+
+    Behaviors:
+    - the run_memo table is kept in step with inserts, and rebuilt for databases that do not have it
+    - has_run / runs / lookup answer single keys, done / not_done answer many keys at once
+    - a key hashes the same whatever python types its values come in, bool text included ("False" is False)
+    """
+
+    def test_has_run_and_lookup(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        memo = RunMemo(wapi)
+        layer_mip = {"set_name": "layer", "solver": "MIP"}
+
+        assert memo.has_run(layer_mip)
+        assert memo.runs(layer_mip) == 2
+        assert not memo.has_run({"set_name": "grid", "solver": "BENDERS"})
+        assert sorted(r["objective"] for r in memo.lookup(layer_mip)) == [10.0, 20.0]
+        assert memo.lookup({"set_name": "new", "solver": "MIP"}) == []
+
+        assert key_hash(
+            pspace, {"set_name": "layer", "solver": "MIP", "rep": 0}
+        ) == key_hash(
+            pspace, {"set_name": "layer", "solver": "MIP", "rep": np.int64(0)}
+        )
+
+    def test_bool_text_keys(self, pspace: ProblemSpace):
+        pspace.solver_key["warm"] = Feature(
+            name="warm",
+            required=False,
+            default=False,
+            verbose_name="Warm start",
+            short_name="warm",
+            feature_type_str="bool",
+        )
+        key = {"set_name": "layer", "solver": "MIP"}
+
+        def h(warm) -> int:
+            return key_hash(pspace, {**key, "warm": warm})
+
+        assert h("False") == h(False) == h("0") == h(np.bool_(False))
+        assert h(" true ") == h(True)
+        assert h("False") != h(True)
+        assert h("maybe") not in (h(True), h(False))
+
+    def test_bulk_membership(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        memo = RunMemo(wapi)
+        keys = [
+            {"set_name": s, "solver": sol}
+            for s in ["layer", "grid", "new"]
+            for sol in ["MIP", "BENDERS"]
+        ]
+
+        assert memo.done(keys) == [True, True, True, False, False, False]
+        assert memo.not_done(keys) == keys[3:]
+
+        # snapshot until refreshed
+        wapi.insert_rows(
+            pd.DataFrame(
+                {
+                    "set_name": ["new"],
+                    "solver": ["MIP"],
+                    "objective": [1.0],
+                    "time_ms": [1.0],
+                }
+            )
+        )
+        memo.refresh()
+        assert memo.not_done(keys) == [keys[3], keys[5]]
+
+    def test_memo_rebuilt_on_reflect(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        with wapi.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE run_memo")
+
+        res = init_alchemy_api(pspace)
+        assert res.is_ok()
+        assert RunMemo(res.unwrap()).runs({"set_name": "layer", "solver": "MIP"}) == 2
+
+
+class TestSketches:
+    """
+    Per group Welford moments and t-digest quantiles of the numeric output_key features.
+
+    Behaviors:
+    - the sketches table is kept in step with inserts, and rebuilt for databases that do not have it
+    - moments are exact and merge in any order, quantiles are within a small rank error
+    - digest centroids are as large as the k1 scale function allows (k-size at most 1), and no larger
+    - sketches serialize losslessly and merge across groups, partitions and problem spaces
+    - a group with a NULL value keeps one sketch per feature, merged batch after batch
+    """
+
+    def test_null_group_merged(self, wapi: AlchemyWAPI):
+        wapi.insert_tuples([("layer", None, "MIP", 1.0, 2.0)])
+        wapi.insert_tuples([("layer", None, "MIP", 3.0, 4.0)])
+
+        sketch = wapi.read_sketch(
+            {"set_name": "layer", "rep": None, "solver": "MIP"}, "time_ms"
+        )
+        assert sketch.count == 2
+        assert sketch.moments.mean == 3.0
+        with wapi.engine.connect() as conn:
+            n = conn.exec_driver_sql("SELECT count(*) FROM sketches WHERE rep IS NULL")
+            assert n.scalar() == 2
+
+    def test_sketch_accuracy_and_merge(self):
+        rng = np.random.default_rng(0)
+        xs = rng.lognormal(mean=3.0, sigma=1.0, size=20_000)
+
+        parts = [FeatureSketch() for _ in range(4)]
+        for part, chunk in zip(parts, np.array_split(xs, 4)):
+            for block in np.array_split(chunk, 10):
+                part.add_many(block)
+        merged = merge_sketches(parts)
+
+        assert merged.count == len(xs)
+        assert math.isclose(merged.mean, xs.mean(), rel_tol=1e-9)
+        assert math.isclose(merged.std, xs.std(ddof=1), rel_tol=1e-9)
+        for q in [0.5, 0.95, 0.99]:
+            rank = (xs < merged.quantile(q)).mean()
+            assert abs(rank - q) < 0.01
+        assert len(merged.digest.means) < 200
+
+        digest = TDigest.from_bytes(merged.digest.to_bytes())
+        assert digest.quantile(0.99) == merged.quantile(0.99)
+        assert digest.min == xs.min() and digest.max == xs.max()
+
+    def test_digest_centroid_sizes(self):
+        rng = np.random.default_rng(1)
+        digest = TDigest(compression=50)
+        digest.add_many(rng.normal(size=5_000))
+        digest._flush()
+
+        def k(q: float) -> float:
+            return 50 / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+        total = digest.weights.sum()
+        bounds = np.concatenate([[0.0], np.cumsum(digest.weights)]) / total
+        sizes = [k(hi) - k(lo) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        for size, w in zip(sizes, digest.weights):
+            assert w == 1 or size <= 1.0 + 1e-9
+        # greedy: a centroid only closes when the next point would not fit, so neighbours could not be merged
+        for lo, hi in zip(bounds[:-2], bounds[2:]):
+            assert k(hi) - k(lo) > 1.0 - 1e-9
+
+    def test_sketches_on_insert(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        wapi.insert_rows(default_rows_df())
+
+        layer_mip = wapi.read_sketch({"set_name": "layer", "solver": "MIP"}, "time_ms")
+        assert layer_mip.count == 4
+        assert layer_mip.mean == 200.0
+        assert math.isclose(layer_mip.std, np.std([100, 300, 100, 300], ddof=1))
+        assert 100.0 <= layer_mip.quantile(0.5) <= 300.0
+        assert wapi.read_sketch({"set_name": "new", "solver": "MIP"}, "time_ms") is None
+
+        mip = wapi.merged_sketch("time_ms", {"solver": "MIP"})
+        assert mip.count == 6
+        assert math.isclose(mip.mean, (2 * 401.0) / 6)
+
+        df = wapi.read_sketches()
+        assert len(df) == 3
+        assert {"time_ms__p50", "time_ms__p99", "objective__std"} <= set(df.columns)
+
+    def test_sketches_rebuilt_on_reflect(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        before = wapi.read_sketch({"set_name": "layer", "solver": "MIP"}, "objective")
+        with wapi.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE sketches")
+
+        res = init_alchemy_api(pspace)
+        assert res.is_ok()
+        after = res.unwrap().read_sketch(
+            {"set_name": "layer", "solver": "MIP"}, "objective"
+        )
+        assert (after.count, after.mean, after.moments.m2) == (
+            before.count,
+            before.mean,
+            before.moments.m2,
+        )
+
+    def test_sketch_across_partitions(self, pspace: ProblemSpace):
+        store = PartitionedStore(pspace, by="set_name")
+        store.insert_rows(default_rows_df())
+
+        mip = store.sketch("time_ms", {"solver": "MIP"})
+        assert mip.count == 3
+        assert math.isclose(mip.mean, 401.0 / 3)
+        assert store.sketch("time_ms", {"set_name": "grid"}).count == 1
+
+
+class TestQueryCache:
+    """
+    QueryCache serves repeated reads from memory until the database changes.
+
+    Behaviors:
+    - a repeated query is a hit, whitespace and parameter order do not matter
+    - a commit from any connection or process invalidates every entry
+    - entries are evicted least recently used first, by count and by bytes
+    - a value is not cached when the database changed while it was computed, whoever noticed the change first
+    - persisted entries are reloaded only while the run_id range, the results row count and the summary are unchanged
+    """
+
+    def test_hits_and_invalidation(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        from sqlalchemy import func, select
+
+        wapi.insert_rows(default_rows_df())
+        cache = QueryCache(wapi)
+        view = wapi.results_view
+        stmt = select(view.c.solver, func.avg(view.c.time_ms).label("t")).group_by(
+            view.c.solver
+        )
+
+        first = cache.execute(stmt)
+        assert cache.execute(stmt) is first
+        assert cache.read_summary() is cache.read_summary()
+        assert len(cache) == 2
+        assert statement_key(stmt.where(view.c.rep == 0)) != statement_key(stmt)
+
+        # another process commits: data_version moves
+        db = str(_TEST_PSPACEDB_PATH)
+        with sqlite3.connect(db) as conn:
+            conn.execute("UPDATE results SET time_ms = 0")
+        assert cache.execute(stmt) is not first
+        assert len(cache) == 1
+        assert set(cache.execute(stmt)["t"]) == {0.0}
+
+        # this process commits through the wapi
+        wapi.insert_rows(default_rows_df())
+        assert len(cache.query_frame()) == 8
+        assert len(cache) == 1
+        cache.close()
+
+    def test_eviction(self, wapi: AlchemyWAPI):
+        cache = QueryCache(wapi, max_entries=2)
+        for key in ["a", "b", "a", "c"]:
+            cache.get_or_compute(key, lambda: key)
+        assert list(cache.entries) == ["a", "c"]
+
+        small = QueryCache(wapi, max_bytes=1_000)
+        small.get_or_compute("big", lambda: "x" * 10_000)
+        assert len(small) == 0
+
+    def test_persistence(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        cache = QueryCache.for_problem(wapi)
+        summary = cache.read_summary()
+        cache.close()
+
+        reloaded = QueryCache.for_problem(wapi)
+        assert len(reloaded) == 1
+        pd.testing.assert_frame_equal(reloaded.read_summary(), summary)
+        reloaded.close()
+
+        wapi.insert_rows(default_rows_df())
+        assert len(QueryCache.for_problem(wapi)) == 0
+
+    def test_write_during_compute_not_cached(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        cache = QueryCache(wapi)
+
+        def compute() -> int:
+            with sqlite3.connect(str(_TEST_PSPACEDB_PATH)) as conn:
+                conn.execute("UPDATE results SET time_ms = 0")
+            # another thread's lookup sees the write first
+            cache.get_or_compute("other", lambda: 0)
+            return 1
+
+        assert cache.get_or_compute("stale", compute) == 1
+        assert "stale" not in cache.entries
+        cache.close()
+
+    def test_persisted_fingerprint(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        db = str(_TEST_PSPACEDB_PATH)
+
+        cache = QueryCache.for_problem(wapi)
+        cache.read_summary()
+        cache.close()
+        # same run_id range, one run less
+        with sqlite3.connect(db) as conn:
+            conn.execute(
+                "DELETE FROM results WHERE run_id = (SELECT MIN(run_id) + 1 FROM results)"
+            )
+        assert len(QueryCache.for_problem(wapi)) == 0
+
+        cache = QueryCache.for_problem(wapi)
+        cache.read_summary()
+        cache.close()
+        # same runs, different summary
+        with sqlite3.connect(db) as conn:
+            conn.execute(f"UPDATE summary SET {stat_column_name('time_ms', 'sum')} = 0")
+        assert len(QueryCache.for_problem(wapi)) == 0
+
+
+class TestPlans:
+    """
+    AlchemyWAPI compiles its insert / upsert / select statements once per schema (see plans).
+
+    Behaviors:
+    - after the first insert, inserting a row compiles no sql at all
+    - rows can be inserted as positional tuples in full_row order
+    - select plans bind their own parameters and convert results (timestamps come back as datetimes)
+    """
+
+    def test_no_compile_after_first_insert(self, wapi: AlchemyWAPI, monkeypatch):
+        from sqlalchemy.sql.elements import ClauseElement
+
+        row = {"set_name": "layer", "rep": 0, "solver": "MIP"}
+        row |= {"objective": 1.0, "time_ms": 2.0}
+        wapi.pspace.add_run_key(row)
+        wapi.insert_single_row(dict(row))
+        n_plans = len(wapi.plans.plans)
+
+        compiles = []
+        compile_w_cache = ClauseElement._compile_w_cache
+        monkeypatch.setattr(
+            ClauseElement,
+            "_compile_w_cache",
+            lambda *a, **kw: compiles.append(a[0]) or compile_w_cache(*a, **kw),
+        )
+        for _ in range(3):
+            wapi.insert_single_row(dict(row))
+        assert compiles == []
+        assert len(wapi.plans.plans) == n_plans
+        monkeypatch.undo()
+
+        df = wapi.query_frame().to_dataframe()
+        assert len(df) == 4
+        assert wapi.read_sketch(row, "objective").count == 4
+
+    def test_insert_tuples(self, wapi: AlchemyWAPI):
+        assert wapi.row_names == ["set_name", "rep", "solver", "objective", "time_ms"]
+        wapi.insert_tuples([("layer", 1, "MIP", 1.0, 2.0), ("grid", 0, "DP", 3.0, 4.0)])
+
+        df = wapi.query_frame().to_dataframe()
+        assert sorted(df["set_name"]) == ["grid", "layer"]
+        assert sorted(df["rep"]) == [0, 1]
+        latest = wapi.latest_timestamp()
+        assert isinstance(latest, datetime) and latest.tzinfo is not None
+        assert latest == df["timestamp_added"].max()
+
+
+class TestRunArchive:
+    """
+    RunArchive moves old runs into parquet files and reads them back together with the live runs.
+
+    Behaviors:
+    - runs added before the cutoff are written to space/<problem>/archive/ and deleted from the results table
+    - the newest run always stays live
+    - queries return archived and live runs, with filters and timestamp bounds applied to both
+    - runs_since / runs_between read the archive too with include_archived
+    - an archival interrupted before its delete committed is finished by the next one, runs are archived once
+    - archived runs still count: in the summary, memo and sketches (also once rebuilt) and for the run planner
+    """
+
+    def test_archive_and_query(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        pytest.importorskip("pyarrow")
+        from optiface.dbmanager.archive import RunArchive
+
+        wapi.insert_rows(default_rows_df())
+        cutoff = wapi.latest_timestamp() + timedelta(microseconds=1)
+        wapi.insert_rows(default_rows_df().head(2))
+
+        archive = RunArchive(wapi)
+        status = archive.archive(before=cutoff, chunksize=3)
+        assert status.is_ok()
+        assert [p.name for p in archive.files()] == ["runs-1-4.parquet"]
+        assert len(wapi.query_frame()) == 2
+
+        everything = archive.query()
+        assert sorted(everything["run_id"].to_pylist()) == [1, 2, 3, 4, 5, 6]
+        mip = archive.query(filters={"solver": "MIP"})
+        assert sorted(mip["objective"].to_pylist()) == [5.0, 10.0, 10.0, 20.0, 20.0]
+        assert len(archive.query(since=cutoff)) == 2
+        assert len(archive.query(until=cutoff)) == 4
+
+        # archiving everything keeps the newest run live
+        archive.archive(before=datetime.now(timezone.utc) + timedelta(days=1))
+        assert wapi.query_frame()["run_id"].to_pylist() == [6]
+        assert len(archive.query()) == 6
+
+    def test_runs_since_include_archived(self, wapi: AlchemyWAPI):
+        pytest.importorskip("pyarrow")
+        from optiface.dbmanager.archive import RunArchive
+
+        wapi.insert_rows(default_rows_df())
+        first = wapi.query_frame()["timestamp_added"].to_pylist()[0]
+        cutoff = wapi.latest_timestamp() + timedelta(microseconds=1)
+        wapi.insert_rows(default_rows_df().head(2))
+        RunArchive(wapi).archive(before=cutoff)
+
+        long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+        assert len(wapi.runs_since(long_ago)) == 2
+        since = wapi.runs_since(long_ago, include_archived=True)
+        assert since["run_id"].to_pylist() == [1, 2, 3, 4, 5, 6]
+        # one timestamp per batch, strict bound on the archived runs too
+        assert len(wapi.runs_since(first, include_archived=True)) == 2
+        between = wapi.runs_between(first, cutoff, include_archived=True)
+        assert between["run_id"].to_pylist() == [1, 2, 3, 4]
+        assert len(wapi.runs_between(first, cutoff)) == 0
+
+    def test_interrupted_archive_resumed(self, wapi: AlchemyWAPI, monkeypatch):
+        pytest.importorskip("pyarrow")
+        from optiface.dbmanager.archive import RunArchive
+
+        wapi.insert_rows(default_rows_df())
+        wapi.insert_rows(default_rows_df().head(1))
+        archive = RunArchive(wapi)
+        everything = datetime.now(timezone.utc) + timedelta(days=1)
+
+        def crash(conn, ids):
+            raise RuntimeError("crash before the delete")
+
+        # file written, delete rolled back: the runs are archived and live
+        with monkeypatch.context() as m, pytest.raises(RuntimeError):
+            m.setattr(archive, "_delete_ids", crash)
+            archive.archive(before=everything)
+        assert [p.name for p in archive.files()] == ["runs-1-4.parquet"]
+        assert len(wapi.query_frame()) == 5
+
+        status = archive.archive(before=everything)
+        assert status.is_ok()
+        assert [p.name for p in archive.files()] == ["runs-1-4.parquet"]
+        assert wapi.query_frame()["run_id"].to_pylist() == [5]
+        assert sorted(archive.query()["run_id"].to_pylist()) == [1, 2, 3, 4, 5]
+
+    def test_archived_runs_still_count(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        pytest.importorskip("pyarrow")
+        from optiface.dbmanager.archive import RunArchive
+
+        wapi.insert_rows(default_rows_df())
+        wapi.insert_rows(default_rows_df().head(1))
+        RunArchive(wapi).archive(before=datetime.now(timezone.utc) + timedelta(days=1))
+        assert len(wapi.query_frame()) == 1
+
+        grid = {"set_name": ["layer", "grid"], "solver": ["MIP", "BENDERS"]}
+        planner = RunPlanner(wapi)
+        assert collect_plan(planner, grid) == [("grid", "BENDERS", 0)]
+        assert collect_plan(planner, grid, reps=3) == [
+            ("grid", "BENDERS", 0),
+            ("grid", "MIP", 1),
+            ("layer", "BENDERS", 1),
+        ]
+        assert len(collect_plan(planner, {"rep": [0], **grid}, reps=3)) == 3
+
+        with wapi.engine.begin() as conn:
+            for table in ["summary", "run_memo", "sketches"]:
+                conn.exec_driver_sql(f"DROP TABLE {table}")
+        rebuilt = init_alchemy_api(pspace).unwrap()
+
+        assert rebuilt.read_summary()["objective__count"].sum() == 5
+        assert RunMemo(rebuilt).runs({"set_name": "layer", "solver": "MIP"}) == 3
+        sketch = rebuilt.read_sketch({"set_name": "layer", "solver": "MIP"}, "time_ms")
+        assert sketch.count == 3
+
+
+class TestBackupManager:
+    """
+    BackupManager snapshots experiments.db with the sqlite online backup API.
+
+    Behaviors:
+    - backups are complete, integrity checked copies
+    - unchanged databases are not backed up again, unless forced
+    - only the newest keep backups are kept
+    """
+
+    def test_backup_and_rotation(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        manager = BackupManager(pspace, keep=2)
+
+        res = manager.backup(pages=1)
+        assert res.is_ok()
+        first = res.unwrap()
+        with sqlite3.connect(first) as conn:
+            assert conn.execute("SELECT count(*) FROM results").fetchone()[0] == 4
+
+        # nothing changed
+        assert manager.backup().unwrap() == first
+        assert len(manager.backups()) == 1
+
+        wapi.insert_rows(default_rows_df())
+        manager.backup()
+        manager.backup(force=True)
+        assert len(manager.backups()) == 2
+        assert first not in manager.backups()
+        assert manager.verify().is_ok()
+
+    def test_backup_throttled_between_steps(self, wapi: AlchemyWAPI):
+        for _ in range(20):
+            wapi.insert_rows(default_rows_df())
+        db = _TEST_PSPACEDB_PATH
+
+        start = time.perf_counter()
+        one_step = online_backup(db, Path("whole.db"), pages=-1, sleep_s=0.02)
+        whole_s = time.perf_counter() - start
+        start = time.perf_counter()
+        steps = online_backup(db, Path("paged.db"), pages=1, sleep_s=0.02)
+        paged_s = time.perf_counter() - start
+
+        assert one_step == 1
+        assert steps > 10
+        # a pause after every step but the last
+        assert paged_s >= (steps - 1) * 0.02
+        assert paged_s > whole_s + 0.1
+        assert integrity_errors(Path("paged.db")) == []
+
+
+class TestMemoryReplica:
+    """
+    MemoryReplica / FrameCache hold a problem space's runs in memory for analysis.
+
+    Behaviors:
+    - the replica serves the AlchemyWAPI queries from its own :memory: database, and refuses inserts
+    - refresh pulls only the runs added to the source since the last load
+    - FrameCache filters its ResultFrame by feature values
+    """
+
+    def test_replica_queries_and_refresh(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        replica = MemoryReplica(wapi)
+
+        assert replica.last_run_id == 4
+        frame = replica.query_frame(replica.results_view.c["solver"] == "MIP")
+        assert sorted(frame["objective"].to_pylist()) == [5.0, 10.0, 20.0]
+        assert len(replica.read_summary()) == len(wapi.read_summary())
+        assert replica.latest_timestamp() == wapi.latest_timestamp()
+        with pytest.raises(RuntimeError):
+            replica.insert_rows(default_rows_df())
+        row = default_rows_df().iloc[0].to_dict()
+        with pytest.raises(RuntimeError):
+            replica.insert_single_row(row)
+        with pytest.raises(RuntimeError):
+            replica.insert_tuples([tuple(row.get(n) for n in replica.row_names)])
+        with pytest.raises(RuntimeError):
+            replica.insert_frame(
+                ResultFrame.from_dataframe(replica.pspace.full_row(), default_rows_df())
+            )
+        with pytest.raises(RuntimeError):
+            replica.write(lambda conn: None)
+        assert len(replica.query_frame()) == 4
+
+        wapi.insert_rows(default_rows_df())
+        assert len(replica.query_frame()) == 4
+        assert replica.refresh() == 4
+        assert replica.last_run_id == 8
+        assert len(replica.query_frame()) == 8
+        assert replica.refresh() == 0
+
+    def test_frame_cache(self, wapi: AlchemyWAPI):
+        wapi.insert_rows(default_rows_df())
+        cache = FrameCache(wapi)
+
+        assert sorted(cache.select({"set_name": "layer"})["objective"].to_pylist()) == [
+            10.0,
+            20.0,
+            30.0,
+        ]
+        assert (
+            len(cache.select({"solver": ["MIP", "BENDERS"], "set_name": "grid"})) == 1
+        )
+        assert len(cache.select({"solver": "nope"})) == 0
+
+        wapi.insert_rows(default_rows_df())
+        assert cache.refresh() == 4
+        assert len(cache.select({"solver": "MIP"})) == 6
+
+
+@pytest.mark.asyncio
+class TestAsyncAlchemyWAPI:
+    """
+    AsyncAlchemyWAPI is the asyncio twin of AlchemyWAPI.
+
+    Behaviors:
+    - the async factory reconciles the database like the sync one
+    - inserts keep the summary in step, queries stream ResultFrame chunks
+    - concurrent readers and writers share one event loop
+    """
+
+    async def test_insert_and_stream(self, pspace: ProblemSpace):
+        res = await init_async_alchemy_api(pspace)
+        assert res.is_ok()
+        awapi = res.unwrap()
+
+        status = await awapi.insert_rows(default_rows_df())
+        assert status.is_ok()
+        frame = await awapi.query_frame(awapi.results_view.c["solver"] == "MIP")
+        assert sorted(frame["objective"].to_pylist()) == [5.0, 10.0, 20.0]
+        chunks = [len(f) async for f in awapi.stream_frames(chunksize=3)]
+        assert chunks == [3, 1]
+        assert len(await awapi.read_summary()) == 3
+
+        # a sync API over the same file sees the async writes
+        assert len(init_alchemy_api(pspace).unwrap().query_frame()) == 4
+        await awapi.dispose()
+
+    async def test_concurrent_reads_and_writes(self, pspace: ProblemSpace):
+        awapi = (await init_async_alchemy_api(pspace)).unwrap()
+        frame = ResultFrame.from_dataframe(pspace.full_row(), default_rows_df())
+
+        writes = [awapi.insert_frame(frame) for _ in range(5)]
+        reads = [awapi.query_frame() for _ in range(50)]
+        await asyncio.gather(*writes, *reads)
+
+        assert len(await awapi.query_frame()) == 20
+        await awapi.dispose()
+
+
+_WRITERS = 6
+_WRITER_FILES = 10
+_MIGRATECSV = Path(__file__).resolve().parents[1] / "migratecsv.py"
+
+
+class TestWriteConcurrency:
+    """
+    Several processes writing one experiments.db, with a WriteConcurrency mode.
+
+    Behaviors:
+    - no rows are lost or duplicated (busy transactions are retried whole), with and without the writer lock
+    - the summary stays in step with the results table
+    """
+
+    @pytest.mark.parametrize("writer_lock", [False, True])
+    def test_writer_processes(self, pspace: ProblemSpace, writer_lock: bool):
+        # create the database once, the writers all reflect it
+        init_alchemy_api(pspace, concurrency=WriteConcurrency()).unwrap()
+
+        procs = []
+        for w in range(_WRITERS):
+            csvs = []
+            for f in range(_WRITER_FILES):
+                path = Path(f"w{w}_{f}.csv")
+                df = default_rows_df()
+                df["set_name"] = f"w{w}"
+                df["rep"] = [f * 4 + i for i in range(4)]
+                df.to_csv(path, index=False)
+                csvs.append(str(path))
+            args = [sys.executable, str(_MIGRATECSV), _TEST_PSPACE_NAME, *csvs]
+            args += ["--batch-size", "4", "--busy-timeout-ms", "20"]
+            if writer_lock:
+                args.append("--writer-lock")
+            procs.append(
+                subprocess.Popen(
+                    args,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    env={**os.environ, "PYTHONPATH": str(_MIGRATECSV.parent)},
+                )
+            )
+        errs = [p.communicate(timeout=120)[1] for p in procs]
+        assert [p.returncode for p in procs] == [0] * _WRITERS, errs
+
+        with sqlite3.connect(_TEST_PSPACEDB_PATH) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        frame = init_alchemy_api(pspace).unwrap().query_frame()
+        expected = _WRITERS * _WRITER_FILES * 4
+        assert len(frame) == expected
+        keys = set(zip(frame["set_name"].to_pylist(), frame["rep"].to_pylist()))
+        assert len(keys) == expected
+
+        summary = init_alchemy_api(pspace).unwrap().read_summary()
+        assert summary["objective__count"].sum() == expected
+
+
+class TestStress:
+    """
+    The stress harness: writer processes and threads, csv migrators and readers against one experiments.db.
+
+    Behaviors:
+    - synthetic rows are valid and uniquely tagged per writer and sequence number
+    - every committed row is stored exactly once, and counted by the summary
+    - latency percentiles for every writer and reader op
+    - soak mode runs until its deadline, and a second run only checks its own rows
+    """
+
+    def test_synthetic_rows(self, pspace: ProblemSpace):
+        tag = tag_feature(pspace)
+        assert tag.name == "set_name"
+        rows = synthetic_rows(pspace, tag, 3, 10, 5, random.Random(0))
+        assert [r["set_name"] for r in rows] == [f"stress-3-{i}" for i in range(10, 15)]
+        for row in rows:
+            errs, _ = pspace.row_validator(row)
+            assert errs is None
+
+    def test_stress_run(self, pspace: ProblemSpace):
+        config = StressConfig(
+            processes=2, threads=2, migrators=1, readers=2, batch_size=5, batches=3
+        )
+        res = run_stress(pspace, config)
+        assert res.is_ok()
+        report = res.unwrap()
+        assert report.ok, res.unwrap_notes()
+        assert report.rows_expected == report.rows_found == 4 * 3 * 5 + 3 * 5
+
+        latency = report.latency_frame().set_index("op")
+        assert latency.loc["insert_batch", "count"] == 2 * 3
+        assert latency.loc["insert_tuples", "count"] == 2 * 3
+        assert latency.loc["migrate", "count"] == 1
+        assert latency.loc["read_count", "count"] >= 1
+        assert (latency["p50_ms"] <= latency["p99_ms"]).all()
+
+    def test_soak(self, pspace: ProblemSpace):
+        config = StressConfig(
+            processes=1,
+            threads=2,
+            migrators=0,
+            readers=1,
+            batch_size=5,
+            soak_s=1.0,
+        )
+        first = run_stress(pspace, config).unwrap()
+        assert first.ok and first.elapsed_s >= 1.0
+        # same tags again: only the rows of this run are checked
+        second = run_stress(pspace, config).unwrap()
+        assert second.ok and second.rows_found > 0
+
+
+class TestQuarantine:
+    """
+    Rows rejected by validation are streamed to a quarantine file next to their source.
+
+    Behaviors:
+    - a quarantined row keeps its source line number and its error codes
+    - JSONL and CSV quarantines, from row and frame insertion
+    - no file is written when nothing is rejected
+    - the fixed quarantine re-ingests on its own
+    """
+
+    def bad_rows(self) -> tuple[Path, pd.DataFrame]:
+        source = Path("migrations") / _TEST_PSPACE_NAME / "runs.csv"
+        df = default_rows_df()
+        df["objective"] = df["objective"].astype(object)
+        df.loc[1, "objective"] = "oops"
+        df.loc[3, "solver"] = None
+        return source, df
+
+    def test_rows_quarantined_and_reingested(self, wapi: AlchemyWAPI):
+        source, df = self.bad_rows()
+        path = quarantine_path(source)
+        path.parent.mkdir(parents=True)
+        assert path.name == "runs.quarantine.jsonl"
+
+        with QuarantineWriter(path, flush_rows=1) as quarantine:
+            wapi.insert_rows(df, quarantine=quarantine)
+        assert quarantine.n_rows == 2
+
+        bad = read_quarantine(path)
+        assert bad["_line"].tolist() == [3, 5]
+        assert bad["_errors"].tolist() == ["E_TYPE:objective", "E_MISSING:solver"]
+
+        fixed = bad.drop(columns=["_line", "_errors"])
+        fixed["objective"] = [20.0, 5.0]
+        fixed["solver"] = ["MIP", "MIP"]
+        with QuarantineWriter(quarantine_path(path)) as quarantine:
+            wapi.insert_rows(fixed, quarantine=quarantine)
+        assert quarantine.n_rows == 0
+        assert not quarantine.path.exists()
+        assert len(wapi.query_frame()) == 4
+
+    def test_frame_quarantine_csv(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        source, df = self.bad_rows()
+        frame = ResultFrame.from_dataframe(pspace.full_row(), df)
+        path = quarantine_path(source, fmt=".csv")
+        path.parent.mkdir(parents=True)
+
+        with QuarantineWriter(path) as quarantine:
+            wapi.insert_frame(frame, quarantine=quarantine)
+
+        bad = read_quarantine(path)
+        assert bad["_line"].tolist() == [3, 5]
+        assert bad["set_name"].tolist() == ["layer", "grid"]
+        assert len(wapi.query_frame()) == 2
+
+    @pytest.mark.parametrize("engine", ["arrow", "pandas"])
+    def test_frame_quarantine_keeps_raw_record(
+        self, pspace: ProblemSpace, wapi: AlchemyWAPI, engine: str
+    ):
+        source = Path("runs.csv")
+        df = default_rows_df()
+        df["objective"] = df["objective"].astype(object)
+        df.loc[1, "objective"] = "abc"
+        df["note"] = ["a", "b", "c", "d"]
+        df.to_csv(source, index=False)
+
+        path = quarantine_path(source)
+        with QuarantineWriter(path) as quarantine:
+            for first_line, frame in read_frames(source, pspace, engine=engine):
+                wapi.insert_frame(frame, quarantine=quarantine, first_line=first_line)
+
+        # the value that failed, and the column that is not a feature, as they were in the source
+        # (pandas reads the whole mixed objective column as text, so there every row is rejected)
+        bad = read_quarantine(path).set_index("_line")
+        assert bad.loc[3, "_errors"] == "E_TYPE:objective"
+        assert bad.loc[3, "objective"] == "abc"
+        assert bad.loc[3, "note"] == "b"
+        assert len(bad) + len(wapi.query_frame()) == 4
+
+
+class TestReaders:
+    """
+    Migration files are streamed in batches by the reader registered for their suffix.
+
+    Behaviors:
+    - csv, gzip / zstd csv, JSON Lines and parquet files yield the same rows, restricted to problem space features
+    - batches carry the source line (row number for parquet) of their first row
+    - unsupported files have no reader
+    """
+
+    @pytest.mark.parametrize(
+        "name",
+        ["runs.csv", "runs.csv.gz", "runs.csv.zst", "runs.jsonl", "runs.parquet"],
+    )
+    def test_formats(self, pspace: ProblemSpace, wapi: AlchemyWAPI, name: str):
+        df = default_rows_df()
+        df["note"] = "not a feature"
+        path = Path(name)
+        if name == "runs.jsonl":
+            df.to_json(path, orient="records", lines=True)
+        elif name == "runs.parquet":
+            pytest.importorskip("pyarrow")
+            df.to_parquet(path)
+        else:
+            if name.endswith(".zst"):
+                pytest.importorskip("zstandard")
+            df.to_csv(path, index=False)
+
+        batches = list(read_batches(path, pspace, batch_rows=3))
+        assert [len(b) for _, b in batches] == [3, 1]
+        first = 2 if ".csv" in name else 1
+        assert [line for line, _ in batches] == [first, first + 3]
+        assert "note" not in batches[0][1].columns
+
+        for line, batch in batches:
+            assert wapi.insert_rows(batch, first_line=line).is_ok()
+        frame = wapi.query_frame()
+        assert sorted(frame["objective"].to_pylist()) == [5.0, 10.0, 20.0, 30.0]
+
+    def test_unsupported(self):
+        assert reader_for(Path("runs.xlsx")) is None
+        assert reader_for(Path("RUNS.CSV.GZ")) is not None
+
+
+class TestArrowCsv:
+    """
+    The Arrow csv engine parses csv text straight into typed ResultFrames.
+
+    Behaviors:
+    - columns get their feature's type, whatever the other cells of the column hold
+    - numbers and bools are converted by the multithreaded parser itself, blocks keep their order
+    - a cell that does not parse is a type error of that row only (and is quarantined)
+    - rows with the wrong number of fields are quarantined with their line and text, later lines stay exact
+    - same rows as the pandas engine, compressed files included
+    """
+
+    def test_typed_cells(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        pytest.importorskip("pyarrow")
+        path = Path("runs.csv.gz")
+        df = default_rows_df()
+        df["objective"] = df["objective"].astype(object)
+        df.loc[1, "objective"] = "oops"
+        df.loc[3, "solver"] = None
+        df["rep"] = [0, 1, 2, 3]
+        df.to_csv(path, index=False)
+
+        [(line, frame)] = list(read_frames(path, pspace, engine="arrow"))
+        assert line == 2
+        assert frame["rep"].values.dtype == np.int64
+        assert frame["objective"].values.dtype == np.float64
+        assert frame["objective"].to_pylist() == [10.0, None, 30.0, 5.0]
+
+        quarantined = Path("runs.quarantine.jsonl")
+        with QuarantineWriter(quarantined) as quarantine:
+            wapi.insert_frame(frame, quarantine=quarantine, first_line=line)
+        assert read_quarantine(quarantined)["_line"].tolist() == [3, 5]
+        assert sorted(wapi.query_frame()["rep"].to_pylist()) == [0, 2]
+
+    def test_parallel_typed_read(self, pspace: ProblemSpace):
+        pytest.importorskip("pyarrow")
+        from optiface.dbmanager.arrowcsv import arrow_csv_frames
+
+        path = Path("runs.csv")
+        df = pd.concat([default_rows_df()] * 500, ignore_index=True)
+        df["rep"] = range(len(df))
+        df.to_csv(path, index=False)
+
+        # many small blocks, parsed on several threads
+        frames = list(arrow_csv_frames(path, pspace, batch_rows=700, block_size=4096))
+        assert [line for line, _ in frames] == [2, 702, 1402]
+        frame = ResultFrame.concat([f for _, f in frames])
+        assert frame["rep"].to_pylist() == list(range(len(df)))
+        # the source is what the parser converted, not text
+        assert frames[0][1].source_rows(np.array([0]))[0]["objective"] == 10.0
+
+    def test_malformed_rows_quarantined(self, pspace: ProblemSpace, wapi: AlchemyWAPI):
+        pytest.importorskip("pyarrow")
+        path = Path("runs.csv")
+        path.write_text(
+            "set_name,solver,objective,time_ms\n"
+            "layer,MIP,1.0,1.0\n"
+            "layer,MIP,2.0\n"
+            "layer,MIP,3.0,3.0\n"
+            "grid,MIP,x,4.0\n"
+            "grid,MIP,5.0,5.0,extra\n"
+            "grid,MIP,6.0,6.0\n"
+        )
+
+        quarantined = quarantine_path(path)
+        with QuarantineWriter(quarantined) as quarantine:
+            for line, frame in read_frames(
+                path, pspace, batch_rows=2, engine="arrow", quarantine=quarantine
+            ):
+                wapi.insert_frame(frame, quarantine=quarantine, first_line=line)
+
+        bad = read_quarantine(quarantined).set_index("_line")
+        assert sorted(bad.index) == [3, 5, 6]
+        assert bad.loc[3, "_errors"] == "E_PARSE:"
+        assert bad.loc[3, "_text"] == "layer,MIP,2.0"
+        assert bad.loc[5, "_errors"] == "E_TYPE:objective"
+        assert sorted(wapi.query_frame()["objective"].to_pylist()) == [1.0, 3.0, 6.0]
+
+    def test_same_as_pandas(self, pspace: ProblemSpace):
+        pytest.importorskip("pyarrow")
+        path = Path("runs.csv")
+        default_rows_df().to_csv(path, index=False)
+
+        [(_, arrow)] = list(read_frames(path, pspace, engine="arrow"))
+        [(_, pandas)] = list(read_frames(path, pspace, engine="pandas"))
+        assert arrow.to_dataframe().equals(pandas.to_dataframe())
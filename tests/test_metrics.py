@@ -0,0 +1,63 @@
+import threading
+import urllib.request
+
+from optiface.metrics import Registry
+
+
+class TestMetrics:
+    """
+    optiface.metrics holds per-thread sharded counters and fixed-bucket histograms, rendered in the prometheus text format.
+
+    Behaviors:
+    - counter increments from many threads add up
+    - histogram buckets are cumulative, with sum and count
+    - the registry renders to a textfile and over a localhost http endpoint
+    """
+
+    def test_counter_across_threads(self):
+        registry = Registry()
+        rows = registry.counter("rows_total", "Rows.", ("problem",))
+        child = rows.labels(problem="p")
+
+        def work():
+            for _ in range(1000):
+                child.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert child.value() == 8000
+        assert 'rows_total{problem="p"} 8000' in registry.render()
+
+    def test_histogram(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        child = latency.labels()
+        for v in [0.05, 0.1, 0.5, 2.0]:
+            child.observe(v)
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_sum 2.65" in text
+        assert "latency_seconds_count 4" in text
+
+    def test_exposition(self, tmp_path):
+        registry = Registry()
+        registry.counter("up_total", "Up.").labels().inc(3)
+
+        path = tmp_path / "optiface.prom"
+        registry.write_textfile(path)
+        assert "up_total 3" in path.read_text()
+
+        server = registry.serve(port=0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as res:
+                assert "up_total 3" in res.read().decode()
+        finally:
+            server.shutdown()
@@ -17,6 +17,8 @@ from optiface.core.optispace import (
     OptiSpace,
     read_pspace_from_yaml,
     init_default_problem_space,
+    _ROW_ERR_TYPE,
+    _ROW_ERR_MISSING,
 )
 
 from optiface.constants import _EXPERIMENTS_DBFILE, _SPACE, _PS_FILE, _DEFAULT
@@ -261,6 +263,61 @@ class TestProblemSpace:
 
         assert not valid
 
+    def test_row_validator(self):
+        default_pspace = init_default_problem_space()
+        validator = default_pspace.row_validator
+
+        # compiled once per schema
+        assert validator is init_default_problem_space().row_validator
+
+        row = {"set_name": "s", "solver": "MIP", "objective": 1, "time_ms": 2.0, "n": 5}
+        errs, extras = validator(row)
+        assert errs is None
+        assert extras == {"n": 5}
+        assert row["rep"] == default_pspace.instance_key["rep"].default
+        assert "n" not in row
+
+        row = {"set_name": "s", "rep": "one", "objective": 1.0, "time_ms": 2.0}
+        errs, extras = validator(row)
+        assert errs == [(_ROW_ERR_TYPE, "rep"), (_ROW_ERR_MISSING, "solver")]
+        assert not default_pspace.validate_row(row).is_ok()
+
+    def test_row_validator_keyed_on_default_type(self):
+        # 0 == 0.0 == False: equal defaults of different types must not share a compiled validator
+        validators = []
+        for default in [0, 0.0, False]:
+            pspace = init_default_problem_space()
+            pspace.instance_key["rep"].default = default
+            validators.append(pspace.row_validator)
+
+            row = {"set_name": "s", "solver": "MIP", "objective": 1.0, "time_ms": 2.0}
+            pspace.row_validator(row)
+            assert type(row["rep"]) is type(default)
+
+        assert len(set(map(id, validators))) == 3
+
+    def test_row_validator_cached_per_pspace(self):
+        pspace = init_default_problem_space()
+        validator = pspace.row_validator
+        assert pspace.row_validator is validator
+
+        # in-place edits are invisible until features_changed
+        pspace.instance_key["rep"].default = 7
+        assert pspace.row_validator is validator
+        pspace.features_changed()
+        row = {"set_name": "s", "solver": "MIP", "objective": 1.0, "time_ms": 2.0}
+        pspace.row_validator(row)
+        assert row["rep"] == 7
+
+        # reassigning a key clears it
+        validator = pspace.row_validator
+        pspace.solver_key = {}
+        assert pspace.row_validator is not validator
+        errs, _ = pspace.row_validator(
+            {"set_name": "s", "objective": 1.0, "time_ms": 2.0}
+        )
+        assert errs is None
+
 
 class TestOSpaceManager:
     """
@@ -301,3 +358,108 @@ class TestOSpaceManager:
 
     def test_pspace_remove_feature(self):
         assert True
+
+
+class TestSchemaInference:
+    """
+    Bootstrap a ProblemSpace from csv logs (core.inference).
+
+    Behaviors:
+    - reservoir sampling keeps at most k rows, seek sampling reads only whole rows of the file
+    - narrowest type that every sampled value parses as, required iff never empty
+    - instance / solver / output keys guessed from column names, run key columns skipped
+    - the inferred pspace round trips through problemspace.yaml and validates the rows it came from
+    """
+
+    def write_logs(self, path: Path, n: int) -> Path:
+        lines = ["set_name,n_items,solver,objective,time_ms,optimal,status,run_id,note"]
+        for i in range(n):
+            note = "warm" if i % 3 == 0 else ""
+            status = "OPTIMAL" if i % 2 else "TIME_LIMIT"
+            lines.append(
+                f"set{i % 4},{10 * i},{'MIP' if i % 2 else 'DP'},{i * 1.5},{i}.25,{'True' if i % 2 else 'False'},{status},{i},{note}"
+            )
+        path.write_text("\n".join(lines) + "\n")
+        return path
+
+    def test_sample_csv(self, tmp_path, monkeypatch):
+        from optiface.core import inference
+
+        logs = self.write_logs(tmp_path / "logs.csv", 500)
+        header, rows = inference.sample_csv(logs, k=50)
+        assert header[0] == "set_name"
+        assert len(rows) == 50
+        assert len({tuple(r) for r in rows}) == 50
+
+        # large file path: random offsets, every sampled row is a whole row of the file
+        monkeypatch.setattr(inference, "_SEEK_THRESHOLD_BYTES", 0)
+        all_rows = {tuple(l.split(",")) for l in logs.read_text().splitlines()[1:]}
+        header, rows = inference.sample_csv(logs, k=50)
+        assert header[0] == "set_name"
+        assert 0 < len(rows) <= 50
+        assert all(tuple(r) in all_rows for r in rows)
+
+    def test_infer_pspace(self, tmp_path, monkeypatch):
+        from optiface.core.inference import infer_feature_type_str, infer_pspace
+
+        assert infer_feature_type_str(["1", "2"]) == "int"
+        assert infer_feature_type_str(["1", "2.5"]) == "float"
+        assert infer_feature_type_str(["true", "False"]) == "bool"
+        assert infer_feature_type_str(["2024-01-01T10:00:00"]) == "datetime"
+        assert infer_feature_type_str(["a", "1"]) == "str"
+
+        monkeypatch.chdir(tmp_path)
+        _SPACE.mkdir()
+        logs = self.write_logs(tmp_path / "logs.csv", 200)
+        res = infer_pspace("inferred", [logs], sample_rows=100)
+        assert res.is_ok()
+        pspace = res.unwrap()
+
+        # non-numeric columns named like outputs are instance parameters
+        assert set(pspace.instance_key) == {
+            "set_name",
+            "n_items",
+            "optimal",
+            "status",
+            "note",
+        }
+        assert set(pspace.solver_key) == {"solver"}
+        assert set(pspace.output_key) == {"objective", "time_ms"}
+        assert pspace.instance_key["n_items"].feature_type is int
+        assert pspace.instance_key["set_name"].required
+        assert not pspace.instance_key["note"].required
+        assert pspace.instance_key["note"].default == ""
+        assert pspace.output_key["time_ms"].feature_type is float
+        assert pspace.instance_key["optimal"].feature_type is bool
+        assert pspace.instance_key["status"].feature_type is str
+
+        pspace.write_to_yaml()
+        assert read_pspace_from_yaml("inferred") == pspace
+
+        row = {"set_name": "set1", "n_items": 10, "solver": "DP", "objective": 1.5}
+        row |= {"time_ms": 2.25, "optimal": True, "status": "OPTIMAL"}
+        assert pspace.validate_row(row).is_ok()
+        assert row["note"] == ""
+
+        assert infer_pspace("missing", [tmp_path / "nope.csv"]).is_err()
+
+    def test_infer_then_ingest(self, tmp_path, monkeypatch):
+        from optiface.core.inference import infer_pspace
+        from optiface.dbmanager.dbm import init_alchemy_api
+        from optiface.dbmanager.readers import read_frames
+
+        monkeypatch.chdir(tmp_path)
+        _SPACE.mkdir()
+        logs = self.write_logs(tmp_path / "logs.csv", 40)
+        pspace = infer_pspace("inferred", [logs]).unwrap()
+        pspace.write_to_yaml()
+
+        wapi = init_alchemy_api(read_pspace_from_yaml("inferred")).unwrap()
+        for first_line, frame in read_frames(logs, wapi.pspace):
+            assert wapi.insert_frame(frame, first_line=first_line).is_ok()
+
+        stored = wapi.query_frame()
+        assert len(stored) == 40
+        assert sorted(set(stored["status"].to_pylist())) == ["OPTIMAL", "TIME_LIMIT"]
+        summary = wapi.read_summary()
+        assert summary["objective__count"].sum() == 40
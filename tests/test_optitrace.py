@@ -0,0 +1,94 @@
+import json
+import pytest
+import pandas as pd
+
+from pathlib import Path
+
+from optiface.core import optitrace
+from optiface.core.optispace import init_default_problem_space
+from optiface.dbmanager.dbm import init_alchemy_api
+
+
+@pytest.fixture
+def wapi(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("space").mkdir()
+    ps = init_default_problem_space("testproblem")
+    ps.write_to_yaml()
+    res = init_alchemy_api(ps)
+    assert res.is_ok()
+    return res.unwrap()
+
+
+def rows_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "set_name": ["layer", "layer", "grid"],
+            "solver": ["MIP", "BENDERS", None],
+            "objective": [10.0, 20.0, 30.0],
+            "time_ms": [1.0, 2.0, 3.0],
+        }
+    )
+
+
+class TestTracer:
+    """
+    optitrace collects per stage spans and counters while a tracer is active.
+
+    Behaviors:
+    - ingest stages (validation, run key, summary, insert, commit, sql) are timed, rows and commits are counted
+    - nothing is collected outside of tracing()
+    - spans are written as a JSON log and as an OTLP/JSON trace file
+    """
+
+    def test_ingest_spans_and_counters(self, wapi, tmp_path):
+        json_path = tmp_path / "trace.jsonl"
+        otlp_path = tmp_path / "trace.otlp.json"
+
+        with optitrace.tracing(json_path=json_path, otlp_path=otlp_path) as tracer:
+            wapi.insert_rows(rows_df())
+
+        stages = {s["stage"]: s for s in tracer.summary()}
+        for stage in [
+            optitrace.SPAN_VALIDATE,
+            optitrace.SPAN_RUN_KEY,
+            optitrace.SPAN_SUMMARY,
+            optitrace.SPAN_RESULTS_INSERT,
+            optitrace.SPAN_COMMIT,
+            optitrace.SPAN_SQL_COMPILE,
+            optitrace.SPAN_SQL_EXECUTE,
+        ]:
+            assert stages[stage]["calls"] >= 1
+        assert tracer.counters[optitrace.COUNT_ROWS_IN] == 3
+        assert tracer.counters[optitrace.COUNT_ROWS_REJECTED] == 1
+        assert tracer.counters[optitrace.COUNT_ROWS_WRITTEN] == 2
+        assert tracer.counters[optitrace.COUNT_COMMITS] == 1
+
+        # the commit span is nested in its transaction span
+        spans = {s.name: s for s in tracer.spans}
+        assert spans["commit"].parent_id == spans["transaction"].span_id
+
+        lines = [json.loads(line) for line in json_path.read_text().splitlines()]
+        assert lines[-1]["type"] == "summary"
+        assert len(lines) == len(tracer.spans) + 1
+
+        otlp = json.loads(otlp_path.read_text())
+        otlp_spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert len(otlp_spans) == len(tracer.spans)
+
+        # inactive
+        wapi.insert_rows(rows_df())
+        assert tracer.counters[optitrace.COUNT_ROWS_IN] == 3
+
+    def test_capture_modes(self, wapi):
+        with optitrace.tracing(capture="cprofile") as tracer:
+            wapi.insert_rows(rows_df())
+        assert "insert_rows" in (tracer.profile_report or "")
+
+        with optitrace.tracing(capture="tracemalloc") as tracer:
+            wapi.insert_rows(rows_df())
+        assert tracer.memory_report is not None
+        assert tracer.memory_report["peak_bytes"] > 0
+
+        with pytest.raises(ValueError):
+            optitrace.Tracer(capture="perf")
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, timezone
+
+from optiface.core.optispace import (
+    Feature,
+    init_default_problem_space,
+    _ROW_ERR_TYPE,
+    _ROW_ERR_MISSING,
+)
+from optiface.core.resultframe import ResultFrame, validate_frame
+
+
+def mixed_default_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "set_name": ["layer", None, "grid", "layer"],
+            "rep": [1, None, "one", None],
+            "solver": ["MIP", "MIP", "BENDERS", "BENDERS"],
+            "objective": [1.0, 2.0, 3.0, 4.0],
+            "time_ms": [10, 20, 30, 40],
+            "n": [5, 5, 5, 5],
+        }
+    )
+
+
+def required_feature(name: str, feature_type_str: str) -> Feature:
+    return Feature(
+        name=name,
+        required=True,
+        default=None,
+        verbose_name=name,
+        short_name=name,
+        feature_type_str=feature_type_str,
+    )
+
+
+class TestResultFrame:
+    """
+    ResultFrame is a columnar batch of rows, one typed numpy array per Feature.
+
+    Behaviors:
+    - str features are dictionary encoded, optional features carry a null bitmap
+    - validate_frame applies ProblemSpace row validation to the whole frame:
+        - type errors and missing required features reject the row, with the row validation error codes
+        - missing non-required features get their default
+    - values are type checked like ProblemSpace.validate_row (isinstance), bools are not numbers
+    - coerced frames (values read from files) parse datetime / number / bool text and take integral floats as ints
+    """
+
+    def test_from_dataframe(self):
+        pspace = init_default_problem_space()
+        frame = ResultFrame.from_dataframe(pspace.full_row(), mixed_default_df())
+
+        assert len(frame) == 4
+        assert "n" not in frame.columns
+
+        solver = frame["solver"]
+        assert solver.values.dtype == np.int32
+        assert solver.dictionary == ["MIP", "BENDERS"]
+        assert solver.validity is None
+        assert solver.to_pylist() == ["MIP", "MIP", "BENDERS", "BENDERS"]
+
+        assert frame["rep"].to_pylist() == [1, None, None, None]
+        assert frame["time_ms"].values.dtype == np.float64
+
+    def test_validate_frame(self):
+        pspace = init_default_problem_space()
+        frame = ResultFrame.from_dataframe(pspace.full_row(), mixed_default_df())
+
+        valid, errors = validate_frame(pspace, frame)
+
+        assert errors == [(1, _ROW_ERR_MISSING, "set_name"), (2, _ROW_ERR_TYPE, "rep")]
+        assert len(valid) == 2
+        assert valid["rep"].to_pylist() == [1, pspace.instance_key["rep"].default]
+        assert valid["set_name"].to_pylist() == ["layer", "layer"]
+
+    def test_concat_merges_dictionaries(self):
+        pspace = init_default_problem_space()
+        features = pspace.full_row()
+        first = ResultFrame.from_rows(features, [{"solver": "MIP"}, {"solver": "LP"}])
+        second = ResultFrame.from_rows(features, [{"solver": "LP"}, {"solver": "BB"}])
+
+        frame = ResultFrame.concat([first, second])
+
+        assert frame["solver"].dictionary == ["MIP", "LP", "BB"]
+        assert frame["solver"].to_pylist() == ["MIP", "LP", "LP", "BB"]
+
+    def test_type_checks_match_validate_row(self):
+        pspace = init_default_problem_space()
+        rows = [
+            {
+                "set_name": "layer",
+                "rep": 2.0,
+                "solver": "MIP",
+                "objective": 1.0,
+                "time_ms": 1.0,
+            },
+            {
+                "set_name": "layer",
+                "rep": True,
+                "solver": "MIP",
+                "objective": 1.0,
+                "time_ms": 1.0,
+            },
+            {
+                "set_name": "layer",
+                "rep": 2,
+                "solver": "MIP",
+                "objective": 1.0,
+                "time_ms": 1,
+            },
+        ]
+        frame = ResultFrame.from_rows(pspace.full_row(), rows)
+
+        _, errors = validate_frame(pspace, frame)
+
+        assert errors == [(0, _ROW_ERR_TYPE, "rep"), (1, _ROW_ERR_TYPE, "rep")]
+        # validate_row agrees on the int / float cases, bools are ints to isinstance only
+        assert pspace.validate_row(rows[0]).is_err()
+        assert not pspace.validate_row(rows[2]).is_err()
+
+    def test_datetime_values_not_parsed(self):
+        stamp = required_feature("stamp", "datetime")
+        when = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+        df = pd.DataFrame({"stamp": [when, 1_700_000_000, "2024-05-01", None]})
+
+        frame = ResultFrame.from_dataframe([stamp], df)
+
+        assert frame["stamp"].to_pylist() == [when, None, None, None]
+        assert frame.type_errors["stamp"].tolist() == [False, True, True, False]
+
+    def test_coerce_parses_file_values(self):
+        stamp = required_feature("stamp", "datetime")
+        n = required_feature("n", "int")
+        ok = required_feature("ok", "bool")
+        df = pd.DataFrame(
+            {
+                "stamp": ["2024-05-01T12:00:00Z", 1_700_000_000, None],
+                "n": [2.0, "3", 2.5],
+                "ok": ["True", "0", "maybe"],
+            }
+        )
+
+        frame = ResultFrame.from_dataframe([stamp, n, ok], df, coerce=True)
+
+        when = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+        assert frame["stamp"].to_pylist() == [when, None, None]
+        assert frame.type_errors["stamp"].tolist() == [False, True, False]
+        assert frame["n"].to_pylist() == [2, 3, None]
+        assert frame["ok"].to_pylist() == [True, False, None]
+
+    def test_coerce_bool_text_as_featuredata(self):
+        ok = required_feature("ok", "bool")
+        df = pd.DataFrame({"ok": ["yes", " NO ", "1", "false", "y"]})
+
+        frame = ResultFrame.from_dataframe([ok], df, coerce=True)
+
+        assert frame["ok"].to_pylist() == [True, False, True, False, None]